@@ -11,3 +11,69 @@ JWT_EXPIRE_HOURS = 24
 
 # DES Encryption settings
 DES_KEY = os.getenv("DES_KEY", "f87e43f9")
+
+# Request tracing settings
+TRACE_SLOW_THRESHOLD_MS = float(os.getenv("TRACE_SLOW_THRESHOLD_MS", "50"))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+
+# Hot key tracking settings
+HOT_KEY_CAPACITY = int(os.getenv("HOT_KEY_CAPACITY", "1000"))
+HOT_KEY_FLUSH_INTERVAL = int(os.getenv("HOT_KEY_FLUSH_INTERVAL", "10"))
+HOT_KEY_RETENTION_HOURS = int(os.getenv("HOT_KEY_RETENTION_HOURS", "24"))
+
+# Event loop lag monitoring settings
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "200"))
+LOOP_LAG_WINDOW = int(os.getenv("LOOP_LAG_WINDOW", "600"))
+LOOP_BLOCK_SAMPLE_SIZE = int(os.getenv("LOOP_BLOCK_SAMPLE_SIZE", "50"))
+
+# Segment counter storage: "string" (one key per counter) or "hash" (bucketed per-system hashes)
+SEGMENT_STORAGE_LAYOUT = os.getenv("SEGMENT_STORAGE_LAYOUT", "string")
+SEGMENT_HASH_BUCKETS = int(os.getenv("SEGMENT_HASH_BUCKETS", "1024"))
+
+# Idle segment archival (0 disables archival; activity is still recorded)
+SEGMENT_ARCHIVE_IDLE_SECONDS = int(os.getenv("SEGMENT_ARCHIVE_IDLE_SECONDS", "0"))
+SEGMENT_ARCHIVE_INTERVAL = int(os.getenv("SEGMENT_ARCHIVE_INTERVAL", "3600"))
+SEGMENT_ARCHIVE_BATCH_SIZE = int(os.getenv("SEGMENT_ARCHIVE_BATCH_SIZE", "500"))
+SEGMENT_ACTIVITY_FLUSH_INTERVAL = int(os.getenv("SEGMENT_ACTIVITY_FLUSH_INTERVAL", "30"))
+
+# Database driver settings
+DB_EXECUTOR_MAX_WORKERS = int(os.getenv("DB_EXECUTOR_MAX_WORKERS", "8"))
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+DB_CALL_TIMEOUT = int(os.getenv("DB_CALL_TIMEOUT", "60"))
+# MAX() fallback queries may scan a whole table
+DB_MAX_ID_TIMEOUT = int(os.getenv("DB_MAX_ID_TIMEOUT", "600"))
+
+# Database connection pool settings (per database config, per worker)
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "4"))
+DB_POOL_IDLE_TIMEOUT = int(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+DB_POOL_HEALTH_CHECK_INTERVAL = int(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+DB_POOL_ACQUIRE_TIMEOUT = int(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "30"))
+DB_POOL_RESERVED_SIZE = int(os.getenv("DB_POOL_RESERVED_SIZE", "1"))
+
+# Catalog metadata cache settings (per worker)
+METADATA_CACHE_MAX_SIZE = int(os.getenv("METADATA_CACHE_MAX_SIZE", "1000"))
+METADATA_CACHE_TTL = int(os.getenv("METADATA_CACHE_TTL", "300"))
+
+# Database config cache settings (per worker)
+DB_CONFIG_CACHE_CHECK_INTERVAL = int(os.getenv("DB_CONFIG_CACHE_CHECK_INTERVAL", "30"))
+
+# Background scanner settings
+SCANNER_MAX_CONCURRENCY = int(os.getenv("SCANNER_MAX_CONCURRENCY", "16"))
+SCANNER_PER_HOST_CONCURRENCY = int(os.getenv("SCANNER_PER_HOST_CONCURRENCY", "2"))
+SCANNER_CONFIG_TIMEOUT = int(os.getenv("SCANNER_CONFIG_TIMEOUT", "600"))
+SCANNER_REDIS_BATCH_SIZE = int(os.getenv("SCANNER_REDIS_BATCH_SIZE", "1000"))
+SCANNER_FULL_RESCAN_INTERVAL = int(os.getenv("SCANNER_FULL_RESCAN_INTERVAL", "86400"))
+SCANNER_DEFAULT_INTERVAL = int(os.getenv("SCANNER_DEFAULT_INTERVAL", "60"))
+SCANNER_JITTER_RATIO = float(os.getenv("SCANNER_JITTER_RATIO", "0.1"))
+SCANNER_TICK_SECONDS = int(os.getenv("SCANNER_TICK_SECONDS", "5"))
+
+# Scanner leader election settings
+LEADER_LEASE_SECONDS = int(os.getenv("LEADER_LEASE_SECONDS", "15"))
+LEADER_RENEW_INTERVAL = int(os.getenv("LEADER_RENEW_INTERVAL", "5"))
+
+# Database initialization job settings
+INIT_JOB_CONCURRENCY = int(os.getenv("INIT_JOB_CONCURRENCY", "3"))
+INIT_JOB_LOCK_TIMEOUT = int(os.getenv("INIT_JOB_LOCK_TIMEOUT", "60"))
+INIT_JOB_RESUME_INTERVAL = int(os.getenv("INIT_JOB_RESUME_INTERVAL", "10"))
+INIT_JOB_RETENTION_SECONDS = int(os.getenv("INIT_JOB_RETENTION_SECONDS", "604800"))
@@ -8,9 +8,17 @@ from app.utils.json_response import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 
-from app.routers import auth, database, segment
+from app.routers import admin, auth, database, segment
 from app.services.scanner_service import ScannerService
+from app.services.hot_key_service import HotKeyService
+from app.services.connector_pool import DbConnectorPool
+from app.services.db_config_service import DbConfigService
+from app.services.leader_service import LeaderElection
+from app.services.init_job_service import InitJobService
+from app.services.segment_store import SegmentStore
+from app.services.segment_archive_service import SegmentArchiveService
 from app.redis_client import RedisClient
+from app.utils.loop_monitor import LoopLagMonitor
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,35 +26,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-scanner_task = None
+background_tasks = {}
 
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
-    global scanner_task
-
     logger.info("Starting up...")
 
+    background_tasks["loop_monitor"] = asyncio.create_task(LoopLagMonitor.start())
+
     try:
         await RedisClient.get_instance()
         logger.info("Redis connection established")
     except Exception as e:
         logger.error(f"Failed to connect to Redis: {e}")
+    else:
+        # Refuse to start with a hash bucket count the stored counters were not written with
+        await SegmentStore.verify_layout()
+        logger.info(f"Segment storage layout: {SegmentStore.layout}")
+
+    # Only the elected leader in the cluster runs the scanner and the idle segment archiver
+    async def leader_work():
+        await asyncio.gather(ScannerService.start_background_scanner(), SegmentArchiveService.start_archiver())
+
+    background_tasks["scanner"] = asyncio.create_task(LeaderElection.run(leader_work))
+    logger.info(f"Scanner leader election started ({LeaderElection.instance_id})")
+
+    background_tasks["hot_key_flusher"] = asyncio.create_task(HotKeyService.start_background_flusher())
+    logger.info("Hot key flusher task started")
 
-    scanner_task = asyncio.create_task(ScannerService.start_background_scanner())
-    logger.info("Background scanner task started")
+    background_tasks["activity_flusher"] = asyncio.create_task(SegmentArchiveService.start_activity_flusher())
+
+    background_tasks["config_listener"] = asyncio.create_task(DbConfigService.start_change_listener())
+
+    background_tasks["connection_evictor"] = asyncio.create_task(DbConnectorPool.start_idle_evictor())
+
+    background_tasks["init_job_resumer"] = asyncio.create_task(InitJobService.start_job_resumer())
 
     yield
 
     logger.info("Shutting down...")
 
-    if scanner_task:
-        scanner_task.cancel()
+    for name, task in background_tasks.items():
+        task.cancel()
         try:
-            await scanner_task
+            await task
         except asyncio.CancelledError:
-            logger.info("Background scanner task cancelled")
+            logger.info(f"Background task {name} cancelled")
+    background_tasks.clear()
+
+    try:
+        await HotKeyService.flush()
+    except Exception as e:
+        logger.error(f"Error flushing hot key statistics: {e}")
+
+    try:
+        await SegmentArchiveService.flush()
+    except Exception as e:
+        logger.error(f"Error flushing segment activity: {e}")
+
+    try:
+        await DbConnectorPool.close_all()
+        logger.info("Database connection pools closed")
+    except Exception as e:
+        logger.error(f"Error closing database connection pools: {e}")
 
     try:
         await RedisClient.close()
@@ -74,6 +118,7 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(database.router)
 app.include_router(segment.router)
+app.include_router(admin.router)
 
 
 @app.exception_handler(Exception)
@@ -93,12 +138,20 @@ async def global_exception_handler(_request: Request, exc: Exception):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    try:
+        leader = await LeaderElection.get_status()
+    except Exception as e:
+        logger.error(f"Failed to read scanner leader: {e}")
+        leader = None
+
     return {
         "code": 0,
         "msg": "KXY ID Generator Service is running",
         "data": {
             "version": "1.0.0",
-            "status": "healthy"
+            "status": "healthy",
+            "loop_lag_ms": LoopLagMonitor.get_stats()["lag_ms"],
+            "scanner_leader": leader
         }
     }
 
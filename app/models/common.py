@@ -11,8 +11,8 @@ class ApiResponse(BaseModel, Generic[T]):
     traceId: Optional[str] = None
 
     @classmethod
-    def success(cls, data: T = None, msg: str = ""):
-        return cls(code=0, msg=msg, data=data)
+    def success(cls, data: T = None, msg: str = "", trace_id: str = None):
+        return cls(code=0, msg=msg, data=data, traceId=trace_id)
 
     @classmethod
     def error(cls, code: int = 500, msg: str = "Internal Server Error", trace_id: str = None):
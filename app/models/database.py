@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -10,6 +10,12 @@ class DatabaseType(str, Enum):
     ORACLE = "oracle"
 
 
+class AutoProvisionPolicy(str, Enum):
+    NONE = "none"
+    ALL = "all"
+    PATTERN = "pattern"
+
+
 class AddDatabaseRequest(BaseModel):
     system_code: str = Field(..., min_length=1, max_length=100, description="System code")
     db_type: DatabaseType = Field(..., description="Database type")
@@ -17,6 +23,13 @@ class AddDatabaseRequest(BaseModel):
     db_user: str = Field(..., description="Database username")
     db_password: str = Field(..., description="Database password")
     db_name: Optional[str] = Field(None, description="Initial database name (optional)")
+    scan_interval: Optional[int] = Field(None, ge=10, description="Background scan interval in seconds (optional)")
+    include_databases: List[str] = Field(default_factory=list, description="Only scan databases matching one of these glob or re: rules")
+    exclude_databases: List[str] = Field(default_factory=list, description="Skip databases matching any of these glob or re: rules")
+    include_tables: List[str] = Field(default_factory=list, description="Only scan tables matching one of these glob or re: rules")
+    exclude_tables: List[str] = Field(default_factory=list, description="Skip tables matching any of these glob or re: rules")
+    auto_provision: AutoProvisionPolicy = Field(AutoProvisionPolicy.NONE, description="Seed counters of discovered tables: none, all (every scanned table) or pattern")
+    auto_provision_tables: List[str] = Field(default_factory=list, description="Tables seeded automatically under the pattern policy (glob or re: rules)")
 
 
 class DatabaseConfig(BaseModel):
@@ -27,17 +40,19 @@ class DatabaseConfig(BaseModel):
     db_user: str = Field(..., description="Database username")
     db_password: str = Field(..., description="Database password")
     db_name: Optional[str] = Field(None, description="Database name")
+    scan_interval: Optional[int] = Field(None, description="Background scan interval in seconds")
+    include_databases: List[str] = Field(default_factory=list, description="Only scan databases matching one of these glob or re: rules")
+    exclude_databases: List[str] = Field(default_factory=list, description="Skip databases matching any of these glob or re: rules")
+    include_tables: List[str] = Field(default_factory=list, description="Only scan tables matching one of these glob or re: rules")
+    exclude_tables: List[str] = Field(default_factory=list, description="Skip tables matching any of these glob or re: rules")
+    auto_provision: AutoProvisionPolicy = Field(AutoProvisionPolicy.NONE, description="Seed counters of discovered tables: none, all (every scanned table) or pattern")
+    auto_provision_tables: List[str] = Field(default_factory=list, description="Tables seeded automatically under the pattern policy (glob or re: rules)")
 
 
 class InitDatabaseRequest(BaseModel):
     guid: str = Field(..., description="Database config GUID")
 
 
-class InitDatabaseResponse(BaseModel):
-    initialized_count: int = Field(..., description="Number of segments initialized")
-    segments: List[str] = Field(default_factory=list, description="List of segment keys")
-
-
 class SegmentRequest(BaseModel):
     system_code: str = Field(..., description="System code")
     db_name: str = Field(..., description="Database name")
@@ -62,3 +77,16 @@ class DiscoveredTable(BaseModel):
     table: str = Field(..., description="Table name")
     primary_key: str = Field(..., description="Primary key field")
     max_id: Optional[int] = Field(None, description="Current max ID")
+    max_id_method: Optional[str] = Field(None, description="How max_id was obtained: catalog (metadata) or max (MAX() query)")
+    segment_key: Optional[str] = Field(None, description="Segment key the table would be allocated under")
+    discovered_at: Optional[float] = Field(None, description="Time the table was discovered (unix timestamp)")
+
+
+class DiscoveredTablePage(BaseModel):
+    tables: List[DiscoveredTable] = Field(default_factory=list, description="Discovered tables of this page")
+    cursor: int = Field(0, description="Cursor of the next page, 0 when there are no more pages")
+    total: int = Field(0, description="Number of discovered tables waiting for approval")
+
+
+class ApproveTablesRequest(BaseModel):
+    segment_keys: List[str] = Field(..., min_length=1, description="Segment keys of the discovered tables to approve and seed")
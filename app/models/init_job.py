@@ -0,0 +1,27 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class InitJob(BaseModel):
+    job_id: str = Field(..., description="Job ID")
+    guid: str = Field(..., description="Database config GUID")
+    system_code: str = Field(..., description="System code")
+    status: str = Field(..., description="Job status: pending, running, completed, partial or failed")
+    created_at: float = Field(..., description="Creation time (unix timestamp)")
+    started_at: Optional[float] = Field(None, description="Time the job first started running (unix timestamp)")
+    finished_at: Optional[float] = Field(None, description="Completion time (unix timestamp)")
+    total_databases: int = Field(0, description="Number of databases to walk")
+    total_tables: int = Field(0, description="Number of tables with a numeric primary key listed so far")
+    listing_complete: bool = Field(False, description="Whether every database has been listed (total_tables is final)")
+    processed_tables: int = Field(0, description="Number of tables done (checkpointed)")
+    initialized_count: int = Field(0, description="Number of segments seeded from a database max ID")
+    created_count: int = Field(0, description="Number of segment counters created")
+    raised_count: int = Field(0, description="Number of existing segment counters raised to the database max ID")
+    unchanged_count: int = Field(0, description="Number of existing segment counters already at or above the database max ID")
+    catalog_count: int = Field(0, description="Number of tables whose max ID was read from catalog metadata")
+    max_query_count: int = Field(0, description="Number of tables whose max ID needed a MAX() query")
+    failed_tables: int = Field(0, description="Number of tables that failed in the current run")
+    error: Optional[str] = Field(None, description="First error message, if any")
+    resumed_at: Optional[float] = Field(None, description="Start time of the current run (unix timestamp)")
+    resumed_processed: int = Field(0, description="Tables already done when the current run started")
+    eta_seconds: Optional[float] = Field(None, description="Estimated seconds until completion")
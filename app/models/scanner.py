@@ -0,0 +1,31 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class ConfigScanResult(BaseModel):
+    guid: str = Field(..., description="Database config GUID")
+    system_code: str = Field(..., description="System code")
+    status: str = Field(..., description="Scan status: ok, partial, error or timeout")
+    duration_ms: float = Field(..., description="Scan duration in milliseconds")
+    databases: int = Field(0, description="Number of databases scanned")
+    failed_databases: int = Field(0, description="Number of databases that failed to scan")
+    skipped_databases: int = Field(0, description="Number of databases skipped because their schema is unchanged")
+    discovered: int = Field(0, description="Number of newly discovered tables")
+    provisioned: int = Field(0, description="Number of new tables whose counters were seeded by the auto-provision policy")
+    error: Optional[str] = Field(None, description="First error message, if any")
+
+
+class ScanReport(BaseModel):
+    started_at: float = Field(..., description="Scan start time (unix timestamp)")
+    duration_ms: float = Field(..., description="Total scan duration in milliseconds")
+    configs: List[ConfigScanResult] = Field(default_factory=list, description="Per-config results")
+
+
+class ScanSchedule(BaseModel):
+    guid: str = Field(..., description="Database config GUID")
+    system_code: str = Field(..., description="System code")
+    interval: int = Field(..., description="Scan interval in seconds")
+    last_run_at: Optional[float] = Field(None, description="Start time of the last scan (unix timestamp)")
+    next_run_at: Optional[float] = Field(None, description="Time the next scan is due (unix timestamp)")
+    force_next: bool = Field(False, description="Whether the next scan ignores schema fingerprints")
+    last_result: Optional[ConfigScanResult] = Field(None, description="Result of the last scan")
@@ -1,9 +1,15 @@
 import redis.asyncio as redis
+import asyncio
+import logging
 import uuid
+from contextlib import asynccontextmanager
 from typing import Optional
 from app.config import REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, REDIS_DB
 
 
+logger = logging.getLogger(__name__)
+
+
 class RedisClient:
     _instance = None
 
@@ -26,19 +32,20 @@ class RedisClient:
             cls._instance = None
 
     @classmethod
-    async def acquire_lock(cls, lock_key: str, timeout: int = 10) -> Optional[str]:
+    async def acquire_lock(cls, lock_key: str, timeout: int = 10, lock_value: Optional[str] = None) -> Optional[str]:
         """
         获取分布式锁
 
         Args:
             lock_key: 锁的键名
             timeout: 锁的超时时间（秒），防止死锁
+            lock_value: 锁的唯一标识，不传则自动生成（如实例ID，用于选主）
 
         Returns:
             str: 锁的唯一标识（用于释放锁时验证），获取失败返回 None
         """
         redis_client = await cls.get_instance()
-        lock_value = str(uuid.uuid4())
+        lock_value = lock_value or str(uuid.uuid4())
 
         # SET NX EX: 仅在键不存在时设置，并设置过期时间
         acquired = await redis_client.set(lock_key, lock_value, nx=True, ex=timeout)
@@ -70,3 +77,57 @@ class RedisClient:
 
         result = await redis_client.eval(lua_script, 1, lock_key, lock_value)
         return result == 1
+
+    @classmethod
+    async def renew_lock(cls, lock_key: str, lock_value: str, timeout: int = 10) -> bool:
+        """
+        续期分布式锁（使用Lua脚本保证原子性）
+
+        Args:
+            lock_key: 锁的键名
+            lock_value: 锁的唯一标识（仅持有者可以续期）
+            timeout: 新的超时时间（秒）
+
+        Returns:
+            bool: 是否续期成功（锁已过期或被其他进程持有时返回 False）
+        """
+        redis_client = await cls.get_instance()
+
+        # Lua脚本：仅当值匹配时才重置过期时间
+        lua_script = """
+        if redis.call("get", KEYS[1]) == ARGV[1] then
+            return redis.call("expire", KEYS[1], ARGV[2])
+        else
+            return 0
+        end
+        """
+
+        result = await redis_client.eval(lua_script, 1, lock_key, lock_value, timeout)
+        return result == 1
+
+    @classmethod
+    @asynccontextmanager
+    async def keep_lock_alive(cls, lock_key: str, lock_value: str, timeout: int = 10):
+        """
+        看门狗：在上下文内每 timeout/3 秒续期一次锁，适用于耗时不确定的操作
+
+        Args:
+            lock_key: 锁的键名
+            lock_value: 锁的唯一标识
+            timeout: 每次续期的超时时间（秒）
+        """
+        async def renew():
+            while True:
+                await asyncio.sleep(timeout / 3)
+                try:
+                    if not await cls.renew_lock(lock_key, lock_value, timeout):
+                        logger.warning(f"Lock {lock_key} was lost before the operation finished")
+                        return
+                except Exception as e:
+                    logger.error(f"Error renewing lock {lock_key}: {str(e)}")
+
+        watchdog = asyncio.create_task(renew())
+        try:
+            yield
+        finally:
+            watchdog.cancel()
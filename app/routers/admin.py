@@ -0,0 +1,163 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.config import SEGMENT_ARCHIVE_IDLE_SECONDS
+from app.models.common import ApiResponse
+from app.services.connector_pool import DbConnectorPool
+from app.services.hot_key_service import HotKeyService
+from app.services.metadata_cache import MetadataCache
+from app.services.scanner_service import ScannerService
+from app.services.segment_archive_service import SegmentArchiveService
+from app.services.segment_registry import SegmentRegistry
+from app.utils.dependencies import get_current_user
+from app.utils.loop_monitor import LoopLagMonitor
+from app.utils.trace import TraceRecorder
+
+router = APIRouter(prefix="/api/admin", tags=["Administration"])
+
+
+@router.get("/traces/slow", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def get_slow_traces(limit: int = Query(100, ge=1, le=1000)):
+    """Get recently sampled slow allocate requests with per-stage timings"""
+    try:
+        return ApiResponse.success({
+            "stats": TraceRecorder.get_stats(),
+            "traces": TraceRecorder.get_slow_traces(limit)
+        })
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.delete("/traces/slow", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def clear_slow_traces():
+    """Clear the slow trace buffer of this worker"""
+    try:
+        TraceRecorder.clear()
+        return ApiResponse.success({"cleared": True})
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.get("/hot-keys", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def get_hot_keys(limit: int = Query(20, ge=1, le=1000), hours: int = Query(1, ge=1, le=24)):
+    """Get the top segment keys by request count and by IDs allocated across all workers"""
+    try:
+        return ApiResponse.success({
+            "hours": hours,
+            "requests": await HotKeyService.get_top_keys("requests", limit, hours),
+            "ids": await HotKeyService.get_top_keys("ids", limit, hours)
+        })
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.get("/loop-lag", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def get_loop_lag(limit: int = Query(20, ge=1, le=100)):
+    """Get event-loop lag metrics and stack samples of recent blocking calls for this worker"""
+    try:
+        return ApiResponse.success({
+            "stats": LoopLagMonitor.get_stats(),
+            "blocks": LoopLagMonitor.get_block_samples(limit)
+        })
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.get("/connection-pools", response_model=ApiResponse[list], dependencies=[Depends(get_current_user)])
+async def get_connection_pools():
+    """Get the warm database connection pools of this worker"""
+    try:
+        return ApiResponse.success(DbConnectorPool.get_stats())
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.get("/metadata-cache", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def get_metadata_cache_stats():
+    """Get size and hit/miss counters of this worker's catalog metadata cache"""
+    try:
+        return ApiResponse.success(MetadataCache.get_stats())
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.get("/segments", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def list_segments(system_code: str = Query(..., min_length=1), cursor: int = Query(0, ge=0), count: int = Query(100, ge=1, le=1000)):
+    """List one page of a system's segment counters from the segment index; pass the returned cursor for the next page (0 = done)"""
+    try:
+        return ApiResponse.success(await SegmentRegistry.list_segments(system_code, cursor, count))
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.post("/segments/reindex", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def reindex_segments(system_code: str = Query(None, description="Only rebuild the index of this system")):
+    """Rebuild the segment index with one keyspace SCAN (needed once for counters created before the index existed)"""
+    try:
+        indexed = await SegmentRegistry.reindex(system_code)
+        return ApiResponse.success({"indexed": indexed}, msg="Segment index rebuilt")
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.get("/segment-archive", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def get_segment_archive_stats():
+    """Get the idle segment archival settings and the summary of the last run"""
+    try:
+        return ApiResponse.success(await SegmentArchiveService.get_stats())
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.post("/segment-archive/run", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def run_segment_archive(idle_seconds: int = Query(None, ge=60, description="Override SEGMENT_ARCHIVE_IDLE_SECONDS for this run")):
+    """Archive idle segment counters now"""
+    try:
+        if idle_seconds is None:
+            idle_seconds = SEGMENT_ARCHIVE_IDLE_SECONDS
+        if idle_seconds <= 0:
+            return ApiResponse.error(code=400, msg="Segment archival is disabled (SEGMENT_ARCHIVE_IDLE_SECONDS is 0)")
+        summary = await SegmentArchiveService.archive_idle(idle_seconds)
+        return ApiResponse.success(summary, msg="Idle segments archived")
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.get("/scanner/report", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def get_scan_report():
+    """Get the result of the most recent scan of every database config with per-config durations"""
+    try:
+        report = await ScannerService.get_last_report()
+        return ApiResponse.success(report.model_dump() if report else None)
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.post("/scanner/run", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def run_scan(force: bool = Query(False, description="Rescan every database even if its schema fingerprint is unchanged")):
+    """Schedule an immediate scan of every database config; the scanner leader runs them on its next tick"""
+    try:
+        schedules = await ScannerService.trigger_all_scans(force)
+        return ApiResponse.success({"scheduled": len(schedules), "force": force}, msg="Scan scheduled")
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.get("/scanner/schedule", response_model=ApiResponse[list], dependencies=[Depends(get_current_user)])
+async def get_scan_schedule():
+    """Get the scan interval, last run and next run of every database config"""
+    try:
+        schedules = await ScannerService.get_schedules()
+        return ApiResponse.success([schedule.model_dump() for schedule in schedules])
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.post("/scanner/trigger/{guid}", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def trigger_config_scan(guid: str, force: bool = Query(False, description="Ignore schema fingerprints for this scan")):
+    """Schedule an immediate scan of one database config"""
+    try:
+        schedule = await ScannerService.trigger_config_scan(guid, force)
+        return ApiResponse.success(schedule.model_dump(), msg="Scan scheduled")
+    except HTTPException as e:
+        return ApiResponse.error(code=e.status_code, msg=e.detail)
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List
 from app.models.database import (
     AddDatabaseRequest,
     DatabaseConfig,
-    InitDatabaseResponse,
     AddConfigRequest,
-    DiscoveredTable
+    ApproveTablesRequest,
+    DiscoveredTablePage
 )
 from app.models.common import ApiResponse
+from app.models.init_job import InitJob
 from app.services.db_config_service import DbConfigService
+from app.services.init_job_service import InitJobService
 from app.utils.dependencies import get_current_user
 
 router = APIRouter(prefix="/api/database", tags=["Database Configuration"])
@@ -72,22 +74,30 @@ async def delete_database(guid: str):
         return ApiResponse.error(code=500, msg=str(e))
 
 
-@router.post("/initialize/{guid}", response_model=ApiResponse[InitDatabaseResponse], dependencies=[Depends(get_current_user)])
+@router.post("/initialize/{guid}", response_model=ApiResponse[InitJob], dependencies=[Depends(get_current_user)])
 async def initialize_database(guid: str):
-    """Initialize database by scanning all tables and storing max IDs"""
+    """Start a background job that scans all tables and stores max IDs"""
     try:
-        result = await DbConfigService.initialize_database(guid)
-        response = InitDatabaseResponse(
-            initialized_count=result["initialized_count"],
-            segments=result["segments"]
-        )
-        return ApiResponse.success(response, msg=f"Initialized {result['initialized_count']} segments")
+        job = await InitJobService.start_job(guid)
+        return ApiResponse.success(job, msg=f"Initialization job {job.job_id} started")
     except HTTPException as e:
         return ApiResponse.error(code=e.status_code, msg=e.detail)
     except Exception as e:
         return ApiResponse.error(code=500, msg=str(e))
 
 
+@router.get("/initialize/jobs/{job_id}", response_model=ApiResponse[InitJob], dependencies=[Depends(get_current_user)])
+async def get_initialize_job(job_id: str):
+    """Get the progress and estimated time to completion of an initialization job"""
+    try:
+        job = await InitJobService.get_job(job_id)
+        if not job:
+            return ApiResponse.error(code=404, msg=f"Initialization job {job_id} not found")
+        return ApiResponse.success(job)
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
 @router.post("/{guid}/add-config", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
 async def add_custom_config(guid: str, request: AddConfigRequest):
     """Add a custom segment configuration"""
@@ -105,11 +115,25 @@ async def add_custom_config(guid: str, request: AddConfigRequest):
         return ApiResponse.error(code=500, msg=str(e))
 
 
-@router.get("/{guid}/discovered-tables", response_model=ApiResponse[List[DiscoveredTable]], dependencies=[Depends(get_current_user)])
-async def get_discovered_tables(guid: str):
-    """Get list of discovered new tables for a database config"""
+@router.get("/{guid}/discovered-tables", response_model=ApiResponse[DiscoveredTablePage], dependencies=[Depends(get_current_user)])
+async def get_discovered_tables(guid: str, cursor: int = Query(0, ge=0), count: int = Query(100, ge=1, le=1000)):
+    """Get one page of discovered new tables; pass the returned cursor to get the next page (0 = done)"""
     try:
-        tables = await DbConfigService.get_discovered_tables(guid)
-        return ApiResponse.success(tables)
+        page = await DbConfigService.get_discovered_tables(guid, cursor, count)
+        return ApiResponse.success(page)
+    except HTTPException as e:
+        return ApiResponse.error(code=e.status_code, msg=e.detail)
+    except Exception as e:
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.post("/{guid}/discovered-tables/approve", response_model=ApiResponse[dict], dependencies=[Depends(get_current_user)])
+async def approve_discovered_tables(guid: str, request: ApproveTablesRequest):
+    """Approve discovered tables and seed their counters (raise-only) in one batch"""
+    try:
+        result = await DbConfigService.approve_discovered_tables(guid, request.segment_keys)
+        return ApiResponse.success(result, msg=f"{result['approved']} tables approved")
+    except HTTPException as e:
+        return ApiResponse.error(code=e.status_code, msg=e.detail)
     except Exception as e:
         return ApiResponse.error(code=500, msg=str(e))
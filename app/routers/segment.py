@@ -1,27 +1,35 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
 from app.models.database import SegmentRequest, SegmentResponse
 from app.models.common import ApiResponse
 from app.services.segment_service import SegmentService
+from app.utils.trace import RequestTrace
 
 router = APIRouter(prefix="/api/segment", tags=["ID Segment Allocation"])
 
 
 @router.post("/allocate", response_model=ApiResponse[SegmentResponse])
-async def allocate_segment(request: SegmentRequest):
+async def allocate_segment(request: SegmentRequest, x_trace_id: Optional[str] = Header(None)):
     """
     Allocate an ID segment (NO authentication required).
     Returns start and end IDs for the allocated segment.
+    An incoming X-Trace-Id header is reused as the response traceId.
     """
+    trace = RequestTrace("allocate", trace_id=x_trace_id)
     try:
         segment = await SegmentService.allocate_segment(
             system_code=request.system_code,
             db_name=request.db_name,
             table_name=request.table_name,
             field_name=request.field_name,
-            segment_count=request.segment_count
+            segment_count=request.segment_count,
+            trace=trace
         )
-        return ApiResponse.success(segment, msg=f"Allocated segment: {segment.start} to {segment.end}")
+        trace.finish()
+        return ApiResponse.success(segment, msg=f"Allocated segment: {segment.start} to {segment.end}", trace_id=trace.trace_id)
     except HTTPException as e:
-        return ApiResponse.error(code=e.status_code, msg=e.detail)
+        trace.finish(status=str(e.status_code))
+        return ApiResponse.error(code=e.status_code, msg=e.detail, trace_id=trace.trace_id)
     except Exception as e:
-        return ApiResponse.error(code=500, msg=str(e))
+        trace.finish(status="500")
+        return ApiResponse.error(code=500, msg=str(e), trace_id=trace.trace_id)
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Tuple
+from app.config import (
+    DB_POOL_MAX_SIZE, DB_POOL_IDLE_TIMEOUT, DB_POOL_HEALTH_CHECK_INTERVAL, DB_POOL_ACQUIRE_TIMEOUT, DB_POOL_RESERVED_SIZE
+)
+from app.models.database import DatabaseConfig
+from app.services.db_connector import DbConnector, DbConnectorFactory
+
+logger = logging.getLogger(__name__)
+
+# Connectors of a pool that background work (scanner, initialization jobs) may hold at once;
+# the remaining DB_POOL_RESERVED_SIZE are left for allocation and API requests
+DB_POOL_BACKGROUND_SIZE = max(1, DB_POOL_MAX_SIZE - DB_POOL_RESERVED_SIZE)
+
+
+def config_fingerprint(config: DatabaseConfig) -> str:
+    """Fingerprint of the connection-relevant parts of a config"""
+    raw = "\x1f".join([
+        config.db_type.value, config.db_address, config.db_user, config.db_password, config.db_name or ""
+    ])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _ConnectorPool:
+    """Bounded pool of warm connectors for a single database config"""
+
+    def __init__(self, config: DatabaseConfig):
+        self.config = config
+        self.fingerprint = config_fingerprint(config)
+        self.closed = False
+        self._semaphore = asyncio.Semaphore(DB_POOL_MAX_SIZE)
+        self._background = asyncio.Semaphore(DB_POOL_BACKGROUND_SIZE)
+        # (connector, last used, suspect) - suspect connectors failed their last call
+        self._idle: Deque[Tuple[DbConnector, float, bool]] = deque()
+
+    async def acquire(self, background: bool = False) -> DbConnector:
+        if background:
+            # Background work queues behind itself rather than timing out
+            await self._background.acquire()
+            try:
+                await self._semaphore.acquire()
+            except BaseException:
+                self._background.release()
+                raise
+        else:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=DB_POOL_ACQUIRE_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Timed out waiting for a connection to {self.config.db_address}")
+
+        try:
+            while self._idle:
+                connector, last_used, suspect = self._idle.pop()
+                if not suspect and time.monotonic() - last_used <= DB_POOL_HEALTH_CHECK_INTERVAL:
+                    return connector
+                try:
+                    await connector.ping()
+                    return connector
+                except Exception as e:
+                    logger.info(f"Discarding unhealthy connection to {self.config.db_address}: {str(e)}")
+                    await self._close_connector(connector)
+
+            return DbConnectorFactory.create(self.config)
+        except BaseException:
+            self._release_slot(background)
+            raise
+
+    def _release_slot(self, background: bool):
+        self._semaphore.release()
+        if background:
+            self._background.release()
+
+    async def release(self, connector: DbConnector, suspect: bool = False, background: bool = False):
+        try:
+            if self.closed:
+                await self._close_connector(connector)
+                return
+            self._idle.append((connector, time.monotonic(), suspect))
+        finally:
+            self._release_slot(background)
+
+    async def evict_idle(self):
+        """Close connectors that have been idle longer than DB_POOL_IDLE_TIMEOUT"""
+        now = time.monotonic()
+        # Oldest connectors sit at the left end
+        while self._idle and now - self._idle[0][1] > DB_POOL_IDLE_TIMEOUT:
+            connector, _last_used, _suspect = self._idle.popleft()
+            await self._close_connector(connector)
+
+    async def close(self):
+        self.closed = True
+        while self._idle:
+            connector, _last_used, _suspect = self._idle.popleft()
+            await self._close_connector(connector)
+
+    async def _close_connector(self, connector: DbConnector):
+        try:
+            await connector.close()
+        except Exception as e:
+            logger.warning(f"Error closing connection to {self.config.db_address}: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "guid": self.config.guid,
+            "db_address": self.config.db_address,
+            "idle": len(self._idle),
+            "max_size": DB_POOL_MAX_SIZE,
+            "background_max_size": DB_POOL_BACKGROUND_SIZE
+        }
+
+
+class DbConnectorPool:
+    """
+    Keeps warm connector pools per database config, keyed by config guid.
+
+    A pool is rebuilt automatically when the connection settings of its config
+    change (detected by fingerprint) or when it is explicitly invalidated.
+    """
+
+    _pools: Dict[str, _ConnectorPool] = {}
+
+    @classmethod
+    async def _get_pool(cls, config: DatabaseConfig) -> _ConnectorPool:
+        pool = cls._pools.get(config.guid)
+        if pool and pool.fingerprint == config_fingerprint(config):
+            return pool
+
+        if pool:
+            logger.info(f"Connection settings changed for config {config.guid}, rebuilding pool")
+            await pool.close()
+
+        pool = _ConnectorPool(config)
+        cls._pools[config.guid] = pool
+        return pool
+
+    @classmethod
+    @asynccontextmanager
+    async def acquire(cls, config: DatabaseConfig, background: bool = False) -> AsyncIterator[DbConnector]:
+        """
+        Borrow a connector for the given config and return it to the pool afterwards.
+
+        Background work passes background=True: it never takes the DB_POOL_RESERVED_SIZE
+        connections kept for allocation, and waits for a free one instead of timing out.
+        """
+        pool = await cls._get_pool(config)
+        connector = await pool.acquire(background)
+        try:
+            yield connector
+        except BaseException:
+            # The call failed; the connection is verified before it is handed out again
+            await pool.release(connector, suspect=True, background=background)
+            raise
+        else:
+            await pool.release(connector, background=background)
+
+    @classmethod
+    async def invalidate(cls, guid: str):
+        """Close and drop the pool of a config (e.g. after its credentials changed)"""
+        pool = cls._pools.pop(guid, None)
+        if pool:
+            await pool.close()
+
+    @classmethod
+    async def close_all(cls):
+        pools = list(cls._pools.values())
+        cls._pools.clear()
+        for pool in pools:
+            await pool.close()
+
+    @classmethod
+    def get_stats(cls) -> list:
+        return [pool.stats() for pool in cls._pools.values()]
+
+    @classmethod
+    async def start_idle_evictor(cls):
+        """Periodically close idle connections"""
+        while True:
+            await asyncio.sleep(max(1, DB_POOL_IDLE_TIMEOUT // 2))
+            for pool in list(cls._pools.values()):
+                try:
+                    await pool.evict_idle()
+                except Exception as e:
+                    logger.error(f"Error evicting idle connections for {pool.config.guid}: {str(e)}")
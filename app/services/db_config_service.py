@@ -1,21 +1,102 @@
+import asyncio
 import json
+import logging
+import time
 import uuid
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException, status
 from app.redis_client import RedisClient
-from app.models.database import DatabaseConfig, AddDatabaseRequest, DiscoveredTable
-from app.services.db_connector import DbConnectorFactory
+from app.config import DB_CONFIG_CACHE_CHECK_INTERVAL
+from app.models.database import DatabaseConfig, AddDatabaseRequest, AutoProvisionPolicy, DiscoveredTable, DiscoveredTablePage
+from app.services.connector_pool import DbConnectorPool
+from app.services.metadata_cache import MetadataCache
+from app.services.segment_registry import SegmentRegistry
+from app.services.segment_store import SegmentStore
+from app.utils.name_filter import NameFilter, invalid_rules
+
+logger = logging.getLogger(__name__)
 
 
 class DbConfigService:
-    DB_CONFIG_PREFIX = "kxy:id:db_config:"
-    SEGMENT_PREFIX = "kxy:id:segment:"
-    DISCOVERED_PREFIX = "kxy:id:discovered_tables:"
+    """
+    Database configs live in one hash (guid -> DatabaseConfig JSON) and are read from an
+    in-process cache of parsed configs.
+
+    Every write bumps CONFIG_VERSION_KEY in the same transaction and publishes the GUID on
+    CONFIG_CHANNEL; each worker's listener drops its cache, the connection pool and the
+    catalog metadata of that config. While the listener is subscribed, reads are memory lookups and the
+    stored version is compared only every DB_CONFIG_CACHE_CHECK_INTERVAL seconds in
+    case a notification was lost; without it, every read compares the version.
+    Cached configs are shared and must not be modified.
+
+    Until retire_legacy_db_configs.py has run, configs are also written to the earlier
+    one-key-per-config layout, so instances still on the old version keep seeing them, and
+    configs added or changed by those instances are synced into the hash by one worker of
+    the cluster per check interval.
+    """
+
+    CONFIGS_KEY = "kxy:id:db_configs"
+    CONFIG_VERSION_KEY = "kxy:id:db_configs:version"
+    CONFIG_CHANNEL = "kxy:id:db_configs:changed"
+    # Earlier layout (one string key per config), kept in sync until it is retired
+    LEGACY_CONFIG_PREFIX = "kxy:id:db_config:"
+    LEGACY_RETIRED_KEY = "kxy:id:db_configs:legacy_retired"
+    # GUIDs deleted by this version, so a late legacy write by an old instance cannot bring them back
+    LEGACY_TOMBSTONES_KEY = "kxy:id:db_configs:legacy_deleted"
+    # Held by the worker running the periodic legacy sync
+    LEGACY_SYNC_KEY = "kxy:id:db_configs:legacy_sync"
+    FAILURE_PREFIX = "kxy:id:failure:"
+    # Hash: segment key -> DiscoveredTable JSON, one entry per table waiting for approval
+    DISCOVERED_PREFIX = "kxy:id:discovered:"
+    # Earlier layout (set of DiscoveredTable JSON members), migrated on first use
+    LEGACY_DISCOVERED_PREFIX = "kxy:id:discovered_tables:"
+    FINGERPRINT_PREFIX = "kxy:id:scanner:fingerprint:"
+    SCAN_SCHEDULE_KEY = "kxy:id:scanner:schedule"
+    SEED_BATCH_SIZE = 500
+    _migrated_discovered = set()
+
+    _instance_id = uuid.uuid4().hex
+    _configs: Optional[Dict[str, DatabaseConfig]] = None
+    _configs_version: Optional[str] = None
+    _configs_checked_at = 0.0
+    # Bumped whenever the cache is dropped, so a load that raced with a change is not cached
+    _configs_generation = 0
+    _listening = False
+    _legacy_retired = False
+    _legacy_synced_at = 0.0
+
+    # KEYS[1] is the configs hash, KEYS[2] the version key, KEYS[3] the retired marker,
+    # KEYS[4] the tombstone set, KEYS[5..] legacy config keys; ARGV[1] is the legacy prefix.
+    # Copies every legacy config that differs from the hash, except for tombstoned GUIDs,
+    # whose legacy key is dropped instead. A missing legacy key never removes a config.
+    # Does nothing once the legacy layout is retired. Returns the changed GUIDs.
+    SYNC_LEGACY_SCRIPT = """
+    local changed = {}
+    if redis.call("exists", KEYS[3]) == 1 then
+        return changed
+    end
+    for i = 5, #KEYS do
+        local guid = string.sub(KEYS[i], #ARGV[1] + 1)
+        local legacy = redis.call("get", KEYS[i])
+        if legacy then
+            if redis.call("sismember", KEYS[4], guid) == 1 then
+                redis.call("del", KEYS[i])
+            elseif legacy ~= redis.call("hget", KEYS[1], guid) then
+                redis.call("hset", KEYS[1], guid, legacy)
+                changed[#changed + 1] = guid
+            end
+        end
+    end
+    if #changed > 0 then
+        redis.call("incr", KEYS[2])
+    end
+    return changed
+    """
 
     @classmethod
     async def add_database(cls, config: AddDatabaseRequest) -> DatabaseConfig:
         """Add a new database configuration"""
-        redis_client = await RedisClient.get_instance()
+        cls._validate_filters(config)
 
         guid = str(uuid.uuid4())
 
@@ -26,43 +107,211 @@ class DbConfigService:
             db_address=config.db_address,
             db_user=config.db_user,
             db_password=config.db_password,
-            db_name=config.db_name
+            db_name=config.db_name,
+            scan_interval=config.scan_interval,
+            include_databases=config.include_databases,
+            exclude_databases=config.exclude_databases,
+            include_tables=config.include_tables,
+            exclude_tables=config.exclude_tables,
+            auto_provision=config.auto_provision,
+            auto_provision_tables=config.auto_provision_tables
         )
 
-        config_key = f"{cls.DB_CONFIG_PREFIX}{guid}"
-        await redis_client.set(config_key, db_config.model_dump_json())
+        await cls._save_config(db_config)
 
         return db_config
 
     @classmethod
-    async def get_database_list(cls) -> List[DatabaseConfig]:
-        """Get all database configurations"""
-        redis_client = await RedisClient.get_instance()
+    def _validate_filters(cls, config: AddDatabaseRequest):
+        errors = invalid_rules(
+            config.include_databases + config.exclude_databases + config.include_tables + config.exclude_tables
+            + config.auto_provision_tables
+        )
+        if errors:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid filter rules: {'; '.join(errors)}"
+            )
+        if config.auto_provision == AutoProvisionPolicy.PATTERN and not config.auto_provision_tables:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The pattern auto-provision policy needs at least one table rule"
+            )
+
+    @classmethod
+    def database_filter(cls, config: DatabaseConfig) -> NameFilter:
+        """Include/exclude rules for database names of a config"""
+        return NameFilter(config.include_databases, config.exclude_databases)
 
-        keys = []
-        async for key in redis_client.scan_iter(match=f"{cls.DB_CONFIG_PREFIX}*"):
-            keys.append(key)
+    @classmethod
+    def table_filter(cls, config: DatabaseConfig) -> NameFilter:
+        """Include/exclude rules for table names of a config (schema-qualified where the connector qualifies them)"""
+        return NameFilter(config.include_tables, config.exclude_tables)
 
-        configs = []
-        for key in keys:
-            config_json = await redis_client.get(key)
-            if config_json:
-                configs.append(DatabaseConfig.model_validate_json(config_json))
+    @classmethod
+    def provision_filter(cls, config: DatabaseConfig) -> Optional[NameFilter]:
+        """Tables whose counters the scanner seeds as soon as it discovers them, or None when auto-provisioning is off"""
+        if config.auto_provision == AutoProvisionPolicy.ALL:
+            return NameFilter()
+        if config.auto_provision == AutoProvisionPolicy.PATTERN:
+            return NameFilter(config.auto_provision_tables)
+        return None
 
+    @classmethod
+    async def _get_configs(cls) -> Dict[str, DatabaseConfig]:
+        """Parsed configs by GUID, reloaded with one HGETALL when the stored version changed"""
+        now = time.monotonic()
+        if cls._configs is not None and cls._listening and now - cls._configs_checked_at < DB_CONFIG_CACHE_CHECK_INTERVAL:
+            return cls._configs
+
+        redis_client = await RedisClient.get_instance()
+        if not cls._legacy_retired and now - cls._legacy_synced_at >= DB_CONFIG_CACHE_CHECK_INTERVAL:
+            cls._legacy_synced_at = now
+            await cls._sync_legacy_periodically()
+
+        generation = cls._configs_generation
+        if cls._configs is not None:
+            version = await redis_client.get(cls.CONFIG_VERSION_KEY)
+            if version == cls._configs_version and generation == cls._configs_generation:
+                cls._configs_checked_at = now
+                return cls._configs
+
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.get(cls.CONFIG_VERSION_KEY)
+            pipe.hgetall(cls.CONFIGS_KEY)
+            version, configs_json = await pipe.execute()
+
+        configs = {
+            guid: DatabaseConfig.model_validate_json(config_json)
+            for guid, config_json in configs_json.items()
+        }
+        if generation == cls._configs_generation:
+            cls._configs = configs
+            cls._configs_version = version
+            cls._configs_checked_at = now
         return configs
 
     @classmethod
-    async def get_database(cls, guid: str) -> Optional[DatabaseConfig]:
-        """Get a single database configuration by GUID"""
+    async def _check_legacy_retired(cls) -> bool:
+        if not cls._legacy_retired:
+            redis_client = await RedisClient.get_instance()
+            cls._legacy_retired = bool(await redis_client.exists(cls.LEGACY_RETIRED_KEY))
+        return cls._legacy_retired
+
+    @classmethod
+    async def _sync_legacy_periodically(cls):
+        """Sync the legacy layout, at most once per check interval across the cluster"""
+        # The worker that syncs publishes every change, so the others need not scan as well
+        try:
+            redis_client = await RedisClient.get_instance()
+            interval = max(1, DB_CONFIG_CACHE_CHECK_INTERVAL)
+            if await redis_client.set(cls.LEGACY_SYNC_KEY, cls._instance_id, nx=True, ex=interval):
+                await cls.sync_legacy_configs()
+        except Exception as e:
+            logger.error(f"Error syncing legacy database configs: {str(e)}")
+
+    @classmethod
+    async def sync_legacy_configs(cls) -> List[str]:
+        """
+        Copy configs added or changed by instances still on the previous version from the legacy
+        config keys into the hash; returns the GUIDs that changed. A no-op once retired.
+
+        Deleting a config on an old instance only removes its legacy key and is not synced.
+        """
+        if await cls._check_legacy_retired():
+            return []
+
+        redis_client = await RedisClient.get_instance()
+        legacy_keys = {key async for key in redis_client.scan_iter(match=f"{cls.LEGACY_CONFIG_PREFIX}*", count=1000)}
+        return await cls._sync_legacy_keys(sorted(legacy_keys))
+
+    @classmethod
+    async def _sync_legacy_keys(cls, legacy_keys: List[str]) -> List[str]:
+        if not legacy_keys:
+            return []
+
+        redis_client = await RedisClient.get_instance()
+        # The retired marker is checked inside the script, so retirement running between
+        # the SCAN and this call cannot be mistaken for legacy changes
+        changed = await redis_client.eval(
+            cls.SYNC_LEGACY_SCRIPT, 4 + len(legacy_keys), cls.CONFIGS_KEY, cls.CONFIG_VERSION_KEY,
+            cls.LEGACY_RETIRED_KEY, cls.LEGACY_TOMBSTONES_KEY, *legacy_keys, cls.LEGACY_CONFIG_PREFIX
+        )
+        for guid in changed:
+            # Changed by an old instance, so every worker (this one included) drops its pool
+            await cls._publish_change(guid, source="legacy")
+        if changed:
+            logger.info(f"Synced {len(changed)} database configs from the legacy layout")
+        return changed
+
+    @classmethod
+    async def _save_config(cls, config: DatabaseConfig):
+        redis_client = await RedisClient.get_instance()
+        config_json = config.model_dump_json()
+        legacy_retired = await cls._check_legacy_retired()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(cls.CONFIGS_KEY, config.guid, config_json)
+            if not legacy_retired:
+                pipe.set(f"{cls.LEGACY_CONFIG_PREFIX}{config.guid}", config_json)
+            pipe.incr(cls.CONFIG_VERSION_KEY)
+            await pipe.execute()
+        await cls._publish_change(config.guid)
+
+    @classmethod
+    async def _publish_change(cls, guid: str, source: Optional[str] = None):
+        cls._drop_config_cache()
         redis_client = await RedisClient.get_instance()
+        await redis_client.publish(cls.CONFIG_CHANNEL, json.dumps({"guid": guid, "source": source or cls._instance_id}))
 
-        config_key = f"{cls.DB_CONFIG_PREFIX}{guid}"
-        config_json = await redis_client.get(config_key)
+    @classmethod
+    def _drop_config_cache(cls):
+        cls._configs = None
+        cls._configs_generation += 1
+
+    @classmethod
+    async def _on_config_changed(cls, message: str):
+        """Drop everything this worker derived from a config another worker changed"""
+        change = json.loads(message)
+        cls._drop_config_cache()
+        if change.get("source") == cls._instance_id:
+            return
+        await DbConnectorPool.invalidate(change["guid"])
+        MetadataCache.invalidate(change["guid"])
 
-        if not config_json:
-            return None
+    @classmethod
+    async def start_change_listener(cls):
+        """Subscribe to config changes; reads are served from memory while subscribed"""
+        while True:
+            pubsub = None
+            try:
+                redis_client = await RedisClient.get_instance()
+                pubsub = redis_client.pubsub()
+                await pubsub.subscribe(cls.CONFIG_CHANNEL)
+                # Changes published while this worker was not subscribed were missed
+                cls._drop_config_cache()
+                cls._listening = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        await cls._on_config_changed(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error listening for database config changes: {str(e)}")
+            finally:
+                cls._listening = False
+                if pubsub is not None:
+                    await pubsub.aclose()
+            await asyncio.sleep(1)
+
+    @classmethod
+    async def get_database_list(cls) -> List[DatabaseConfig]:
+        """Get all database configurations"""
+        return list((await cls._get_configs()).values())
 
-        return DatabaseConfig.model_validate_json(config_json)
+    @classmethod
+    async def get_database(cls, guid: str) -> Optional[DatabaseConfig]:
+        """Get a single database configuration by GUID"""
+        return (await cls._get_configs()).get(guid)
 
     @classmethod
     async def find_database_by_system_and_db(cls, system_code: str, db_name: str) -> Optional[DatabaseConfig]:
@@ -86,6 +335,7 @@ class DbConfigService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Database config with guid {guid} not found"
             )
+        cls._validate_filters(config)
 
         updated_config = DatabaseConfig(
             guid=guid,
@@ -94,11 +344,24 @@ class DbConfigService:
             db_address=config.db_address,
             db_user=config.db_user,
             db_password=config.db_password,
-            db_name=config.db_name
+            db_name=config.db_name,
+            scan_interval=config.scan_interval,
+            include_databases=config.include_databases,
+            exclude_databases=config.exclude_databases,
+            include_tables=config.include_tables,
+            exclude_tables=config.exclude_tables,
+            auto_provision=config.auto_provision,
+            auto_provision_tables=config.auto_provision_tables
         )
 
-        config_key = f"{cls.DB_CONFIG_PREFIX}{guid}"
-        await redis_client.set(config_key, updated_config.model_dump_json())
+        await cls._save_config(updated_config)
+
+        # The config may now point at different schemas, rescan everything
+        await redis_client.delete(f"{cls.FINGERPRINT_PREFIX}{guid}")
+
+        # Drop warm connections and cached metadata from the old settings
+        await DbConnectorPool.invalidate(guid)
+        MetadataCache.invalidate(guid)
 
         return updated_config
 
@@ -114,70 +377,57 @@ class DbConfigService:
                 detail=f"Database config with guid {guid} not found"
             )
 
-        config_key = f"{cls.DB_CONFIG_PREFIX}{guid}"
-        await redis_client.delete(config_key)
-
-        segment_pattern = f"{cls.SEGMENT_PREFIX}{config.system_code.lower()}:*"
-        segment_keys = []
-        async for key in redis_client.scan_iter(match=segment_pattern):
-            segment_keys.append(key)
-
-        if segment_keys:
-            await redis_client.delete(*segment_keys)
+        legacy_retired = await cls._check_legacy_retired()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hdel(cls.CONFIGS_KEY, guid)
+            if not legacy_retired:
+                pipe.delete(f"{cls.LEGACY_CONFIG_PREFIX}{guid}")
+                pipe.sadd(cls.LEGACY_TOMBSTONES_KEY, guid)
+            pipe.incr(cls.CONFIG_VERSION_KEY)
+            await pipe.execute()
+        await cls._publish_change(guid)
+
+        await SegmentRegistry.delete_system(config.system_code)
+
+        await redis_client.delete(
+            f"{cls.DISCOVERED_PREFIX}{guid}",
+            f"{cls.LEGACY_DISCOVERED_PREFIX}{guid}",
+            f"{cls.FINGERPRINT_PREFIX}{guid}"
+        )
+        await redis_client.hdel(cls.SCAN_SCHEDULE_KEY, guid)
 
-        discovered_key = f"{cls.DISCOVERED_PREFIX}{guid}"
-        await redis_client.delete(discovered_key)
+        await DbConnectorPool.invalidate(guid)
+        MetadataCache.invalidate(guid)
 
         return {"deleted": True, "guid": guid}
 
     @classmethod
-    async def initialize_database(cls, guid: str) -> dict:
-        """Initialize database by scanning all tables and storing max IDs"""
-        config = await cls.get_database(guid)
-        if not config:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Database config with guid {guid} not found"
-            )
+    async def seed_segments(cls, seeds: List[Tuple[str, int]]) -> Dict[str, int]:
+        """
+        Seed segment counters from database max IDs without ever moving a counter backwards.
+
+        Keys are sent in batches of SEED_BATCH_SIZE, one script call per batch, all in one
+        pipeline, together with their registration in the per-system segment index. Counters
+        are written in the configured storage layout (see SegmentStore).
+        Returns how many counters were created, raised or left unchanged.
+        """
+        summary = {"created": 0, "raised": 0, "unchanged": 0}
+        if not seeds:
+            return summary
 
         redis_client = await RedisClient.get_instance()
-        connector = DbConnectorFactory.create(config)
-
-        initialized_count = 0
-        segments = []
-
-        try:
-            databases = await connector.get_databases()
-
-            for database in databases:
-                tables = await connector.get_tables(database)
-
-                for table in tables:
-                    primary_key = await connector.get_primary_key(database, table)
-
-                    if primary_key:
-                        max_id = await connector.get_max_id(database, table, primary_key)
-
-                        if max_id is not None:
-                            segment_key = f"{config.system_code}:{database}:{table}:{primary_key}".lower()
-                            redis_key = f"{cls.SEGMENT_PREFIX}{segment_key}"
-
-                            await redis_client.set(redis_key, str(max_id))
-                            initialized_count += 1
-                            segments.append(segment_key)
-
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to initialize database: {str(e)}"
-            )
-        finally:
-            await connector.close()
-
-        return {
-            "initialized_count": initialized_count,
-            "segments": segments
-        }
+        offsets = range(0, len(seeds), cls.SEED_BATCH_SIZE)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for offset in offsets:
+                SegmentStore.queue_seed(pipe, seeds[offset:offset + cls.SEED_BATCH_SIZE])
+            SegmentRegistry.register(pipe, [segment_key for segment_key, _value in seeds])
+            results = await pipe.execute()
+
+        for created, raised, unchanged in results[:len(offsets)]:
+            summary["created"] += created
+            summary["raised"] += raised
+            summary["unchanged"] += unchanged
+        return summary
 
     @classmethod
     async def add_custom_config(cls, guid: str, table_name: str, field_name: str, initial_value: int = 0) -> dict:
@@ -198,17 +448,18 @@ class DbConfigService:
         redis_client = await RedisClient.get_instance()
 
         segment_key = f"{config.system_code}:{config.db_name}:{table_name}:{field_name}".lower()
-        redis_key = f"{cls.SEGMENT_PREFIX}{segment_key}"
 
         # Check if already exists
-        existing_value = await redis_client.get(redis_key)
-        if existing_value is not None:
+        if await SegmentStore.exists(segment_key):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"Configuration already exists for {segment_key}"
             )
 
-        await redis_client.set(redis_key, str(initial_value))
+        async with redis_client.pipeline(transaction=False) as pipe:
+            SegmentStore.queue_set(pipe, segment_key, initial_value)
+            SegmentRegistry.register(pipe, [segment_key])
+            await pipe.execute()
 
         return {
             "segment_key": segment_key,
@@ -216,42 +467,122 @@ class DbConfigService:
         }
 
     @classmethod
-    async def get_discovered_tables(cls, guid: str) -> List[DiscoveredTable]:
-        """Get list of discovered new tables for a database config"""
+    async def migrate_legacy_discovered(cls, config: DatabaseConfig):
+        """Move discovered tables of the earlier set layout into the hash, one entry per table"""
+        if config.guid in cls._migrated_discovered:
+            return
         redis_client = await RedisClient.get_instance()
+        legacy_key = f"{cls.LEGACY_DISCOVERED_PREFIX}{config.guid}"
+
+        entries = {}
+        async for table_json in redis_client.sscan_iter(legacy_key):
+            table = DiscoveredTable.model_validate_json(table_json)
+            table.segment_key = f"{config.system_code}:{table.database}:{table.table}:{table.primary_key}".lower()
+            entries[table.segment_key] = table.model_dump_json()
+
+        if entries:
+            # HSETNX: never overwrite an entry the scanner already wrote to the hash
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for segment_key, table_json in entries.items():
+                    pipe.hsetnx(f"{cls.DISCOVERED_PREFIX}{config.guid}", segment_key, table_json)
+                await pipe.execute()
+            logger.info(f"Migrated {len(entries)} discovered tables of config {config.guid} to the hash layout")
+
+        await redis_client.delete(legacy_key)
+        cls._migrated_discovered.add(config.guid)
 
+    @classmethod
+    async def get_discovered_tables(cls, guid: str, cursor: int = 0, count: int = 100) -> DiscoveredTablePage:
+        """Get one page of discovered new tables for a database config (HSCAN cursor pagination)"""
+        config = await cls.get_database(guid)
+        if not config:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Database config with guid {guid} not found"
+            )
+        await cls.migrate_legacy_discovered(config)
+
+        redis_client = await RedisClient.get_instance()
         discovered_key = f"{cls.DISCOVERED_PREFIX}{guid}"
-        tables_json = await redis_client.smembers(discovered_key)
+        next_cursor, entries = await redis_client.hscan(discovered_key, cursor=cursor, count=count)
+        total = await redis_client.hlen(discovered_key)
 
-        discovered_tables = []
-        for table_json in tables_json:
-            discovered_tables.append(DiscoveredTable.model_validate_json(table_json))
+        return DiscoveredTablePage(
+            tables=[DiscoveredTable.model_validate_json(table_json) for table_json in entries.values()],
+            cursor=next_cursor,
+            total=total
+        )
 
-        return discovered_tables
+    @classmethod
+    async def approve_discovered_tables(cls, guid: str, segment_keys: List[str]) -> dict:
+        """
+        Approve discovered tables and seed their counters.
+
+        The max ID stored at discovery time may be stale, so it is read again for every
+        approved table; all counters are then seeded in one pipelined, raise-only pass and
+        the tables leave the discovered store.
+        """
+        config = await cls.get_database(guid)
+        if not config:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Database config with guid {guid} not found"
+            )
+        await cls.migrate_legacy_discovered(config)
+
+        redis_client = await RedisClient.get_instance()
+        discovered_key = f"{cls.DISCOVERED_PREFIX}{guid}"
+        segment_keys = list(dict.fromkeys(segment_key.lower() for segment_key in segment_keys))
+        entries = await redis_client.hmget(discovered_key, segment_keys)
+
+        seeds = []
+        not_found = []
+        failed = {}
+        async with DbConnectorPool.acquire(config) as connector:
+            for segment_key, table_json in zip(segment_keys, entries):
+                if table_json is None:
+                    not_found.append(segment_key)
+                    continue
+                table = DiscoveredTable.model_validate_json(table_json)
+                try:
+                    max_id, _method = await connector.resolve_max_id(table.database, table.table, table.primary_key)
+                except Exception as e:
+                    failed[segment_key] = str(e)
+                    continue
+                seeds.append((segment_key, max_id or 0))
+
+        summary = await cls.seed_segments(seeds)
+        if seeds:
+            approved = [segment_key for segment_key, _max_id in seeds]
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.hdel(discovered_key, *approved)
+                pipe.delete(*(f"{cls.FAILURE_PREFIX}{segment_key}" for segment_key in approved))
+                await pipe.execute()
+
+        return {
+            "approved": len(seeds),
+            **summary,
+            "not_found": not_found,
+            "failed": failed
+        }
 
     @classmethod
     async def initialize_single_field(cls, config: DatabaseConfig, db_name: str, table_name: str, field_name: str) -> Optional[int]:
         """Initialize a single table field segment by checking database and getting max ID"""
-        connector = DbConnectorFactory.create(config)
-
-        try:
+        async with DbConnectorPool.acquire(config) as connector:
             # Check if table and field exist
             exists = await connector.table_field_exists(db_name, table_name, field_name)
             if not exists:
                 return None
 
             # Get max ID for the field
-            max_id = await connector.get_max_id(db_name, table_name, field_name)
+            max_id, _method = await connector.resolve_max_id(db_name, table_name, field_name)
 
-            if max_id is not None:
-                redis_client = await RedisClient.get_instance()
-                segment_key = f"{config.system_code}:{db_name}:{table_name}:{field_name}".lower()
-                redis_key = f"{cls.SEGMENT_PREFIX}{segment_key}"
+        if max_id is not None:
+            segment_key = f"{config.system_code}:{db_name}:{table_name}:{field_name}".lower()
 
-                # Initialize the segment cache
-                await redis_client.set(redis_key, str(max_id))
-                return max_id
+            # Raise-only: a counter that already started allocating is never moved backwards
+            await cls.seed_segments([(segment_key, max_id)])
+            return max_id
 
-            return None
-        finally:
-            await connector.close()
+        return None
@@ -1,6 +1,34 @@
+import asyncio
+import hashlib
+import logging
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, List, NamedTuple, Optional, Tuple
 from app.models.database import DatabaseConfig, DatabaseType
+from app.config import DB_EXECUTOR_MAX_WORKERS, DB_CALL_TIMEOUT, DB_CONNECT_TIMEOUT, DB_MAX_ID_TIMEOUT
+
+# Dedicated, bounded pool for synchronous drivers (pyodbc, cx_Oracle) so their
+# network I/O never runs on the event loop or exhausts the default executor
+_driver_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_MAX_WORKERS, thread_name_prefix="db-driver")
+
+logger = logging.getLogger(__name__)
+
+MAX_ID_METHOD_CATALOG = "catalog"
+MAX_ID_METHOD_MAX = "max"
+
+
+class TablePrimaryKey(NamedTuple):
+    """Numeric primary key column of a table"""
+    table: str
+    column: str
+    data_type: str
+
+
+class MaxIdLookup(NamedTuple):
+    """Current max ID of a column and how it was obtained (catalog metadata or a MAX() query)"""
+    value: Optional[int]
+    method: str
 
 
 class DbConnector(ABC):
@@ -9,6 +37,37 @@ class DbConnector(ABC):
     def __init__(self, config: DatabaseConfig):
         self.config = config
 
+    async def _run_blocking(self, func, *args, timeout: int = DB_CALL_TIMEOUT):
+        """
+        Run a synchronous driver call on the driver executor with a timeout.
+
+        `timeout` must match the driver-level timeout the call runs under. On timeout or
+        cancellation the connection is dropped, so the next call opens a fresh one, and
+        closed once the worker thread still using it returns.
+        """
+        call = _driver_executor.submit(func, *args)
+        try:
+            # Connect + query may each take up to their own driver timeout
+            return await asyncio.wait_for(asyncio.wrap_future(call), timeout=DB_CONNECT_TIMEOUT + timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # The worker thread may still be using the connection; nobody else may touch it
+            conn = getattr(self, "conn", None)
+            if conn is not None and not call.done():
+                self.conn = None
+                call.add_done_callback(lambda _call: self._close_abandoned(conn))
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise TimeoutError(
+                f"Database call {getattr(func, '__name__', func)} timed out for {self.config.db_address}"
+            )
+
+    def _close_abandoned(self, conn):
+        """Close a connection given up on after a timeout (runs on the thread that finished with it)"""
+        try:
+            conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing abandoned connection to {self.config.db_address}: {str(e)}")
+
     @abstractmethod
     async def get_databases(self) -> List[str]:
         """Get list of all databases"""
@@ -24,16 +83,99 @@ class DbConnector(ABC):
         """Get the numeric primary key field name for a table"""
         pass
 
+    async def get_numeric_primary_keys_page(
+        self, database: str, after: Any = None, limit: int = 1000
+    ) -> Tuple[List[TablePrimaryKey], Any]:
+        """
+        Read the numeric primary keys of the next `limit` tables after position `after` (None: from the start).
+
+        Returns the primary keys and the position to continue from, or None when the
+        catalog is exhausted. Connectors override this with one keyset-paged catalog query
+        per page; this fallback lists the tables and queries them one at a time.
+        """
+        tables = sorted(table for table in await self.get_tables(database) if after is None or table > after)
+        tables = tables[:limit]
+        primary_keys = []
+        for table in tables:
+            primary_key = await self.get_primary_key(database, table)
+            if primary_key:
+                primary_keys.append(TablePrimaryKey(table, primary_key, ""))
+        return primary_keys, (tables[-1] if len(tables) == limit else None)
+
+    async def iter_numeric_primary_keys(self, database: str, batch_size: int = 1000) -> AsyncIterator[List[TablePrimaryKey]]:
+        """
+        Stream the numeric primary key of every table in a database, in batches of at most `batch_size`.
+
+        Every batch is a complete catalog query (see get_numeric_primary_keys_page), so memory
+        stays flat however large the schema is and the connection is free between batches:
+        the consumer may query the tables of a batch on the same connector before asking
+        for the next one.
+        """
+        position = None
+        while True:
+            batch, position = await self.get_numeric_primary_keys_page(database, position, batch_size)
+            if batch:
+                yield batch
+            if position is None:
+                return
+
+    async def get_schema_fingerprint(self, database: str) -> Optional[str]:
+        """
+        Get a cheap fingerprint of a database's tables and primary keys.
+
+        The value changes when tables or primary keys are added, dropped or altered.
+        None means the dialect cannot tell, so the database is always rescanned.
+        """
+        return None
+
+    @staticmethod
+    def _hash_fingerprint(row) -> str:
+        return hashlib.sha1(repr(tuple(row)).encode("utf-8")).hexdigest()
+
     @abstractmethod
     async def get_max_id(self, database: str, table: str, pk_field: str) -> Optional[int]:
         """Get the maximum ID value for a table"""
         pass
 
+    async def get_catalog_max_id(self, database: str, table: str, field: str) -> Optional[int]:
+        """
+        Get the highest ID handed out for a column from catalog metadata, without touching the table.
+
+        The value is only a hint: generators can fall behind explicitly inserted values
+        (OVERRIDING SYSTEM VALUE, COPY, a reseed), so resolve_max_id() verifies it with
+        has_ids_above(). None means the catalog has no value for this column.
+        """
+        return None
+
+    async def has_ids_above(self, database: str, table: str, field: str, value: int) -> bool:
+        """Whether any row has an ID above `value` (an index-backed probe, no MAX() scan)"""
+        return True
+
+    async def resolve_max_id(self, database: str, table: str, field: str) -> MaxIdLookup:
+        """
+        Get the max ID of a column, preferring catalog metadata over a MAX() query.
+
+        The catalog value is used only when no row has a higher ID; otherwise MAX() is queried.
+        """
+        try:
+            value = await self.get_catalog_max_id(database, table, field)
+            if value is not None and not await self.has_ids_above(database, table, field, value):
+                return MaxIdLookup(value, MAX_ID_METHOD_CATALOG)
+        except Exception as e:
+            logger.warning(f"Catalog max ID lookup failed for {database}.{table}.{field}, using MAX(): {str(e)}")
+
+        return MaxIdLookup(await self.get_max_id(database, table, field), MAX_ID_METHOD_MAX)
+
     @abstractmethod
     async def table_field_exists(self, database: str, table: str, field: str) -> bool:
         """Check if a specific table and field exists in the database"""
         pass
 
+    @abstractmethod
+    async def ping(self):
+        """Check that the connection is alive (raises on failure)"""
+        pass
+
     @abstractmethod
     async def close(self):
         """Close database connection"""
@@ -43,6 +185,8 @@ class DbConnector(ABC):
 class MySQLConnector(DbConnector):
     """MySQL database connector"""
 
+    NUMERIC_TYPES = ('int', 'bigint', 'smallint', 'tinyint', 'mediumint')
+
     def __init__(self, config: DatabaseConfig):
         super().__init__(config)
         try:
@@ -70,6 +214,12 @@ class MySQLConnector(DbConnector):
                 user=self.config.db_user,
                 password=self.config.db_password
             )
+            # MySQL 8 caches INFORMATION_SCHEMA.TABLES statistics (AUTO_INCREMENT included) for a day by default
+            try:
+                async with self.conn.cursor() as cursor:
+                    await cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+            except self.aiomysql.Error:
+                pass  # MySQL 5.7 / MariaDB: no statistics cache
         return self.conn
 
     async def get_databases(self) -> List[str]:
@@ -99,10 +249,44 @@ class MySQLConnector(DbConnector):
             """
             await cursor.execute(query, (database, table))
             result = await cursor.fetchone()
-            if result and result[1] in ('int', 'bigint', 'smallint', 'tinyint', 'mediumint'):
+            if result and result[1] in self.NUMERIC_TYPES:
                 return result[0]
             return None
 
+    async def get_numeric_primary_keys_page(
+        self, database: str, after: Any = None, limit: int = 1000
+    ) -> Tuple[List[TablePrimaryKey], Any]:
+        conn = await self._get_connection()
+        async with conn.cursor() as cursor:
+            # First primary key column of each table, keyset-paged by table name
+            query = """
+                SELECT k.TABLE_NAME, k.COLUMN_NAME, c.DATA_TYPE
+                FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+                JOIN INFORMATION_SCHEMA.COLUMNS c
+                    ON c.TABLE_SCHEMA = k.TABLE_SCHEMA AND c.TABLE_NAME = k.TABLE_NAME AND c.COLUMN_NAME = k.COLUMN_NAME
+                WHERE k.TABLE_SCHEMA = %s AND k.CONSTRAINT_NAME = 'PRIMARY' AND k.ORDINAL_POSITION = 1
+                    AND k.TABLE_NAME > %s
+                ORDER BY k.TABLE_NAME
+                LIMIT %s
+            """
+            await cursor.execute(query, (database, after or "", limit))
+            rows = await cursor.fetchall()
+        primary_keys = [TablePrimaryKey(*row) for row in rows if row[2] in self.NUMERIC_TYPES]
+        return primary_keys, (rows[-1][0] if len(rows) == limit else None)
+
+    async def get_schema_fingerprint(self, database: str) -> Optional[str]:
+        conn = await self._get_connection()
+        async with conn.cursor() as cursor:
+            query = """
+                SELECT COUNT(*), MAX(CREATE_TIME), SUM(CRC32(TABLE_NAME)),
+                    (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = %s AND COLUMN_KEY = 'PRI')
+                FROM INFORMATION_SCHEMA.TABLES
+                WHERE TABLE_SCHEMA = %s
+            """
+            await cursor.execute(query, (database, database))
+            row = await cursor.fetchone()
+        return self._hash_fingerprint(row)
+
     async def get_max_id(self, database: str, table: str, pk_field: str) -> Optional[int]:
         conn = await self._get_connection()
         async with conn.cursor() as cursor:
@@ -111,6 +295,29 @@ class MySQLConnector(DbConnector):
             result = await cursor.fetchone()
             return result[0] if result and result[0] is not None else 0
 
+    async def get_catalog_max_id(self, database: str, table: str, field: str) -> Optional[int]:
+        # InnoDB moves AUTO_INCREMENT past explicitly inserted values (verified by resolve_max_id all the same)
+        conn = await self._get_connection()
+        async with conn.cursor() as cursor:
+            query = """
+                SELECT t.AUTO_INCREMENT
+                FROM INFORMATION_SCHEMA.TABLES t
+                JOIN INFORMATION_SCHEMA.COLUMNS c
+                    ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+                WHERE t.TABLE_SCHEMA = %s AND t.TABLE_NAME = %s AND c.COLUMN_NAME = %s
+                    AND t.ENGINE = 'InnoDB' AND c.EXTRA LIKE '%%auto_increment%%'
+            """
+            await cursor.execute(query, (database, table, field))
+            result = await cursor.fetchone()
+            return result[0] - 1 if result and result[0] is not None else None
+
+    async def has_ids_above(self, database: str, table: str, field: str, value: int) -> bool:
+        conn = await self._get_connection()
+        async with conn.cursor() as cursor:
+            query = f"SELECT 1 FROM `{database}`.`{table}` WHERE `{field}` > %s LIMIT 1"
+            await cursor.execute(query, (value,))
+            return await cursor.fetchone() is not None
+
     async def table_field_exists(self, database: str, table: str, field: str) -> bool:
         conn = await self._get_connection()
         async with conn.cursor() as cursor:
@@ -123,13 +330,34 @@ class MySQLConnector(DbConnector):
             result = await cursor.fetchone()
             return result[0] > 0 if result else False
 
+    async def ping(self):
+        conn = await self._get_connection()
+        async with conn.cursor() as cursor:
+            await cursor.execute("SELECT 1")
+            await cursor.fetchone()
+
     async def close(self):
         if self.conn:
             self.conn.close()
 
 
 class PostgreSQLConnector(DbConnector):
-    """PostgreSQL database connector"""
+    """
+    PostgreSQL database connector.
+
+    A PostgreSQL connection is bound to one database, so the connector keeps one
+    connection per database it has queried (at most MAX_DATABASE_CONNECTIONS, least
+    recently used closed first). Tables of every non-system schema are covered;
+    tables outside `public` are named "schema.table" so their segment keys stay unique.
+    """
+
+    NUMERIC_TYPES = ('integer', 'bigint', 'smallint')
+    MAX_DATABASE_CONNECTIONS = 4
+    # Schemas that never hold application tables
+    USER_SCHEMA_FILTER = """
+        n.nspname NOT IN ('pg_catalog', 'information_schema')
+        AND n.nspname NOT LIKE 'pg\\_toast%' AND n.nspname NOT LIKE 'pg\\_temp\\_%'
+    """
 
     def __init__(self, config: DatabaseConfig):
         super().__init__(config)
@@ -141,7 +369,7 @@ class PostgreSQLConnector(DbConnector):
                 "asyncpg is required for PostgreSQL connections. "
                 "Install it with: pip install asyncpg"
             )
-        self.conn = None
+        self.conns = OrderedDict()
         self.host, self.port = self._parse_address(config.db_address)
 
     def _parse_address(self, address: str):
@@ -150,68 +378,170 @@ class PostgreSQLConnector(DbConnector):
         port = int(parts[1]) if len(parts) > 1 else 5432
         return host, port
 
-    async def _get_connection(self):
-        if self.conn is None:
-            self.conn = await self.asyncpg.connect(
+    async def _get_connection(self, database: Optional[str] = None):
+        database = database or self.config.db_name or 'postgres'
+        conn = self.conns.get(database)
+        if conn is None or conn.is_closed():
+            conn = await self.asyncpg.connect(
                 host=self.host,
                 port=self.port,
                 user=self.config.db_user,
                 password=self.config.db_password,
-                database=self.config.db_name or 'postgres'
+                database=database,
+                timeout=DB_CONNECT_TIMEOUT
             )
-        return self.conn
+            self.conns[database] = conn
+            while len(self.conns) > self.MAX_DATABASE_CONNECTIONS:
+                _database, stale = self.conns.popitem(last=False)
+                await stale.close()
+        self.conns.move_to_end(database)
+        return conn
+
+    @staticmethod
+    def _split_table(table: str) -> Tuple[str, str]:
+        """"schema.table" -> (schema, table); unqualified names live in public"""
+        schema, dot, name = table.partition(".")
+        return (schema, name) if dot else ("public", table)
+
+    @staticmethod
+    def _qualified_name(schema: str, table: str) -> str:
+        return table if schema == "public" else f"{schema}.{table}"
+
+    @staticmethod
+    def _quote(identifier: str) -> str:
+        return '"' + identifier.replace('"', '""') + '"'
 
     async def get_databases(self) -> List[str]:
         conn = await self._get_connection()
-        result = await conn.fetch("SELECT datname FROM pg_database WHERE datistemplate = false")
+        result = await conn.fetch("SELECT datname FROM pg_database WHERE datistemplate = false AND datallowconn")
         databases = [row['datname'] for row in result if row['datname'] not in ('postgres',)]
         return databases
 
     async def get_tables(self, database: str) -> List[str]:
-        conn = await self._get_connection()
-        result = await conn.fetch("""
-            SELECT tablename FROM pg_tables
-            WHERE schemaname = 'public'
+        conn = await self._get_connection(database)
+        result = await conn.fetch(f"""
+            SELECT n.nspname, c.relname
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('r', 'p') AND NOT c.relispartition AND {self.USER_SCHEMA_FILTER}
         """)
-        return [row['tablename'] for row in result]
+        return [self._qualified_name(row['nspname'], row['relname']) for row in result]
 
     async def get_primary_key(self, database: str, table: str) -> Optional[str]:
-        conn = await self._get_connection()
+        conn = await self._get_connection(database)
+        schema, name = self._split_table(table)
         query = """
             SELECT a.attname, format_type(a.atttypid, a.atttypmod) as data_type
             FROM pg_index i
-            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-            WHERE i.indrelid = $1::regclass AND i.indisprimary
-            LIMIT 1
+            JOIN pg_class c ON c.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indisprimary AND n.nspname = $1 AND c.relname = $2
         """
-        result = await conn.fetchrow(query, table)
-        if result and result['data_type'] in ('integer', 'bigint', 'smallint'):
+        result = await conn.fetchrow(query, schema, name)
+        if result and result['data_type'] in self.NUMERIC_TYPES:
             return result['attname']
         return None
 
+    async def get_numeric_primary_keys_page(
+        self, database: str, after: Any = None, limit: int = 1000
+    ) -> Tuple[List[TablePrimaryKey], Any]:
+        conn = await self._get_connection(database)
+        # Every schema of the database, keyset-paged along pg_class's (relname, relnamespace)
+        # index; partitions share their parent's key
+        query = f"""
+            SELECT c.relname, c.relnamespace, n.nspname, a.attname, format_type(a.atttypid, a.atttypmod) AS data_type
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indisprimary AND NOT c.relispartition AND {self.USER_SCHEMA_FILTER}
+                AND (c.relname, c.relnamespace) > ($1::name, $2::oid)
+            ORDER BY c.relname, c.relnamespace
+            LIMIT $3
+        """
+        relname, relnamespace = after or ("", 0)
+        rows = await conn.fetch(query, relname, relnamespace, limit)
+        primary_keys = [
+            TablePrimaryKey(self._qualified_name(row['nspname'], row['relname']), row['attname'], row['data_type'])
+            for row in rows if row['data_type'] in self.NUMERIC_TYPES
+        ]
+        return primary_keys, ((rows[-1]['relname'], rows[-1]['relnamespace']) if len(rows) == limit else None)
+
+    async def get_schema_fingerprint(self, database: str) -> Optional[str]:
+        conn = await self._get_connection(database)
+        # Tables and indexes: a new table or primary key always allocates a new OID
+        query = f"""
+            SELECT count(*), COALESCE(max(c.oid::bigint), 0),
+                COALESCE(sum(hashtext(n.nspname || '.' || c.relname)::bigint), 0)
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('r', 'p', 'i') AND {self.USER_SCHEMA_FILTER}
+        """
+        row = await conn.fetchrow(query)
+        return self._hash_fingerprint(row.values())
+
     async def get_max_id(self, database: str, table: str, pk_field: str) -> Optional[int]:
-        conn = await self._get_connection()
-        query = f'SELECT MAX("{pk_field}") FROM "{table}"'
+        conn = await self._get_connection(database)
+        schema, name = self._split_table(table)
+        query = f"SELECT MAX({self._quote(pk_field)}) FROM {self._quote(schema)}.{self._quote(name)}"
         result = await conn.fetchval(query)
         return result if result is not None else 0
 
+    async def get_catalog_max_id(self, database: str, table: str, field: str) -> Optional[int]:
+        # serial columns and identities (ALWAYS or BY DEFAULT) own a sequence. It falls behind
+        # explicitly inserted values (BY DEFAULT / serial inserts, OVERRIDING SYSTEM VALUE, COPY),
+        # which has_ids_above() catches. NULL until first use.
+        conn = await self._get_connection(database)
+        schema, name = self._split_table(table)
+        query = """
+            SELECT pg_sequence_last_value(s.seq::regclass)
+            FROM (
+                SELECT pg_get_serial_sequence(format('%I.%I', n.nspname, c.relname), a.attname) AS seq
+                FROM pg_attribute a
+                JOIN pg_class c ON c.oid = a.attrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = $1 AND c.relname = $2 AND a.attname = $3
+                    AND (a.attidentity IN ('a', 'd') OR a.atthasdef)
+            ) s
+            WHERE s.seq IS NOT NULL
+        """
+        return await conn.fetchval(query, schema, name, field)
+
+    async def has_ids_above(self, database: str, table: str, field: str, value: int) -> bool:
+        conn = await self._get_connection(database)
+        schema, name = self._split_table(table)
+        query = f"SELECT 1 FROM {self._quote(schema)}.{self._quote(name)} WHERE {self._quote(field)} > $1 LIMIT 1"
+        return await conn.fetchval(query, value) is not None
+
     async def table_field_exists(self, database: str, table: str, field: str) -> bool:
-        conn = await self._get_connection()
+        conn = await self._get_connection(database)
+        schema, name = self._split_table(table)
         query = """
             SELECT COUNT(*)
             FROM information_schema.columns
-            WHERE table_schema = 'public' AND table_name = $1 AND column_name = $2
+            WHERE table_schema = $1 AND table_name = $2 AND column_name = $3
         """
-        result = await conn.fetchval(query, table, field)
+        result = await conn.fetchval(query, schema, name, field)
         return result > 0 if result else False
 
+    async def ping(self):
+        if not self.conns:
+            await self._get_connection()
+        for conn in list(self.conns.values()):
+            await conn.fetchval("SELECT 1")
+
     async def close(self):
-        if self.conn:
-            await self.conn.close()
+        conns = list(self.conns.values())
+        self.conns.clear()
+        for conn in conns:
+            await conn.close()
 
 
 class SQLServerConnector(DbConnector):
-    """SQL Server database connector (using pyodbc - synchronous)"""
+    """SQL Server database connector (pyodbc is synchronous, calls run on the driver executor)"""
+
+    NUMERIC_TYPES = ('int', 'bigint', 'smallint', 'tinyint')
 
     def __init__(self, config: DatabaseConfig):
         super().__init__(config)
@@ -236,10 +566,15 @@ class SQLServerConnector(DbConnector):
     def _get_connection(self):
         if self.conn is None:
             conn_str = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={self.host},{self.port};UID={self.config.db_user};PWD={self.config.db_password}"
-            self.conn = self.pyodbc.connect(conn_str)
+            self.conn = self.pyodbc.connect(conn_str, timeout=DB_CONNECT_TIMEOUT)
+            # Query timeout enforced by the driver, so a stuck statement frees its executor thread
+            self.conn.timeout = DB_CALL_TIMEOUT
         return self.conn
 
     async def get_databases(self) -> List[str]:
+        return await self._run_blocking(self._get_databases_sync)
+
+    def _get_databases_sync(self) -> List[str]:
         conn = self._get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sys.databases WHERE name NOT IN ('master', 'tempdb', 'model', 'msdb')")
@@ -248,6 +583,9 @@ class SQLServerConnector(DbConnector):
         return databases
 
     async def get_tables(self, database: str) -> List[str]:
+        return await self._run_blocking(self._get_tables_sync, database)
+
+    def _get_tables_sync(self, database: str) -> List[str]:
         conn = self._get_connection()
         cursor = conn.cursor()
         cursor.execute(f"SELECT TABLE_NAME FROM [{database}].INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE'")
@@ -256,6 +594,9 @@ class SQLServerConnector(DbConnector):
         return tables
 
     async def get_primary_key(self, database: str, table: str) -> Optional[str]:
+        return await self._run_blocking(self._get_primary_key_sync, database, table)
+
+    def _get_primary_key_sync(self, database: str, table: str) -> Optional[str]:
         conn = self._get_connection()
         cursor = conn.cursor()
         query = f"""
@@ -268,20 +609,105 @@ class SQLServerConnector(DbConnector):
         cursor.execute(query, (table,))
         result = cursor.fetchone()
         cursor.close()
-        if result and result[1] in ('int', 'bigint', 'smallint', 'tinyint'):
+        if result and result[1] in self.NUMERIC_TYPES:
             return result[0]
         return None
 
-    async def get_max_id(self, database: str, table: str, pk_field: str) -> Optional[int]:
+    async def get_numeric_primary_keys_page(
+        self, database: str, after: Any = None, limit: int = 1000
+    ) -> Tuple[List[TablePrimaryKey], Any]:
+        return await self._run_blocking(self._get_numeric_primary_keys_page_sync, database, after, limit)
+
+    def _get_numeric_primary_keys_page_sync(self, database: str, after: Any, limit: int) -> Tuple[List[TablePrimaryKey], Any]:
         conn = self._get_connection()
         cursor = conn.cursor()
-        query = f"SELECT MAX([{pk_field}]) FROM [{database}].dbo.[{table}]"
+        # Only dbo tables: get_max_id addresses tables as [database].dbo.[table]. Keyset-paged by table name.
+        query = f"""
+            SELECT TOP (?) kcu.TABLE_NAME, kcu.COLUMN_NAME, c.DATA_TYPE
+            FROM [{database}].INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+            JOIN [{database}].INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+                ON tc.CONSTRAINT_SCHEMA = kcu.CONSTRAINT_SCHEMA AND tc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME
+            JOIN [{database}].INFORMATION_SCHEMA.COLUMNS c
+                ON c.TABLE_SCHEMA = kcu.TABLE_SCHEMA AND c.TABLE_NAME = kcu.TABLE_NAME AND c.COLUMN_NAME = kcu.COLUMN_NAME
+            WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY' AND tc.TABLE_SCHEMA = 'dbo' AND kcu.ORDINAL_POSITION = 1
+                AND kcu.TABLE_NAME > ?
+            ORDER BY kcu.TABLE_NAME
+        """
+        cursor.execute(query, (limit, after or ""))
+        rows = cursor.fetchall()
+        cursor.close()
+        primary_keys = [TablePrimaryKey(row[0], row[1], row[2]) for row in rows if row[2] in self.NUMERIC_TYPES]
+        return primary_keys, (rows[-1][0] if len(rows) == limit else None)
+
+    async def get_schema_fingerprint(self, database: str) -> Optional[str]:
+        return await self._run_blocking(self._get_schema_fingerprint_sync, database)
+
+    def _get_schema_fingerprint_sync(self, database: str) -> Optional[str]:
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        # modify_date changes on every DDL statement against a table or its primary key
+        query = f"""
+            SELECT COUNT(*), MAX(modify_date), SUM(CAST(object_id AS BIGINT))
+            FROM [{database}].sys.objects
+            WHERE type IN ('U', 'PK')
+        """
         cursor.execute(query)
-        result = cursor.fetchone()
+        row = cursor.fetchone()
         cursor.close()
+        return self._hash_fingerprint(row)
+
+    async def get_max_id(self, database: str, table: str, pk_field: str) -> Optional[int]:
+        return await self._run_blocking(self._get_max_id_sync, database, table, pk_field, timeout=DB_MAX_ID_TIMEOUT)
+
+    def _get_max_id_sync(self, database: str, table: str, pk_field: str) -> Optional[int]:
+        conn = self._get_connection()
+        # MAX() on an unindexed column scans the table, so it gets the longer timeout
+        conn.timeout = DB_MAX_ID_TIMEOUT
+        try:
+            cursor = conn.cursor()
+            query = f"SELECT MAX([{pk_field}]) FROM [{database}].dbo.[{table}]"
+            cursor.execute(query)
+            result = cursor.fetchone()
+            cursor.close()
+        finally:
+            conn.timeout = DB_CALL_TIMEOUT
         return result[0] if result and result[0] is not None else 0
 
+    async def get_catalog_max_id(self, database: str, table: str, field: str) -> Optional[int]:
+        return await self._run_blocking(self._get_catalog_max_id_sync, database, table, field)
+
+    def _get_catalog_max_id_sync(self, database: str, table: str, field: str) -> Optional[int]:
+        # IDENTITY_INSERT moves the identity past inserted values, but a DBCC CHECKIDENT RESEED
+        # can set it below MAX(); has_ids_above() catches that
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        query = f"""
+            SELECT CAST(IDENT_CURRENT(?) AS BIGINT)
+            FROM [{database}].sys.identity_columns ic
+            JOIN [{database}].sys.tables t ON t.object_id = ic.object_id
+            JOIN [{database}].sys.schemas s ON s.schema_id = t.schema_id
+            WHERE s.name = 'dbo' AND t.name = ? AND ic.name = ?
+        """
+        cursor.execute(query, (f"[{database}].[dbo].[{table}]", table, field))
+        result = cursor.fetchone()
+        cursor.close()
+        return result[0] if result and result[0] is not None else None
+
+    async def has_ids_above(self, database: str, table: str, field: str, value: int) -> bool:
+        return await self._run_blocking(self._has_ids_above_sync, database, table, field, value)
+
+    def _has_ids_above_sync(self, database: str, table: str, field: str, value: int) -> bool:
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT TOP 1 1 FROM [{database}].dbo.[{table}] WHERE [{field}] > ?", (value,))
+        result = cursor.fetchone()
+        cursor.close()
+        return result is not None
+
     async def table_field_exists(self, database: str, table: str, field: str) -> bool:
+        return await self._run_blocking(self._table_field_exists_sync, database, table, field)
+
+    def _table_field_exists_sync(self, database: str, table: str, field: str) -> bool:
         conn = self._get_connection()
         cursor = conn.cursor()
         query = f"""
@@ -294,13 +720,25 @@ class SQLServerConnector(DbConnector):
         cursor.close()
         return result[0] > 0 if result else False
 
+    async def ping(self):
+        await self._run_blocking(self._ping_sync)
+
+    def _ping_sync(self):
+        cursor = self._get_connection().cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+
     async def close(self):
         if self.conn:
-            self.conn.close()
+            conn, self.conn = self.conn, None
+            await self._run_blocking(conn.close)
 
 
 class OracleConnector(DbConnector):
-    """Oracle database connector (synchronous)"""
+    """Oracle database connector (cx_Oracle is synchronous, calls run on the driver executor)"""
+
+    NUMERIC_TYPES = ('NUMBER',)
 
     def __init__(self, config: DatabaseConfig):
         super().__init__(config)
@@ -322,16 +760,26 @@ class OracleConnector(DbConnector):
         port = int(parts[1]) if len(parts) > 1 else 1521
         return host, port
 
+    @staticmethod
+    def _quote(identifier: str) -> str:
+        # Upper-cased like the catalog lookups, which is how Oracle folds unquoted names
+        return '"' + identifier.upper().replace('"', '""') + '"'
+
     def _get_connection(self):
         if self.conn is None:
             dsn = self.cx_Oracle.makedsn(self.host, self.port, service_name=self.config.db_name or 'ORCL')
             self.conn = self.cx_Oracle.connect(user=self.config.db_user, password=self.config.db_password, dsn=dsn)
+            # Round-trip timeout enforced by the driver (milliseconds)
+            self.conn.callTimeout = int(DB_CALL_TIMEOUT * 1000)
         return self.conn
 
     async def get_databases(self) -> List[str]:
         return [self.config.db_name or 'ORCL']
 
     async def get_tables(self, database: str) -> List[str]:
+        return await self._run_blocking(self._get_tables_sync, database)
+
+    def _get_tables_sync(self, database: str) -> List[str]:
         conn = self._get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT table_name FROM user_tables")
@@ -340,6 +788,9 @@ class OracleConnector(DbConnector):
         return tables
 
     async def get_primary_key(self, database: str, table: str) -> Optional[str]:
+        return await self._run_blocking(self._get_primary_key_sync, database, table)
+
+    def _get_primary_key_sync(self, database: str, table: str) -> Optional[str]:
         conn = self._get_connection()
         cursor = conn.cursor()
         query = """
@@ -352,20 +803,104 @@ class OracleConnector(DbConnector):
         cursor.execute(query, {'table_name': table.upper()})
         result = cursor.fetchone()
         cursor.close()
-        if result and result[1] in ('NUMBER',):
+        if result and result[1] in self.NUMERIC_TYPES:
             return result[0]
         return None
 
-    async def get_max_id(self, database: str, table: str, pk_field: str) -> Optional[int]:
+    async def get_numeric_primary_keys_page(
+        self, database: str, after: Any = None, limit: int = 1000
+    ) -> Tuple[List[TablePrimaryKey], Any]:
+        return await self._run_blocking(self._get_numeric_primary_keys_page_sync, after, limit)
+
+    def _get_numeric_primary_keys_page_sync(self, after: Any, limit: int) -> Tuple[List[TablePrimaryKey], Any]:
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.arraysize = limit
+        # Keyset-paged by table name, ordered the way > compares them
+        query = """
+            SELECT table_name, column_name, data_type FROM (
+                SELECT cons.table_name, cols.column_name, tc.data_type
+                FROM user_constraints cons
+                JOIN user_cons_columns cols ON cons.constraint_name = cols.constraint_name AND cols.position = 1
+                JOIN user_tab_columns tc ON tc.table_name = cols.table_name AND tc.column_name = cols.column_name
+                WHERE cons.constraint_type = 'P' AND (:after IS NULL OR cons.table_name > :after)
+                ORDER BY NLSSORT(cons.table_name, 'NLS_SORT=BINARY')
+            ) WHERE ROWNUM <= :limit
+        """
+        cursor.execute(query, {'after': after, 'limit': limit})
+        rows = cursor.fetchall()
+        cursor.close()
+        primary_keys = [TablePrimaryKey(row[0], row[1], row[2]) for row in rows if row[2] in self.NUMERIC_TYPES]
+        return primary_keys, (rows[-1][0] if len(rows) == limit else None)
+
+    async def get_schema_fingerprint(self, database: str) -> Optional[str]:
+        return await self._run_blocking(self._get_schema_fingerprint_sync, database)
+
+    def _get_schema_fingerprint_sync(self, database: str) -> Optional[str]:
         conn = self._get_connection()
         cursor = conn.cursor()
-        query = f"SELECT MAX({pk_field}) FROM {table}"
+        query = """
+            SELECT COUNT(*), MAX(last_ddl_time), SUM(object_id)
+            FROM user_objects
+            WHERE object_type IN ('TABLE', 'INDEX')
+        """
         cursor.execute(query)
-        result = cursor.fetchone()
+        row = cursor.fetchone()
         cursor.close()
+        return self._hash_fingerprint(row)
+
+    async def get_max_id(self, database: str, table: str, pk_field: str) -> Optional[int]:
+        return await self._run_blocking(self._get_max_id_sync, database, table, pk_field, timeout=DB_MAX_ID_TIMEOUT)
+
+    def _get_max_id_sync(self, database: str, table: str, pk_field: str) -> Optional[int]:
+        conn = self._get_connection()
+        # MAX() on an unindexed column scans the table, so it gets the longer timeout
+        conn.callTimeout = int(DB_MAX_ID_TIMEOUT * 1000)
+        try:
+            cursor = conn.cursor()
+            query = f"SELECT MAX({self._quote(pk_field)}) FROM {self._quote(table)}"
+            cursor.execute(query)
+            result = cursor.fetchone()
+            cursor.close()
+        finally:
+            conn.callTimeout = int(DB_CALL_TIMEOUT * 1000)
         return result[0] if result and result[0] is not None else 0
 
+    async def get_catalog_max_id(self, database: str, table: str, field: str) -> Optional[int]:
+        return await self._run_blocking(self._get_catalog_max_id_sync, database, table, field)
+
+    def _get_catalog_max_id_sync(self, database: str, table: str, field: str) -> Optional[int]:
+        # Identities (ALWAYS, BY DEFAULT, BY DEFAULT ON NULL). last_number is past every cached
+        # value; explicitly inserted values can still be higher, which has_ids_above() catches.
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        query = """
+            SELECT s.last_number - 1
+            FROM user_tab_identity_cols ic
+            JOIN user_sequences s ON s.sequence_name = ic.sequence_name
+            WHERE ic.table_name = :table_name AND ic.column_name = :column_name AND s.increment_by > 0
+        """
+        cursor.execute(query, {'table_name': table.upper(), 'column_name': field.upper()})
+        result = cursor.fetchone()
+        cursor.close()
+        return int(result[0]) if result and result[0] is not None else None
+
+    async def has_ids_above(self, database: str, table: str, field: str, value: int) -> bool:
+        return await self._run_blocking(self._has_ids_above_sync, database, table, field, value)
+
+    def _has_ids_above_sync(self, database: str, table: str, field: str, value: int) -> bool:
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        query = f"SELECT 1 FROM {self._quote(table)} WHERE {self._quote(field)} > :value AND ROWNUM = 1"
+        cursor.execute(query, {'value': value})
+        result = cursor.fetchone()
+        cursor.close()
+        return result is not None
+
     async def table_field_exists(self, database: str, table: str, field: str) -> bool:
+        return await self._run_blocking(self._table_field_exists_sync, database, table, field)
+
+    def _table_field_exists_sync(self, database: str, table: str, field: str) -> bool:
         conn = self._get_connection()
         cursor = conn.cursor()
         query = """
@@ -378,9 +913,16 @@ class OracleConnector(DbConnector):
         cursor.close()
         return result[0] > 0 if result else False
 
+    async def ping(self):
+        await self._run_blocking(self._ping_sync)
+
+    def _ping_sync(self):
+        self._get_connection().ping()
+
     async def close(self):
         if self.conn:
-            self.conn.close()
+            conn, self.conn = self.conn, None
+            await self._run_blocking(conn.close)
 
 
 class DbConnectorFactory:
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List
+from app.redis_client import RedisClient
+from app.config import HOT_KEY_CAPACITY, HOT_KEY_FLUSH_INTERVAL, HOT_KEY_RETENTION_HOURS
+from app.utils.space_saving import SpaceSaving
+
+logger = logging.getLogger(__name__)
+
+
+class HotKeyService:
+    """
+    Tracks the hottest segment keys by request count and by IDs allocated.
+
+    Each worker counts into in-process Space-Saving sketches on the allocation path
+    and periodically merges them into hourly Redis sorted sets, so the top-K view
+    covers every worker and every replica.
+    """
+
+    HOT_KEY_PREFIX = "kxy:id:hot_keys:"
+    METRICS = ("requests", "ids")
+
+    _sketches: Dict[str, SpaceSaving] = {metric: SpaceSaving(HOT_KEY_CAPACITY) for metric in METRICS}
+
+    @classmethod
+    def record(cls, segment_key: str, segment_count: int):
+        """Record one allocation of `segment_count` IDs for a key (in-process, no I/O)"""
+        cls._sketches["requests"].add(segment_key, 1)
+        cls._sketches["ids"].add(segment_key, segment_count)
+
+    @classmethod
+    def _bucket_key(cls, metric: str, timestamp: float) -> str:
+        return f"{cls.HOT_KEY_PREFIX}{metric}:{time.strftime('%Y%m%d%H', time.gmtime(timestamp))}"
+
+    @classmethod
+    async def flush(cls):
+        """Merge the local sketches into the current hourly bucket in Redis"""
+        sketches = cls._sketches
+        cls._sketches = {metric: SpaceSaving(HOT_KEY_CAPACITY) for metric in cls.METRICS}
+
+        if not any(len(sketch) for sketch in sketches.values()):
+            return
+
+        redis_client = await RedisClient.get_instance()
+        now = time.time()
+
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for metric, sketch in sketches.items():
+                if not len(sketch):
+                    continue
+                bucket_key = cls._bucket_key(metric, now)
+                for segment_key, count, _error in sketch.top():
+                    pipe.zincrby(bucket_key, count, segment_key)
+                # Keep only the top entries so a bucket stays bounded
+                pipe.zremrangebyrank(bucket_key, 0, -(HOT_KEY_CAPACITY + 1))
+                pipe.expire(bucket_key, (HOT_KEY_RETENTION_HOURS + 1) * 3600)
+            await pipe.execute()
+
+    @classmethod
+    async def get_top_keys(cls, metric: str, limit: int = 20, hours: int = 1) -> List[dict]:
+        """Get the top keys for a metric over the last `hours` hourly buckets"""
+        if metric not in cls.METRICS:
+            raise ValueError(f"Unsupported metric: {metric}")
+
+        redis_client = await RedisClient.get_instance()
+        now = time.time()
+        bucket_keys = [cls._bucket_key(metric, now - i * 3600) for i in range(hours)]
+
+        entries = await redis_client.zunion(bucket_keys, withscores=True)
+        entries = sorted(entries, key=lambda entry: entry[1], reverse=True)[:limit]
+
+        return [{"segment_key": segment_key, "count": int(score)} for segment_key, score in entries]
+
+    @classmethod
+    async def start_background_flusher(cls):
+        """Periodically flush the local sketches to Redis"""
+        while True:
+            await asyncio.sleep(HOT_KEY_FLUSH_INTERVAL)
+            try:
+                await cls.flush()
+            except Exception as e:
+                logger.error(f"Error flushing hot key statistics: {str(e)}")
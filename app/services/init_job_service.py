@@ -0,0 +1,338 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from app.redis_client import RedisClient
+from app.config import INIT_JOB_CONCURRENCY, INIT_JOB_LOCK_TIMEOUT, INIT_JOB_RESUME_INTERVAL, INIT_JOB_RETENTION_SECONDS
+from app.services.db_config_service import DbConfigService
+from app.services.connector_pool import DB_POOL_BACKGROUND_SIZE, DbConnectorPool
+from app.services.db_connector import MAX_ID_METHOD_CATALOG
+from app.services.metadata_cache import MetadataCache
+from app.models.database import DatabaseConfig
+from app.models.init_job import InitJob
+
+logger = logging.getLogger(__name__)
+
+
+class InitJobService:
+    """
+    Background database initialization jobs.
+
+    A job walks every database of a config, reads MAX(primary key) of each table with a
+    numeric primary key and seeds the segment counter with it (raise-only, so re-running a
+    job on a live system never moves a counter backwards). Tables are processed concurrently
+    (INIT_JOB_CONCURRENCY) and checkpointed to Redis in batches, so a job interrupted by a
+    restart is resumed by any worker without redoing finished tables.
+    """
+
+    JOB_PREFIX = "kxy:id:init_job:"
+    ACTIVE_PREFIX = "kxy:id:init_jobs:active:"
+    PENDING_KEY = "kxy:id:init_jobs:pending"
+    LOCK_PREFIX = "kxy:id:lock:init_job:"
+    CHECKPOINT_BATCH_SIZE = 1000
+    SEED_BATCH_SIZE = 100
+
+    ACTIVE_STATUSES = ("pending", "running")
+
+    _running: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def _job_key(cls, job_id: str) -> str:
+        return f"{cls.JOB_PREFIX}{job_id}"
+
+    @classmethod
+    def _done_key(cls, job_id: str) -> str:
+        return f"{cls.JOB_PREFIX}{job_id}:done"
+
+    @classmethod
+    async def start_job(cls, guid: str) -> InitJob:
+        """Create an initialization job for a config, or return the one already in progress"""
+        config = await DbConfigService.get_database(guid)
+        if not config:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Database config with guid {guid} not found"
+            )
+
+        redis_client = await RedisClient.get_instance()
+        active_key = f"{cls.ACTIVE_PREFIX}{guid}"
+        job = InitJob(
+            job_id=uuid.uuid4().hex,
+            guid=guid,
+            system_code=config.system_code,
+            status="pending",
+            created_at=time.time()
+        )
+
+        if not await redis_client.set(active_key, job.job_id, nx=True):
+            existing = await cls.get_job(await redis_client.get(active_key) or "")
+            if existing and existing.status in cls.ACTIVE_STATUSES:
+                return existing
+            await redis_client.set(active_key, job.job_id)
+
+        # A new job lists the server's databases afresh; resumed runs reuse the cached list
+        MetadataCache.invalidate(guid)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(cls._job_key(job.job_id), mapping=job.model_dump(exclude_defaults=True))
+            pipe.sadd(cls.PENDING_KEY, job.job_id)
+            await pipe.execute()
+
+        cls._spawn(job.job_id)
+        return job
+
+    @classmethod
+    async def get_job(cls, job_id: str) -> Optional[InitJob]:
+        """Get a job with its progress and estimated time to completion"""
+        if not job_id:
+            return None
+
+        redis_client = await RedisClient.get_instance()
+        data = await redis_client.hgetall(cls._job_key(job_id))
+        if not data:
+            return None
+
+        job = InitJob.model_validate(data)
+        if job.status == "running" and job.listing_complete and job.resumed_at and job.total_tables:
+            done_in_run = job.processed_tables - job.resumed_processed
+            elapsed = time.time() - job.resumed_at
+            if done_in_run > 0 and elapsed > 0:
+                remaining = max(job.total_tables - job.processed_tables, 0)
+                job.eta_seconds = round(remaining * elapsed / done_in_run, 1)
+        return job
+
+    @classmethod
+    def _spawn(cls, job_id: str):
+        if job_id in cls._running:
+            return
+        task = asyncio.create_task(cls._run_job(job_id))
+        cls._running[job_id] = task
+        task.add_done_callback(lambda _task: cls._running.pop(job_id, None))
+
+    @classmethod
+    async def _run_job(cls, job_id: str):
+        """Run a job while holding its lock; another process owning the lock means it is already running"""
+        lock_key = f"{cls.LOCK_PREFIX}{job_id}"
+        lock_value = await RedisClient.acquire_lock(lock_key, timeout=INIT_JOB_LOCK_TIMEOUT)
+        if not lock_value:
+            return
+
+        renewer = asyncio.create_task(cls._keep_lock(lock_key, lock_value, asyncio.current_task()))
+        try:
+            await cls._execute(job_id)
+        except Exception as e:
+            logger.error(f"Initialization job {job_id} failed: {str(e)}")
+            await cls._finish(job_id, "failed", str(e))
+        finally:
+            renewer.cancel()
+            await RedisClient.release_lock(lock_key, lock_value)
+
+    @classmethod
+    async def _keep_lock(cls, lock_key: str, lock_value: str, owner: asyncio.Task):
+        """Renew the job lock; stop the job if the lock is lost so two workers never run it at once"""
+        while True:
+            await asyncio.sleep(INIT_JOB_LOCK_TIMEOUT / 3)
+            try:
+                if not await RedisClient.renew_lock(lock_key, lock_value, INIT_JOB_LOCK_TIMEOUT):
+                    logger.warning(f"Lost lock {lock_key}, stopping initialization job")
+                    owner.cancel()
+                    return
+            except Exception as e:
+                logger.error(f"Error renewing lock {lock_key}: {str(e)}")
+
+    @classmethod
+    async def _execute(cls, job_id: str):
+        job = await cls.get_job(job_id)
+        if not job or job.status not in cls.ACTIVE_STATUSES:
+            return
+
+        config = await DbConfigService.get_database(job.guid)
+        if not config:
+            await cls._finish(job_id, "failed", f"Database config with guid {job.guid} not found")
+            return
+
+        redis_client = await RedisClient.get_instance()
+        job_key = cls._job_key(job_id)
+        done_key = cls._done_key(job_id)
+
+        now = time.time()
+        processed = await redis_client.scard(done_key)
+        await redis_client.hset(job_key, mapping={
+            "status": "running",
+            "started_at": job.started_at or now,
+            "resumed_at": now,
+            "resumed_processed": processed,
+            "processed_tables": processed,
+            "total_tables": 0,
+            "listing_complete": 0,
+            "failed_tables": 0
+        })
+        await redis_client.hdel(job_key, "error")
+
+        # The catalog is streamed into a bounded queue, so memory stays flat however
+        # many tables there are; None tells a worker that listing is over. Workers never
+        # outnumber the background connections, so allocation always finds a free one
+        workers = max(1, min(INIT_JOB_CONCURRENCY, DB_POOL_BACKGROUND_SIZE))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=cls.CHECKPOINT_BATCH_SIZE)
+        finished = []
+
+        async def produce():
+            try:
+                await cls._list_tables(config, job_id, queue)
+            finally:
+                for _ in range(workers):
+                    await queue.put(None)
+
+        async def flush():
+            batch = finished[:]
+            finished.clear()
+            if batch:
+                await cls._checkpoint(job_id, batch)
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                database, table, primary_key, segment_key = item
+                try:
+                    async with DbConnectorPool.acquire(config, background=True) as connector:
+                        max_id, method = await connector.resolve_max_id(database, table, primary_key)
+                except Exception as e:
+                    # Not checkpointed, so the table is retried when the job is resumed
+                    await cls._record_failure(job_id, segment_key, e)
+                    continue
+
+                finished.append((segment_key, max_id, method))
+                if len(finished) >= cls.SEED_BATCH_SIZE:
+                    await flush()
+
+        producer = asyncio.create_task(produce())
+        try:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+            await flush()
+            # Re-raises a listing failure
+            await producer
+        finally:
+            producer.cancel()
+
+        failed = int(await redis_client.hget(job_key, "failed_tables") or 0)
+        await cls._finish(job_id, "partial" if failed else "completed")
+
+    @classmethod
+    async def _list_tables(cls, config: DatabaseConfig, job_id: str, queue: asyncio.Queue):
+        """Stream (database, table, primary key, segment key) of every table not yet checkpointed into `queue`"""
+        redis_client = await RedisClient.get_instance()
+        job_key = cls._job_key(job_id)
+        done_key = cls._done_key(job_id)
+
+        table_filter = DbConfigService.table_filter(config)
+
+        databases = DbConfigService.database_filter(config).filter(await MetadataCache.get_databases(config))
+        await redis_client.hset(job_key, "total_databases", len(databases))
+
+        for database in databases:
+            position = None
+            while True:
+                # A connector is borrowed per catalog page and returned before waiting on the
+                # queue, so a listing held up by busy workers never sits on a connection
+                async with DbConnectorPool.acquire(config, background=True) as connector:
+                    batch, position = await connector.get_numeric_primary_keys_page(
+                        database, position, cls.CHECKPOINT_BATCH_SIZE
+                    )
+
+                # Excluded tables never reach a MAX() query
+                tables = [
+                    (database, table, primary_key, f"{config.system_code}:{database}:{table}:{primary_key}".lower())
+                    for table, primary_key, _data_type in batch
+                    if table_filter.matches(table)
+                ]
+                if tables:
+                    await redis_client.hincrby(job_key, "total_tables", len(tables))
+                    for item in await cls._pending_tables(done_key, tables):
+                        await queue.put(item)
+
+                if position is None:
+                    break
+
+        await redis_client.hset(job_key, "listing_complete", 1)
+
+    @classmethod
+    async def _pending_tables(cls, done_key: str, tables: list) -> list:
+        """Drop the tables already checkpointed by an earlier run of the job"""
+        redis_client = await RedisClient.get_instance()
+        pending = []
+        for offset in range(0, len(tables), cls.CHECKPOINT_BATCH_SIZE):
+            batch = tables[offset:offset + cls.CHECKPOINT_BATCH_SIZE]
+            done = await redis_client.smismember(done_key, [segment_key for *_rest, segment_key in batch])
+            pending.extend(item for item, is_done in zip(batch, done) if not is_done)
+        return pending
+
+    @classmethod
+    async def _record_failure(cls, job_id: str, segment_key: str, error: Exception):
+        logger.error(f"Initialization job {job_id}: failed to read max ID of {segment_key}: {str(error)}")
+        redis_client = await RedisClient.get_instance()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hincrby(cls._job_key(job_id), "failed_tables", 1)
+            pipe.hsetnx(cls._job_key(job_id), "error", f"{segment_key}: {str(error)}")
+            await pipe.execute()
+
+    @classmethod
+    async def _checkpoint(cls, job_id: str, batch: List[Tuple[str, Optional[int], str]]):
+        """Seed a batch of counters, then record the tables as done"""
+        seeds = [(segment_key, max_id) for segment_key, max_id, _method in batch if max_id is not None]
+        catalog = sum(1 for _segment_key, _max_id, method in batch if method == MAX_ID_METHOD_CATALOG)
+        # Seeding is raise-only, so a crash before the checkpoint just re-seeds the same values
+        summary = await DbConfigService.seed_segments(seeds)
+
+        redis_client = await RedisClient.get_instance()
+        job_key = cls._job_key(job_id)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.sadd(cls._done_key(job_id), *(segment_key for segment_key, _max_id, _method in batch))
+            pipe.hincrby(job_key, "processed_tables", len(batch))
+            pipe.hincrby(job_key, "initialized_count", len(seeds))
+            pipe.hincrby(job_key, "created_count", summary["created"])
+            pipe.hincrby(job_key, "raised_count", summary["raised"])
+            pipe.hincrby(job_key, "unchanged_count", summary["unchanged"])
+            pipe.hincrby(job_key, "catalog_count", catalog)
+            pipe.hincrby(job_key, "max_query_count", len(batch) - catalog)
+            await pipe.execute()
+
+    @classmethod
+    async def _finish(cls, job_id: str, job_status: str, error: Optional[str] = None):
+        redis_client = await RedisClient.get_instance()
+        job_key = cls._job_key(job_id)
+        guid = await redis_client.hget(job_key, "guid")
+
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(job_key, mapping={"status": job_status, "finished_at": time.time()})
+            if error:
+                pipe.hset(job_key, "error", error)
+            pipe.expire(job_key, INIT_JOB_RETENTION_SECONDS)
+            pipe.delete(cls._done_key(job_id))
+            pipe.srem(cls.PENDING_KEY, job_id)
+            await pipe.execute()
+
+        active_key = f"{cls.ACTIVE_PREFIX}{guid}"
+        if guid and await redis_client.get(active_key) == job_id:
+            await redis_client.delete(active_key)
+
+    @classmethod
+    async def start_job_resumer(cls):
+        """Pick up unfinished jobs, including the ones left behind by a stopped worker"""
+        try:
+            while True:
+                try:
+                    redis_client = await RedisClient.get_instance()
+                    for job_id in await redis_client.smembers(cls.PENDING_KEY):
+                        cls._spawn(job_id)
+                except Exception as e:
+                    logger.error(f"Error resuming initialization jobs: {str(e)}")
+
+                await asyncio.sleep(INIT_JOB_RESUME_INTERVAL)
+        finally:
+            tasks = list(cls._running.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+from app.redis_client import RedisClient
+from app.config import LEADER_LEASE_SECONDS, LEADER_RENEW_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """
+    Redis lease-based leader election.
+
+    Every process competes for one lock key holding its instance ID. The holder
+    renews the lease every LEADER_RENEW_INTERVAL seconds and runs the leader-only
+    work; if it dies, the lease expires after LEADER_LEASE_SECONDS and a standby
+    takes over on its next attempt.
+    """
+
+    LEADER_KEY = "kxy:id:leader:scanner"
+
+    instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    _is_leader = False
+
+    @classmethod
+    def is_leader(cls) -> bool:
+        return cls._is_leader
+
+    @classmethod
+    async def run(cls, leader_work: Callable[[], Awaitable]):
+        """Take part in the election forever; run `leader_work` while this process is the leader"""
+        task: Optional[asyncio.Task] = None
+        last_renewed = 0.0
+
+        try:
+            while True:
+                try:
+                    if cls._is_leader:
+                        if await RedisClient.renew_lock(cls.LEADER_KEY, cls.instance_id, LEADER_LEASE_SECONDS):
+                            last_renewed = time.monotonic()
+                        else:
+                            logger.warning(f"Lost leadership ({cls.instance_id})")
+                            task = await cls._step_down(task)
+                    else:
+                        if await RedisClient.acquire_lock(cls.LEADER_KEY, LEADER_LEASE_SECONDS, lock_value=cls.instance_id):
+                            logger.info(f"Elected leader ({cls.instance_id})")
+                            cls._is_leader = True
+                            last_renewed = time.monotonic()
+                            task = asyncio.create_task(leader_work())
+                except Exception as e:
+                    logger.error(f"Error in leader election: {str(e)}")
+                    # Without a successful renewal we cannot know whether the lease is still ours
+                    if cls._is_leader and time.monotonic() - last_renewed >= LEADER_LEASE_SECONDS:
+                        logger.warning(f"Lease could not be renewed, stepping down ({cls.instance_id})")
+                        task = await cls._step_down(task)
+
+                await asyncio.sleep(LEADER_RENEW_INTERVAL)
+        finally:
+            await cls._step_down(task)
+            try:
+                await RedisClient.release_lock(cls.LEADER_KEY, cls.instance_id)
+            except Exception as e:
+                logger.error(f"Error releasing leadership: {str(e)}")
+
+    @classmethod
+    async def _step_down(cls, task: Optional[asyncio.Task]) -> None:
+        cls._is_leader = False
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"Leader task failed: {str(e)}")
+        return None
+
+    @classmethod
+    async def get_status(cls) -> dict:
+        """Current leader and remaining lease, as seen from Redis"""
+        redis_client = await RedisClient.get_instance()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(cls.LEADER_KEY)
+            pipe.pttl(cls.LEADER_KEY)
+            leader, ttl_ms = await pipe.execute()
+
+        return {
+            "leader": leader,
+            "lease_expires_in_ms": ttl_ms if ttl_ms and ttl_ms > 0 else None,
+            "instance_id": cls.instance_id,
+            "is_leader": cls._is_leader
+        }
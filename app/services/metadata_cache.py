@@ -0,0 +1,40 @@
+from typing import List
+from app.config import METADATA_CACHE_MAX_SIZE, METADATA_CACHE_TTL
+from app.models.database import DatabaseConfig
+from app.services.connector_pool import DbConnectorPool, config_fingerprint
+from app.utils.ttl_cache import TTLCache
+
+
+class MetadataCache:
+    """
+    Per-worker cache of the database list of each config, in front of DbConnector.get_databases().
+
+    The scanner lists every config's databases on each pass and initialization jobs list
+    them again whenever they run or resume, while the list itself rarely changes. Entries
+    are keyed by (config guid, connection fingerprint), expire after METADATA_CACHE_TTL
+    seconds, and are dropped early when the config changes, when a listed database fails
+    to scan, or before a forced scan or a new initialization job, so a database created
+    since is picked up without waiting for the TTL.
+    """
+
+    _cache = TTLCache(max_size=METADATA_CACHE_MAX_SIZE, ttl=METADATA_CACHE_TTL)
+
+    @classmethod
+    async def get_databases(cls, config: DatabaseConfig) -> List[str]:
+        """Databases on the server of a config, before the config's database filter"""
+        key = (config.guid, config_fingerprint(config), "databases")
+        databases = cls._cache.get(key)
+        if databases is None:
+            async with DbConnectorPool.acquire(config, background=True) as connector:
+                databases = tuple(await connector.get_databases())
+            cls._cache.set(key, databases)
+        return list(databases)
+
+    @classmethod
+    def invalidate(cls, guid: str) -> int:
+        """Drop the cached metadata of a config"""
+        return cls._cache.invalidate((guid,))
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        return cls._cache.stats()
@@ -1,9 +1,22 @@
 import asyncio
 import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
 from app.redis_client import RedisClient
+from app.config import (
+    SCANNER_MAX_CONCURRENCY, SCANNER_PER_HOST_CONCURRENCY, SCANNER_CONFIG_TIMEOUT, SCANNER_REDIS_BATCH_SIZE,
+    SCANNER_FULL_RESCAN_INTERVAL, SCANNER_DEFAULT_INTERVAL, SCANNER_JITTER_RATIO, SCANNER_TICK_SECONDS
+)
 from app.services.db_config_service import DbConfigService
-from app.services.db_connector import DbConnectorFactory
-from app.models.database import DiscoveredTable
+from app.services.connector_pool import DbConnectorPool
+from app.services.metadata_cache import MetadataCache
+from app.services.segment_store import SegmentStore
+from app.models.database import DatabaseConfig, DiscoveredTable
+from app.models.scanner import ConfigScanResult, ScanReport, ScanSchedule
+from app.utils.name_filter import NameFilter
 
 logger = logging.getLogger(__name__)
 
@@ -11,67 +24,386 @@ logger = logging.getLogger(__name__)
 class ScannerService:
     """Background service to scan databases for new tables"""
 
-    SEGMENT_PREFIX = "kxy:id:segment:"
-    DISCOVERED_PREFIX = "kxy:id:discovered_tables:"
+    FAILURE_PREFIX = "kxy:id:failure:"
+    DISCOVERED_PREFIX = "kxy:id:discovered:"
+    FINGERPRINT_PREFIX = "kxy:id:scanner:fingerprint:"
+    SCHEDULE_KEY = "kxy:id:scanner:schedule"
+    LOCK_PREFIX = "kxy:id:lock:scan:"
+
+    _global_limit: Optional[asyncio.Semaphore] = None
+    _host_limits: Dict[str, asyncio.Semaphore] = {}
+    _scheduled_tasks: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    @asynccontextmanager
+    async def _limits(cls, config: DatabaseConfig):
+        """Hold one per-host slot and one global slot while talking to a database server"""
+        if cls._global_limit is None:
+            cls._global_limit = asyncio.Semaphore(SCANNER_MAX_CONCURRENCY)
+        host = config.db_address.split(":")[0].lower()
+        host_limit = cls._host_limits.setdefault(host, asyncio.Semaphore(SCANNER_PER_HOST_CONCURRENCY))
+
+        async with host_limit:
+            async with cls._global_limit:
+                yield
+
+    @classmethod
+    async def get_last_report(cls) -> Optional[ScanReport]:
+        """Report of the most recent scan of every config, from the persisted schedules"""
+        scanned = [schedule for schedule in await cls.get_schedules() if schedule.last_result and schedule.last_run_at]
+        if not scanned:
+            return None
+
+        started_at = min(schedule.last_run_at for schedule in scanned)
+        finished_at = max(schedule.last_run_at + schedule.last_result.duration_ms / 1000 for schedule in scanned)
+        return ScanReport(
+            started_at=started_at,
+            duration_ms=round((finished_at - started_at) * 1000, 3),
+            configs=[schedule.last_result for schedule in scanned]
+        )
 
     @classmethod
-    async def scan_all_databases(cls):
+    async def scan_config(cls, config: DatabaseConfig, force: bool = False) -> ConfigScanResult:
         """
-        Scan all configured databases for new tables.
-        Stores discovered tables in Redis for manual approval.
+        Scan one database config, bounded by SCANNER_CONFIG_TIMEOUT.
+
+        New tables are stored in Redis for manual approval, or their counters are seeded
+        directly when the config's auto-provision policy covers them. The config's databases
+        are scanned concurrently under SCANNER_MAX_CONCURRENCY (global) and
+        SCANNER_PER_HOST_CONCURRENCY (per host); databases whose schema fingerprint is
+        unchanged are skipped unless force is set.
         """
+        result = ConfigScanResult(guid=config.guid, system_code=config.system_code, status="ok", duration_ms=0)
+        start = time.perf_counter()
+
         try:
-            configs = await DbConfigService.get_database_list()
-            redis_client = await RedisClient.get_instance()
+            await asyncio.wait_for(cls._scan_config(config, result, force), timeout=SCANNER_CONFIG_TIMEOUT)
+        except asyncio.TimeoutError:
+            result.status = "timeout"
+            result.error = f"Scan timed out after {SCANNER_CONFIG_TIMEOUT} seconds"
+            logger.error(f"Timed out scanning database config {config.guid}")
+        except Exception as e:
+            result.status = "error"
+            result.error = str(e)
+            logger.error(f"Error scanning database config {config.guid}: {str(e)}")
+
+        result.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        return result
+
+    @classmethod
+    async def _scan_config(cls, config: DatabaseConfig, result: ConfigScanResult, force: bool):
+        await DbConfigService.migrate_legacy_discovered(config)
+        if force:
+            # A forced scan also picks up databases created within the cache TTL
+            MetadataCache.invalidate(config.guid)
+        async with cls._limits(config):
+            databases = DbConfigService.database_filter(config).filter(await MetadataCache.get_databases(config))
+
+        result.databases = len(databases)
+        outcomes = await asyncio.gather(
+            *(cls.scan_database(config, database, force) for database in databases),
+            return_exceptions=True
+        )
+
+        for database, outcome in zip(databases, outcomes):
+            if isinstance(outcome, BaseException):
+                result.failed_databases += 1
+                result.error = result.error or f"{database}: {str(outcome)}"
+                logger.error(f"Error scanning database {database} of config {config.guid}: {str(outcome)}")
+            elif outcome is None:
+                result.skipped_databases += 1
+            else:
+                discovered, provisioned = outcome
+                result.discovered += discovered
+                result.provisioned += provisioned
+
+        if result.failed_databases:
+            # A database may have been dropped, list them again on the next pass
+            MetadataCache.invalidate(config.guid)
+            result.status = "error" if result.failed_databases == result.databases else "partial"
+
+    @classmethod
+    async def scan_database(cls, config: DatabaseConfig, database: str, force: bool = False) -> Optional[Tuple[int, int]]:
+        """
+        Scan one database for new tables.
+
+        Returns (newly discovered, auto-provisioned) table counts, or None when the database
+        was skipped because its schema fingerprint has not changed since the last scan.
+        """
+        redis_client = await RedisClient.get_instance()
+        fingerprint_key = f"{cls.FINGERPRINT_PREFIX}{config.guid}"
 
-            for config in configs:
+        async with cls._limits(config):
+            async with DbConnectorPool.acquire(config, background=True) as connector:
+                fingerprint = await connector.get_schema_fingerprint(database)
+                if fingerprint and not force:
+                    stored = await redis_client.hget(fingerprint_key, database)
+                    if stored and cls._fingerprint_is_fresh(stored, fingerprint):
+                        return None
+
+                # The catalog is read one keyset-paged batch at a time, and the connection is free
+                # between batches: each batch is diffed against Redis, its new tables looked up on
+                # this connection and recorded before the next batch is read. Memory stays at one
+                # batch, and a scan holds a single pooled connection.
+                table_filter = DbConfigService.table_filter(config)
+                provision_filter = DbConfigService.provision_filter(config)
+                discovered = provisioned = 0
+                batches = connector.iter_numeric_primary_keys(database, SCANNER_REDIS_BATCH_SIZE)
                 try:
-                    connector = DbConnectorFactory.create(config)
+                    async for batch in batches:
+                        # Excluded tables are dropped before any per-table query
+                        batch = [primary_key for primary_key in batch if table_filter.matches(primary_key.table)]
+                        if not batch:
+                            continue
+                        lookups = await cls._diff_batch(config, database, batch, provision_filter)
+                        if lookups:
+                            found, seeded = await cls._discover_batch(config, database, lookups, connector)
+                            discovered += found
+                            provisioned += seeded
+                finally:
+                    await batches.aclose()
 
-                    databases = await connector.get_databases()
+        if fingerprint:
+            await redis_client.hset(fingerprint_key, database, f"{fingerprint}:{int(time.time())}")
 
-                    for database in databases:
-                        tables = await connector.get_tables(database)
+        return discovered, provisioned
 
-                        for table in tables:
-                            primary_key = await connector.get_primary_key(database, table)
+    @classmethod
+    def _fingerprint_is_fresh(cls, stored: str, fingerprint: str) -> bool:
+        """Stored value is '<fingerprint>:<scanned at>'; a full rescan is due after SCANNER_FULL_RESCAN_INTERVAL"""
+        stored_fingerprint, _, scanned_at = stored.rpartition(":")
+        if stored_fingerprint != fingerprint:
+            return False
+        return time.time() - int(scanned_at or 0) < SCANNER_FULL_RESCAN_INTERVAL
 
-                            if primary_key:
-                                segment_key = f"{config.system_code}:{database}:{table}:{primary_key}".lower()
-                                redis_key = f"{cls.SEGMENT_PREFIX}{segment_key}"
+    @classmethod
+    async def _diff_batch(
+        cls, config: DatabaseConfig, database: str, primary_keys: list, provision_filter: Optional[NameFilter] = None
+    ) -> List[Tuple[str, str, str, bool]]:
+        """
+        Diff a batch of tables against Redis in one round trip (no database queries).
 
-                                exists = await redis_client.exists(redis_key)
+        Pending discoveries whose counter now exists are dropped. Returns (table, primary key,
+        segment key, provision) for every table that needs a max ID lookup: new tables, and
+        pending ones matched by the config's auto-provision policy (including ones discovered
+        before the policy was set).
+        """
+        redis_client = await RedisClient.get_instance()
+        discovered_key = f"{cls.DISCOVERED_PREFIX}{config.guid}"
 
-                                if not exists:
-                                    max_id = await connector.get_max_id(database, table, primary_key)
+        segment_keys = [
+            f"{config.system_code}:{database}:{table}:{primary_key}".lower()
+            for table, primary_key, _data_type in primary_keys
+        ]
 
-                                    discovered_table = DiscoveredTable(
-                                        database=database,
-                                        table=table,
-                                        primary_key=primary_key,
-                                        max_id=max_id
-                                    )
+        async with redis_client.pipeline(transaction=False) as pipe:
+            SegmentStore.queue_load(pipe, segment_keys)
+            for segment_key in segment_keys:
+                pipe.hexists(discovered_key, segment_key)
+            results = await pipe.execute()
+        exists_flags, pending_flags = results[0], results[1:]
 
-                                    discovered_key = f"{cls.DISCOVERED_PREFIX}{config.guid}"
-                                    await redis_client.sadd(discovered_key, discovered_table.model_dump_json())
+        # Max ID lookup only for tables that have neither a segment nor a pending discovery
+        lookups = []
+        initialized = []
+        for (table, primary_key, _data_type), segment_key, exists, pending in zip(
+            primary_keys, segment_keys, exists_flags, pending_flags
+        ):
+            provision = provision_filter is not None and provision_filter.matches(table)
+            if exists:
+                if pending:
+                    # Initialized since it was discovered (job, allocate or approval elsewhere)
+                    initialized.append(segment_key)
+                continue
+            if pending and not provision:
+                continue
+            lookups.append((table, primary_key, segment_key, provision))
 
-                                    logger.info(f"Discovered new table: {segment_key} with max_id={max_id}")
+        if initialized:
+            await redis_client.hdel(discovered_key, *initialized)
 
-                    await connector.close()
+        return lookups
 
-                except Exception as e:
-                    logger.error(f"Error scanning database config {config.guid}: {str(e)}")
+    @classmethod
+    async def _discover_batch(
+        cls, config: DatabaseConfig, database: str, lookups: List[Tuple[str, str, str, bool]], connector
+    ) -> Tuple[int, int]:
+        """
+        Look up the max IDs of tables returned by _diff_batch and record them in one round trip.
 
-        except Exception as e:
-            logger.error(f"Error in scan_all_databases: {str(e)}")
+        Discovered tables live in a hash keyed by segment key, so a table is stored once no
+        matter how often it is scanned. Tables matched by the auto-provision policy get their
+        counter seeded right away instead, so the first allocate for them takes the warm path.
+        Returns (discovered, provisioned).
+        """
+        redis_client = await RedisClient.get_instance()
+        discovered_key = f"{cls.DISCOVERED_PREFIX}{config.guid}"
+
+        new_tables = []
+        seeds = []
+        for table, primary_key, segment_key, provision in lookups:
+            max_id, method = await connector.resolve_max_id(database, table, primary_key)
+            if provision and max_id is not None:
+                seeds.append((segment_key, max_id))
+                logger.info(f"Auto-provisioned new table: {segment_key} with max_id={max_id} ({method})")
+                continue
+            new_tables.append((segment_key, DiscoveredTable(
+                database=database,
+                table=table,
+                primary_key=primary_key,
+                max_id=max_id,
+                max_id_method=method,
+                segment_key=segment_key,
+                discovered_at=time.time()
+            )))
+            logger.info(f"Discovered new table: {segment_key} with max_id={max_id} ({method})")
+
+        if new_tables:
+            await redis_client.hset(discovered_key, mapping={
+                segment_key: table.model_dump_json() for segment_key, table in new_tables
+            })
+
+        if seeds:
+            # Raise-only, and drop any "table does not exist" marker left by an earlier allocate
+            await DbConfigService.seed_segments(seeds)
+            seeded_keys = [segment_key for segment_key, _max_id in seeds]
+            await redis_client.delete(*(f"{cls.FAILURE_PREFIX}{segment_key}" for segment_key in seeded_keys))
+            await redis_client.hdel(discovered_key, *seeded_keys)
+
+        return len(new_tables), len(seeds)
+
+    @classmethod
+    def _scan_interval(cls, config: DatabaseConfig) -> int:
+        return config.scan_interval or SCANNER_DEFAULT_INTERVAL
+
+    @classmethod
+    def _next_run_at(cls, config: DatabaseConfig, now: float) -> float:
+        """Next due time with random jitter so scans of many configs spread out over time"""
+        interval = cls._scan_interval(config)
+        jitter = interval * SCANNER_JITTER_RATIO
+        return now + interval + random.uniform(-jitter, jitter)
+
+    @classmethod
+    async def _load_schedule(cls, config: DatabaseConfig, schedule_json: Optional[str] = None) -> ScanSchedule:
+        if schedule_json is None:
+            redis_client = await RedisClient.get_instance()
+            schedule_json = await redis_client.hget(cls.SCHEDULE_KEY, config.guid)
+
+        if schedule_json:
+            schedule = ScanSchedule.model_validate_json(schedule_json)
+        else:
+            schedule = ScanSchedule(guid=config.guid, system_code=config.system_code, interval=0)
+
+        schedule.system_code = config.system_code
+        schedule.interval = cls._scan_interval(config)
+        return schedule
+
+    @classmethod
+    async def _save_schedule(cls, schedule: ScanSchedule):
+        redis_client = await RedisClient.get_instance()
+        await redis_client.hset(cls.SCHEDULE_KEY, schedule.guid, schedule.model_dump_json())
+
+    @classmethod
+    async def get_schedules(cls) -> List[ScanSchedule]:
+        """Get the persisted scan schedule of every config"""
+        redis_client = await RedisClient.get_instance()
+        configs = await DbConfigService.get_database_list()
+        states = await redis_client.hgetall(cls.SCHEDULE_KEY)
+
+        return [await cls._load_schedule(config, states.get(config.guid, "")) for config in configs]
+
+    @classmethod
+    async def trigger_config_scan(cls, guid: str, force: bool = False) -> ScanSchedule:
+        """Mark a config as due now; the scheduler picks it up on its next tick"""
+        config = await DbConfigService.get_database(guid)
+        if not config:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Database config with guid {guid} not found"
+            )
+
+        return await cls._mark_due(config, force)
+
+    @classmethod
+    async def trigger_all_scans(cls, force: bool = False) -> List[ScanSchedule]:
+        """
+        Mark every config as due now. Scans only ever run on the scanner leader, so a
+        trigger received by any worker is picked up by the leader on its next tick.
+        """
+        return [await cls._mark_due(config, force) for config in await DbConfigService.get_database_list()]
+
+    @classmethod
+    async def _mark_due(cls, config: DatabaseConfig, force: bool) -> ScanSchedule:
+        schedule = await cls._load_schedule(config)
+        schedule.next_run_at = time.time()
+        schedule.force_next = schedule.force_next or force
+        await cls._save_schedule(schedule)
+        return schedule
+
+    @classmethod
+    async def run_config_scan(cls, config: DatabaseConfig, force: bool = False) -> ConfigScanResult:
+        """
+        Scan one config under a cross-process lock and persist its schedule state.
+        Returns a 'busy' result if another process is already scanning the config.
+        """
+        lock_key = f"{cls.LOCK_PREFIX}{config.guid}"
+        lock_value = await RedisClient.acquire_lock(lock_key, timeout=SCANNER_CONFIG_TIMEOUT + 60)
+        if not lock_value:
+            return ConfigScanResult(
+                guid=config.guid, system_code=config.system_code, status="busy", duration_ms=0,
+                error="Another process is scanning this config"
+            )
+
+        try:
+            schedule = await cls._load_schedule(config)
+            due_at = schedule.next_run_at
+            started_at = time.time()
+
+            result = await cls.scan_config(config, force=force or schedule.force_next)
+
+            # Keep a trigger that arrived while the scan was running
+            schedule = await cls._load_schedule(config)
+            triggered = schedule.next_run_at is not None and schedule.next_run_at != due_at
+            schedule.last_run_at = started_at
+            schedule.last_result = result
+            if not triggered:
+                schedule.next_run_at = cls._next_run_at(config, time.time())
+                schedule.force_next = False
+            await cls._save_schedule(schedule)
+            return result
+        finally:
+            await RedisClient.release_lock(lock_key, lock_value)
+
+    @classmethod
+    async def _run_due_scans(cls):
+        """Start a scan for every config whose next run is due and is not already being scanned here"""
+        redis_client = await RedisClient.get_instance()
+        now = time.time()
+        configs = await DbConfigService.get_database_list()
+        states = await redis_client.hgetall(cls.SCHEDULE_KEY)
+
+        for guid in [guid for guid, task in cls._scheduled_tasks.items() if task.done()]:
+            del cls._scheduled_tasks[guid]
+
+        for config in configs:
+            if config.guid in cls._scheduled_tasks:
+                continue
+            schedule = await cls._load_schedule(config, states.get(config.guid, ""))
+            if schedule.next_run_at is None or schedule.next_run_at <= now:
+                cls._scheduled_tasks[config.guid] = asyncio.create_task(cls.run_config_scan(config))
 
     @classmethod
     async def start_background_scanner(cls):
-        """Start the background scanner task"""
-        while True:
-            try:
-                await cls.scan_all_databases()
-            except Exception as e:
-                logger.error(f"Error in background scanner: {str(e)}")
-
-            await asyncio.sleep(36000)
+        """Run the scan scheduler: every SCANNER_TICK_SECONDS, scan the configs that are due"""
+        try:
+            while True:
+                try:
+                    await cls._run_due_scans()
+                except Exception as e:
+                    logger.error(f"Error in background scanner: {str(e)}")
+
+                await asyncio.sleep(SCANNER_TICK_SECONDS)
+        finally:
+            for task in cls._scheduled_tasks.values():
+                task.cancel()
+            cls._scheduled_tasks.clear()
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from typing import Dict
+from app.redis_client import RedisClient
+from app.services.segment_store import SegmentStore
+from app.config import (
+    SEGMENT_ARCHIVE_IDLE_SECONDS, SEGMENT_ARCHIVE_INTERVAL, SEGMENT_ARCHIVE_BATCH_SIZE,
+    SEGMENT_ACTIVITY_FLUSH_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SegmentArchiveService:
+    """
+    Moves segment counters that have not been allocated for SEGMENT_ARCHIVE_IDLE_SECONDS
+    out of the live layout, so Redis memory follows the active key set.
+
+    Each worker notes the last allocation time of its keys in process and periodically
+    writes them to the SegmentStore.ACTIVITY_KEY sorted set in one pipeline. The leader
+    walks the sorted set from the oldest entry and archives idle counters in batches; an
+    archived counter is restored by the next allocation (see SegmentStore).
+    """
+
+    STATS_KEY = "kxy:id:segment_archive_stats"
+    FLUSH_BATCH_SIZE = 1000
+
+    _last_used: Dict[str, int] = {}
+
+    @classmethod
+    def record(cls, segment_key: str):
+        """Record an allocation of a key (in-process, no I/O)"""
+        cls._last_used[segment_key] = int(time.time())
+
+    @classmethod
+    async def flush(cls):
+        """Write the recorded allocation times to the activity index; times only ever move forward"""
+        last_used = cls._last_used
+        cls._last_used = {}
+        if not last_used:
+            return
+
+        redis_client = await RedisClient.get_instance()
+        entries = list(last_used.items())
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for offset in range(0, len(entries), cls.FLUSH_BATCH_SIZE):
+                pipe.zadd(SegmentStore.ACTIVITY_KEY, dict(entries[offset:offset + cls.FLUSH_BATCH_SIZE]), gt=True)
+            await pipe.execute()
+
+    @classmethod
+    async def archive_idle(cls, idle_seconds: int = SEGMENT_ARCHIVE_IDLE_SECONDS) -> dict:
+        """Archive every counter last allocated more than `idle_seconds` ago; returns the run summary"""
+        redis_client = await RedisClient.get_instance()
+        started = time.time()
+        cutoff = int(started) - idle_seconds
+
+        # Times recorded by this worker must not be older in Redis than they really are
+        await cls.flush()
+
+        examined = archived = 0
+        while True:
+            segment_keys = await redis_client.zrangebyscore(
+                SegmentStore.ACTIVITY_KEY, "-inf", cutoff, start=0, num=SEGMENT_ARCHIVE_BATCH_SIZE
+            )
+            if not segment_keys:
+                break
+            # The script drops every examined key from the index, so the next range moves on
+            async with redis_client.pipeline(transaction=False) as pipe:
+                SegmentStore.queue_archive(pipe, segment_keys, cutoff)
+                count, = await pipe.execute()
+            examined += len(segment_keys)
+            archived += count
+
+        summary = {
+            "last_run_at": int(started),
+            "last_cutoff": cutoff,
+            "last_examined": examined,
+            "last_archived": archived,
+            "last_duration_ms": round((time.time() - started) * 1000, 1)
+        }
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(cls.STATS_KEY, mapping=summary)
+            pipe.hincrby(cls.STATS_KEY, "total_archived", archived)
+            await pipe.execute()
+
+        logger.info(f"Archived {archived} idle segment counters ({examined} examined)")
+        return summary
+
+    @classmethod
+    async def get_stats(cls) -> dict:
+        """Archival settings, the last run and the number of live counters in the activity index"""
+        redis_client = await RedisClient.get_instance()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(cls.STATS_KEY)
+            pipe.zcard(SegmentStore.ACTIVITY_KEY)
+            stats, tracked = await pipe.execute()
+
+        return {
+            "enabled": SEGMENT_ARCHIVE_IDLE_SECONDS > 0,
+            "idle_seconds": SEGMENT_ARCHIVE_IDLE_SECONDS,
+            "interval_seconds": SEGMENT_ARCHIVE_INTERVAL,
+            "tracked_counters": tracked,
+            "pending_activity": len(cls._last_used),
+            **{name: float(value) if name == "last_duration_ms" else int(value) for name, value in stats.items()}
+        }
+
+    @classmethod
+    async def start_activity_flusher(cls):
+        """Periodically flush the recorded allocation times to Redis"""
+        while True:
+            await asyncio.sleep(SEGMENT_ACTIVITY_FLUSH_INTERVAL)
+            try:
+                await cls.flush()
+            except Exception as e:
+                logger.error(f"Error flushing segment activity: {str(e)}")
+
+    @classmethod
+    async def start_archiver(cls):
+        """Periodically archive idle counters (leader only)"""
+        if SEGMENT_ARCHIVE_IDLE_SECONDS <= 0:
+            logger.info("Segment archival disabled")
+            return
+
+        while True:
+            try:
+                await cls.archive_idle()
+            except Exception as e:
+                logger.error(f"Error archiving idle segments: {str(e)}")
+            await asyncio.sleep(SEGMENT_ARCHIVE_INTERVAL)
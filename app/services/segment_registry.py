@@ -0,0 +1,112 @@
+import logging
+import time
+from collections import defaultdict
+from typing import Iterable, Optional
+from app.redis_client import RedisClient
+from app.services.segment_store import SegmentStore
+
+logger = logging.getLogger(__name__)
+
+
+class SegmentRegistry:
+    """
+    Per-system index of segment keys, so listing and deleting the counters of a system
+    never has to SCAN the whole Redis keyspace.
+
+    Every place that creates a counter registers its segment key in the same pipeline.
+    Counters created before the index existed are picked up by `reindex()`, which does
+    one keyspace SCAN and marks the index complete; until then deletions fall back to
+    the SCAN they always used.
+    """
+
+    INDEX_PREFIX = "kxy:id:segment_index:"
+    READY_KEY = "kxy:id:segment_index:ready"
+    UNLINK_BATCH_SIZE = 500
+
+    @classmethod
+    def index_key(cls, system_code: str) -> str:
+        return f"{cls.INDEX_PREFIX}{system_code.lower()}"
+
+    @classmethod
+    def register(cls, pipe, segment_keys: Iterable[str]):
+        """
+        Queue SADDs of the segment keys to their system's index on a pipeline, and start
+        their idle time for archival unless they already have one
+        """
+        by_system = defaultdict(list)
+        for segment_key in segment_keys:
+            by_system[segment_key.split(":", 1)[0]].append(segment_key)
+        now = int(time.time())
+        for system_code, keys in by_system.items():
+            pipe.sadd(cls.index_key(system_code), *keys)
+            pipe.zadd(SegmentStore.ACTIVITY_KEY, {key: now for key in keys}, nx=True)
+
+    @classmethod
+    async def delete_system(cls, system_code: str) -> int:
+        """Remove every counter of a system in batches, then the index itself; returns the number of counters"""
+        redis_client = await RedisClient.get_instance()
+        index_key = cls.index_key(system_code)
+
+        if await redis_client.exists(cls.READY_KEY):
+            keys = redis_client.sscan_iter(index_key, count=cls.UNLINK_BATCH_SIZE)
+        else:
+            keys = SegmentStore.scan_segment_keys(system_code)
+
+        # Collect first: deleting while SSCAN/SCAN is still iterating may revisit keys
+        segment_keys = list({segment_key async for segment_key in keys})
+
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for offset in range(0, len(segment_keys), cls.UNLINK_BATCH_SIZE):
+                SegmentStore.queue_delete(pipe, segment_keys[offset:offset + cls.UNLINK_BATCH_SIZE])
+            pipe.unlink(index_key)
+            await pipe.execute()
+
+        return len(segment_keys)
+
+    @classmethod
+    async def list_segments(cls, system_code: str, cursor: int = 0, count: int = 100) -> dict:
+        """One page of a system's segment keys (SSCAN cursor pagination) with their current values"""
+        redis_client = await RedisClient.get_instance()
+        next_cursor, segment_keys = await redis_client.sscan(cls.index_key(system_code), cursor=cursor, count=count)
+        segment_keys = sorted(segment_keys)
+        values = await SegmentStore.get_many(segment_keys)
+
+        return {
+            "system_code": system_code.lower(),
+            "segments": [
+                {"segment_key": segment_key, "value": value}
+                for segment_key, value in zip(segment_keys, values)
+            ],
+            "cursor": next_cursor,
+            "total": await redis_client.scard(cls.index_key(system_code)),
+            "index_ready": bool(await redis_client.exists(cls.READY_KEY))
+        }
+
+    @classmethod
+    async def reindex(cls, system_code: Optional[str] = None) -> int:
+        """Rebuild the index from one keyspace SCAN (all systems unless one is given); returns the number of keys indexed"""
+        redis_client = await RedisClient.get_instance()
+
+        indexed = 0
+        batch = []
+        async for segment_key in SegmentStore.scan_segment_keys(system_code):
+            batch.append(segment_key)
+            if len(batch) >= 1000:
+                indexed += await cls._register_now(batch)
+                batch = []
+        indexed += await cls._register_now(batch)
+
+        if not system_code:
+            await redis_client.set(cls.READY_KEY, "1")
+        logger.info(f"Segment index rebuilt: {indexed} keys")
+        return indexed
+
+    @classmethod
+    async def _register_now(cls, segment_keys: list) -> int:
+        if not segment_keys:
+            return 0
+        redis_client = await RedisClient.get_instance()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            cls.register(pipe, segment_keys)
+            await pipe.execute()
+        return len(segment_keys)
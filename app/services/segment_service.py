@@ -1,14 +1,20 @@
 from fastapi import HTTPException, status
 import asyncio
+from typing import Optional
 from app.redis_client import RedisClient
 from app.models.database import SegmentResponse
 from app.services.db_config_service import DbConfigService
+from app.services.hot_key_service import HotKeyService
+from app.services.segment_archive_service import SegmentArchiveService
+from app.services.segment_store import SegmentStore
+from app.utils.trace import RequestTrace
 
 
 class SegmentService:
-    SEGMENT_PREFIX = "kxy:id:segment:"
     FAILURE_PREFIX = "kxy:id:failure:"
     LOCK_PREFIX = "kxy:id:lock:segment:"
+    # Renewed by a watchdog while the field is being initialized, so a slow MAX() keeps the lock
+    INIT_LOCK_TIMEOUT = 10
 
     @classmethod
     async def allocate_segment(
@@ -17,30 +23,42 @@ class SegmentService:
         db_name: str,
         table_name: str,
         field_name: str,
-        segment_count: int = 10000
+        segment_count: int = 10000,
+        trace: Optional[RequestTrace] = None
     ) -> SegmentResponse:
         """
-        Allocate a segment of IDs atomically using Redis INCRBY.
-        Returns the start and end of the allocated segment.
+        Allocate a segment of IDs atomically using Redis INCRBY (HINCRBY in the hash layout),
+        applied only if the counter exists. Returns the start and end of the allocated segment.
 
         If the segment cache doesn't exist:
         1. Check for failure marker (table doesn't exist)
-        2. Try to find database config and initialize the field
-        3. If table exists, initialize cache and allocate segment
-        4. If table doesn't exist, set failure marker (1 minute TTL) and return error
+        2. Restore the counter if it was archived or is still in the other layout
+        3. Otherwise find the database config and initialize the field
+        4. If table exists, initialize cache and allocate segment
+        5. If table doesn't exist, set failure marker (1 minute TTL) and return error
+
+        When a trace is given, each stage is recorded as a timed span on it.
         """
+        if trace is None:
+            trace = RequestTrace("allocate")
+
         redis_client = await RedisClient.get_instance()
 
         segment_key = f"{system_code}:{db_name}:{table_name}:{field_name}".lower()
-        redis_key = f"{cls.SEGMENT_PREFIX}{segment_key}"
         failure_key = f"{cls.FAILURE_PREFIX}{segment_key}"
         lock_key = f"{cls.LOCK_PREFIX}{segment_key}"
 
-        # Check if segment cache exists
-        exists = await redis_client.exists(redis_key)
-        if not exists:
+        trace.attributes["segment_key"] = segment_key
+
+        # Allocate from the segment cache if it exists
+        with trace.span("increment"):
+            new_max = await SegmentStore.incrby_existing(segment_key, segment_count)
+        if new_max is None:
+            trace.attributes["path"] = "cold"
+
             # Check if there's a failure marker (table doesn't exist)
-            failure_marker = await redis_client.get(failure_key)
+            with trace.span("failure_check"):
+                failure_marker = await redis_client.get(failure_key)
             if failure_marker:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -53,19 +71,22 @@ class SegmentService:
             lock_value = None
 
             for attempt in range(max_retries):
-                lock_value = await RedisClient.acquire_lock(lock_key, timeout=10)
+                with trace.span("lock_acquire"):
+                    lock_value = await RedisClient.acquire_lock(lock_key, timeout=cls.INIT_LOCK_TIMEOUT)
 
                 if lock_value:
                     # Lock acquired, proceed with initialization
                     try:
-                        # Double-check: cache might have been initialized by another process
-                        exists = await redis_client.exists(redis_key)
+                        # Double-check: cache might have been initialized by another process,
+                        # or only needs restoring from the archive / the other layout
+                        exists = await SegmentStore.exists(segment_key)
                         if exists:
                             # Cache was initialized by another process, skip initialization
                             break
 
                         # Try to find database configuration
-                        db_config = await DbConfigService.find_database_by_system_and_db(system_code, db_name)
+                        with trace.span("config_lookup"):
+                            db_config = await DbConfigService.find_database_by_system_and_db(system_code, db_name)
                         if not db_config:
                             raise HTTPException(
                                 status_code=status.HTTP_404_NOT_FOUND,
@@ -73,7 +94,9 @@ class SegmentService:
                             )
 
                         # Try to initialize the field
-                        max_id = await DbConfigService.initialize_single_field(db_config, db_name, table_name, field_name)
+                        with trace.span("initialize_single_field"):
+                            async with RedisClient.keep_lock_alive(lock_key, lock_value, cls.INIT_LOCK_TIMEOUT):
+                                max_id = await DbConfigService.initialize_single_field(db_config, db_name, table_name, field_name)
                         if max_id is None:
                             # Table or field doesn't exist, set failure marker with 1 minute TTL
                             await redis_client.setex(failure_key, 60, "1")
@@ -89,8 +112,9 @@ class SegmentService:
                         await RedisClient.release_lock(lock_key, lock_value)
                 else:
                     # Lock acquisition failed, wait and check if cache exists
-                    await asyncio.sleep(retry_delay)
-                    exists = await redis_client.exists(redis_key)
+                    with trace.span("lock_wait"):
+                        await asyncio.sleep(retry_delay)
+                        exists = await SegmentStore.exists(segment_key)
                     if exists:
                         # Cache was initialized by another process
                         break
@@ -102,8 +126,18 @@ class SegmentService:
                             detail=f"Failed to initialize segment cache for key: {segment_key}. System is busy, please retry later."
                         )
 
-        # Allocate segment
-        new_max = await redis_client.incrby(redis_key, segment_count)
+            # Allocate segment
+            with trace.span("increment"):
+                new_max = await SegmentStore.incrby_existing(segment_key, segment_count)
+            if new_max is None:
+                # Archived again or deleted between initialization and allocation
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Segment cache for key: {segment_key} changed during initialization. Please retry."
+                )
+
+        HotKeyService.record(segment_key, segment_count)
+        SegmentArchiveService.record(segment_key)
 
         start = new_max - segment_count + 1
         end = new_max
@@ -0,0 +1,369 @@
+import time
+import zlib
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from app.redis_client import RedisClient
+from app.config import SEGMENT_STORAGE_LAYOUT, SEGMENT_HASH_BUCKETS
+
+
+class SegmentStore:
+    """
+    Where segment counters live in Redis.
+
+    - "string" layout (default): one key per counter, kxy:id:segment:<segment key>.
+    - "hash" layout: counters of a system are spread over SEGMENT_HASH_BUCKETS hashes,
+      kxy:id:segment_hash:<system>:<crc32(rest) % buckets>, field <db>:<table>:<field>,
+      and incremented with HINCRBY. Small hashes use Redis's compact listpack encoding,
+      which removes most of the per-key overhead of millions of counters.
+    - Archive: counters idle for a long time are moved into the same kind of bucketed
+      hashes under kxy:id:segment_archive: (see SegmentArchiveService).
+
+    Allocation increments a counter only if it exists (INCR_SCRIPT), so a counter that
+    was archived or moved between two commands is never recreated from zero. Every read
+    that decides whether a counter exists (and every seed) goes through the `load` Lua
+    function, which moves a counter still stored in the other layout into the configured
+    one and restores archived counters. Switching layouts is therefore safe while the
+    service is running; migrate_segment_layout.py only speeds the move up.
+    """
+
+    LAYOUT_STRING = "string"
+    LAYOUT_HASH = "hash"
+    STRING_PREFIX = "kxy:id:segment:"
+    HASH_PREFIX = "kxy:id:segment_hash:"
+    ARCHIVE_PREFIX = "kxy:id:segment_archive:"
+    # Sorted set of segment key -> last allocation time (unix seconds)
+    ACTIVITY_KEY = "kxy:id:segment_activity"
+    # Bucket count the hash counters were written with; changing it would lose counters
+    LAYOUT_KEY = "kxy:id:segment_layout:buckets"
+    # Fixed, so archived counters are always found again whatever the hash layout uses
+    ARCHIVE_BUCKETS = 1024
+
+    layout = SEGMENT_STORAGE_LAYOUT
+    buckets = SEGMENT_HASH_BUCKETS
+
+    # KEYS[1] is the counter key (string key, or hash key with ARGV[2] as field). Returns
+    # the new value as a string, since Lua numbers are doubles and lose precision above
+    # 2^53, or nil when the counter does not exist.
+    INCR_SCRIPT = """
+    if ARGV[2] == "" then
+        if redis.call("exists", KEYS[1]) == 1 then
+            redis.call("incrby", KEYS[1], ARGV[1])
+            return redis.call("get", KEYS[1])
+        end
+    elseif redis.call("hexists", KEYS[1], ARGV[2]) == 1 then
+        redis.call("hincrby", KEYS[1], ARGV[2], ARGV[1])
+        return redis.call("hget", KEYS[1], ARGV[2])
+    end
+    return false
+    """
+
+    # Shared by the scripts below. KEYS[1] is the activity key, then (string key, hash key,
+    # archive key) per counter. ARGV[1] is the target layout, ARGV[2] "1" to restore
+    # archived counters (otherwise they are only reported) and ARGV[3] the current time.
+    _LOAD_FUNCTION = """
+    local hash_layout = ARGV[1] == "hash"
+    local restore_archived = ARGV[2] == "1"
+
+    local function put(string_key, hash_key, field, value)
+        if hash_layout then
+            redis.call("hset", hash_key, field, value)
+        else
+            redis.call("set", string_key, value)
+        end
+    end
+
+    local function load(string_key, hash_key, archive_key, field, segment_key)
+        local value
+        if hash_layout then
+            value = redis.call("hget", hash_key, field)
+            if value then return value end
+            value = redis.call("get", string_key)
+            if value then redis.call("del", string_key) end
+        else
+            value = redis.call("get", string_key)
+            if value then return value end
+            value = redis.call("hget", hash_key, field)
+            if value then redis.call("hdel", hash_key, field) end
+        end
+        if not value then
+            value = redis.call("hget", archive_key, field)
+            if not value or not restore_archived then return value end
+            redis.call("hdel", archive_key, field)
+            redis.call("zadd", KEYS[1], ARGV[3], segment_key)
+        end
+        put(string_key, hash_key, field, value)
+        return value
+    end
+    """
+
+    # ARGV[4..] are (field, segment key) pairs; returns 1/0 per counter
+    LOAD_SCRIPT = _LOAD_FUNCTION + """
+    local found = {}
+    for i = 1, (#KEYS - 1) / 3 do
+        local field, segment_key = ARGV[2 * i + 2], ARGV[2 * i + 3]
+        found[i] = load(KEYS[3 * i - 1], KEYS[3 * i], KEYS[3 * i + 1], field, segment_key) and 1 or 0
+    end
+    return found
+    """
+
+    # Raise-only seeding: counter = max(current, seed), restoring archived counters first.
+    # ARGV[4..] are (field, segment key, value) triples. Values are compared as decimal
+    # strings because Lua numbers are doubles and lose precision above 2^53.
+    SEED_SCRIPT = _LOAD_FUNCTION + """
+    local function greater(a, b)
+        local a_neg = string.sub(a, 1, 1) == "-"
+        local b_neg = string.sub(b, 1, 1) == "-"
+        if a_neg ~= b_neg then
+            return b_neg
+        end
+        if #a ~= #b then
+            if a_neg then return #a < #b end
+            return #a > #b
+        end
+        if a_neg then return a < b end
+        return a > b
+    end
+
+    local created, raised, unchanged = 0, 0, 0
+    for i = 1, (#KEYS - 1) / 3 do
+        local string_key, hash_key, archive_key = KEYS[3 * i - 1], KEYS[3 * i], KEYS[3 * i + 1]
+        local field, segment_key, seed = ARGV[3 * i + 1], ARGV[3 * i + 2], ARGV[3 * i + 3]
+        local current = load(string_key, hash_key, archive_key, field, segment_key)
+        if not current or greater(seed, current) then
+            put(string_key, hash_key, field, seed)
+            if current then raised = raised + 1 else created = created + 1 end
+        else
+            unchanged = unchanged + 1
+        end
+    end
+    return {created, raised, unchanged}
+    """
+
+    # Archive counters not allocated since ARGV[2] (the cutoff). KEYS as above, ARGV[3..]
+    # are (field, segment key) pairs. Returns the number of counters archived.
+    ARCHIVE_SCRIPT = """
+    local cutoff = tonumber(ARGV[2])
+    local archived = 0
+    for i = 1, (#KEYS - 1) / 3 do
+        local string_key, hash_key, archive_key = KEYS[3 * i - 1], KEYS[3 * i], KEYS[3 * i + 1]
+        local field, segment_key = ARGV[2 * i + 1], ARGV[2 * i + 2]
+        local last_used = redis.call("zscore", KEYS[1], segment_key)
+        if last_used and tonumber(last_used) <= cutoff then
+            local string_value = redis.call("get", string_key)
+            local hash_value = redis.call("hget", hash_key, field)
+            local value
+            if ARGV[1] == "hash" then
+                value = hash_value or string_value
+            else
+                value = string_value or hash_value
+            end
+            if value then
+                redis.call("hset", archive_key, field, value)
+                redis.call("del", string_key)
+                redis.call("hdel", hash_key, field)
+                archived = archived + 1
+            end
+            redis.call("zrem", KEYS[1], segment_key)
+        end
+    end
+    return archived
+    """
+
+    _incr_script = None
+
+    @classmethod
+    def string_key(cls, segment_key: str) -> str:
+        return f"{cls.STRING_PREFIX}{segment_key}"
+
+    @classmethod
+    def hash_location(cls, segment_key: str) -> Tuple[str, str]:
+        """(hash key, field) of a counter in the hash layout"""
+        system_code, _, rest = segment_key.partition(":")
+        bucket = zlib.crc32(rest.encode("utf-8")) % cls.buckets
+        return f"{cls.HASH_PREFIX}{system_code}:{bucket}", rest
+
+    @classmethod
+    def archive_location(cls, segment_key: str) -> Tuple[str, str]:
+        """(hash key, field) of an archived counter"""
+        system_code, _, rest = segment_key.partition(":")
+        bucket = zlib.crc32(rest.encode("utf-8")) % cls.ARCHIVE_BUCKETS
+        return f"{cls.ARCHIVE_PREFIX}{system_code}:{bucket}", rest
+
+    @classmethod
+    def _keys(cls, segment_key: str) -> Tuple[str, str, str, str]:
+        hash_key, field = cls.hash_location(segment_key)
+        archive_key, _field = cls.archive_location(segment_key)
+        return cls.string_key(segment_key), hash_key, archive_key, field
+
+    @classmethod
+    def _script_args(cls, segment_keys: Iterable[str], values: Optional[List[int]] = None) -> Tuple[list, list]:
+        keys, args = [cls.ACTIVITY_KEY], []
+        for index, segment_key in enumerate(segment_keys):
+            string_key, hash_key, archive_key, field = cls._keys(segment_key)
+            keys.extend((string_key, hash_key, archive_key))
+            args.extend((field, segment_key))
+            if values is not None:
+                args.append(str(int(values[index])))
+        return keys, args
+
+    @classmethod
+    def queue_load(cls, pipe, segment_keys: List[str], layout: Optional[str] = None, restore_archived: bool = False):
+        """
+        Queue an existence check of counters on a pipeline; the result is a list of 1/0.
+
+        Archived counters count as existing but stay archived unless `restore_archived` is set.
+        """
+        keys, args = cls._script_args(segment_keys)
+        restore = "1" if restore_archived else "0"
+        pipe.eval(cls.LOAD_SCRIPT, len(keys), *keys, layout or cls.layout, restore, int(time.time()), *args)
+
+    @classmethod
+    def queue_seed(cls, pipe, seeds: List[Tuple[str, int]]):
+        """Queue a raise-only seed of counters on a pipeline; the result is [created, raised, unchanged]"""
+        keys, args = cls._script_args([segment_key for segment_key, _value in seeds], [value for _key, value in seeds])
+        pipe.eval(cls.SEED_SCRIPT, len(keys), *keys, cls.layout, "1", int(time.time()), *args)
+
+    @classmethod
+    def queue_archive(cls, pipe, segment_keys: List[str], cutoff: int):
+        """Queue archival of counters last allocated at or before `cutoff`; the result is the number archived"""
+        keys, args = cls._script_args(segment_keys)
+        pipe.eval(cls.ARCHIVE_SCRIPT, len(keys), *keys, cls.layout, cutoff, *args)
+
+    @classmethod
+    def queue_set(cls, pipe, segment_key: str, value: int):
+        string_key, hash_key, _archive_key, field = cls._keys(segment_key)
+        if cls.layout == cls.LAYOUT_HASH:
+            pipe.hset(hash_key, field, str(value))
+        else:
+            pipe.set(string_key, str(value))
+
+    @classmethod
+    def queue_delete(cls, pipe, segment_keys: Iterable[str]):
+        """Queue removal of counters from both layouts, the archive and the activity index"""
+        segment_keys = list(segment_keys)
+        if not segment_keys:
+            return
+        fields_by_hash = defaultdict(list)
+        for segment_key in segment_keys:
+            _string_key, hash_key, archive_key, field = cls._keys(segment_key)
+            fields_by_hash[hash_key].append(field)
+            fields_by_hash[archive_key].append(field)
+        pipe.unlink(*(cls.string_key(segment_key) for segment_key in segment_keys))
+        for hash_key, fields in fields_by_hash.items():
+            pipe.hdel(hash_key, *fields)
+        pipe.zrem(cls.ACTIVITY_KEY, *segment_keys)
+
+    @classmethod
+    async def exists(cls, segment_key: str) -> bool:
+        """Whether a counter exists, moving it into the configured layout or out of the archive first if needed"""
+        redis_client = await RedisClient.get_instance()
+        string_key, hash_key, _archive_key, field = cls._keys(segment_key)
+        if cls.layout == cls.LAYOUT_HASH:
+            found = await redis_client.hexists(hash_key, field)
+        else:
+            found = await redis_client.exists(string_key)
+        if found:
+            return True
+
+        # Not in the configured layout (cold path): move it over if the other layout or the archive has it
+        keys, args = cls._script_args([segment_key])
+        found = await redis_client.eval(cls.LOAD_SCRIPT, len(keys), *keys, cls.layout, "1", int(time.time()), *args)
+        return bool(found[0])
+
+    @classmethod
+    async def incrby_existing(cls, segment_key: str, amount: int) -> Optional[int]:
+        """Increment a counter in the configured layout; None (and nothing written) when it is not there"""
+        redis_client = await RedisClient.get_instance()
+        if cls._incr_script is None:
+            cls._incr_script = redis_client.register_script(cls.INCR_SCRIPT)
+
+        string_key, hash_key, _archive_key, field = cls._keys(segment_key)
+        if cls.layout == cls.LAYOUT_HASH:
+            value = await cls._incr_script(keys=[hash_key], args=[amount, field])
+        else:
+            value = await cls._incr_script(keys=[string_key], args=[amount, ""])
+        return int(value) if value is not None else None
+
+    @classmethod
+    async def get_many(cls, segment_keys: List[str]) -> List[Optional[int]]:
+        """Current values of counters (None when absent), looked up in both layouts and the archive in one round trip"""
+        if not segment_keys:
+            return []
+        redis_client = await RedisClient.get_instance()
+        by_hash: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+        for index, segment_key in enumerate(segment_keys):
+            _string_key, hash_key, archive_key, field = cls._keys(segment_key)
+            by_hash[hash_key].append((index, field))
+            by_hash[archive_key].append((index, field))
+
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.mget([cls.string_key(segment_key) for segment_key in segment_keys])
+            for hash_key, entries in by_hash.items():
+                pipe.hmget(hash_key, [field for _index, field in entries])
+            results = await pipe.execute()
+
+        string_values = results[0]
+        hash_values = [None] * len(segment_keys)
+        archived_values = [None] * len(segment_keys)
+        for (hash_key, entries), values in zip(by_hash.items(), results[1:]):
+            target = archived_values if hash_key.startswith(cls.ARCHIVE_PREFIX) else hash_values
+            for (index, _field), value in zip(entries, values):
+                target[index] = value
+
+        if cls.layout == cls.LAYOUT_HASH:
+            candidates = zip(hash_values, string_values, archived_values)
+        else:
+            candidates = zip(string_values, hash_values, archived_values)
+        values = []
+        for found in candidates:
+            value = next((value for value in found if value is not None), None)
+            values.append(int(value) if value is not None else None)
+        return values
+
+    @classmethod
+    async def scan_segment_keys(cls, system_code: Optional[str] = None, layout: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Segment keys of every counter in either layout and the archive (or only in `layout`),
+        found by walking the keyspace (maintenance only)
+        """
+        redis_client = await RedisClient.get_instance()
+        system_prefix = f"{system_code.lower()}:" if system_code else ""
+
+        if layout != cls.LAYOUT_HASH:
+            async for key in redis_client.scan_iter(match=f"{cls.STRING_PREFIX}{system_prefix}*", count=1000):
+                yield key[len(cls.STRING_PREFIX):]
+
+        if layout == cls.LAYOUT_STRING:
+            return
+        prefixes = [cls.HASH_PREFIX] if layout == cls.LAYOUT_HASH else [cls.HASH_PREFIX, cls.ARCHIVE_PREFIX]
+        for prefix in prefixes:
+            async for hash_key in redis_client.scan_iter(match=f"{prefix}{system_prefix}*", count=1000):
+                hash_system_code = hash_key[len(prefix):].rsplit(":", 1)[0]
+                async for field, _value in redis_client.hscan_iter(hash_key, count=1000):
+                    yield f"{hash_system_code}:{field}"
+
+    @classmethod
+    async def verify_layout(cls):
+        """
+        Record the bucket count of the hash layout, refusing to run with a different one.
+
+        In the string layout, counters left in hashes are still found (and moved out) with
+        the bucket count they were written with.
+        """
+        if cls.layout not in (cls.LAYOUT_STRING, cls.LAYOUT_HASH):
+            raise RuntimeError(f"Unknown SEGMENT_STORAGE_LAYOUT: {cls.layout}")
+
+        redis_client = await RedisClient.get_instance()
+        if cls.layout != cls.LAYOUT_HASH:
+            stored = await redis_client.get(cls.LAYOUT_KEY)
+            if stored:
+                cls.buckets = int(stored)
+            return
+
+        await redis_client.set(cls.LAYOUT_KEY, cls.buckets, nx=True)
+        stored = int(await redis_client.get(cls.LAYOUT_KEY))
+        if stored != cls.buckets:
+            raise RuntimeError(
+                f"SEGMENT_HASH_BUCKETS is {cls.buckets} but counters were written with {stored} buckets. "
+                "Migrate back to the string layout before changing the bucket count."
+            )
@@ -0,0 +1,122 @@
+"""
+Event-loop lag monitoring and blocking-call detection.
+
+A coroutine on the event loop sleeps for a fixed interval and measures how late it
+wakes up (scheduling delay). A watchdog thread watches the coroutine's heartbeat;
+when the loop has not ticked for longer than LOOP_BLOCK_THRESHOLD_MS it captures
+the stack of the event-loop thread, which points at the blocking call.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, List, Optional
+from app.config import LOOP_LAG_INTERVAL_MS, LOOP_BLOCK_THRESHOLD_MS, LOOP_LAG_WINDOW, LOOP_BLOCK_SAMPLE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measures event-loop scheduling delay and samples stacks of blocking calls"""
+
+    _lag_samples: Deque[float] = deque(maxlen=LOOP_LAG_WINDOW)
+    _block_samples: Deque[dict] = deque(maxlen=LOOP_BLOCK_SAMPLE_SIZE)
+    _last_lag_ms = 0.0
+    _max_lag_ms = 0.0
+    _blocked_count = 0
+    _last_beat = 0.0
+    _beat_seq = 0
+    _loop_thread_id: Optional[int] = None
+    _watchdog: Optional[threading.Thread] = None
+    _stop_event = threading.Event()
+
+    @classmethod
+    async def start(cls):
+        """Run the lag probe on the current event loop (runs until cancelled)"""
+        interval = LOOP_LAG_INTERVAL_MS / 1000
+        cls._loop_thread_id = threading.get_ident()
+        cls._last_beat = time.monotonic()
+        cls._start_watchdog()
+
+        try:
+            while True:
+                expected = time.monotonic() + interval
+                await asyncio.sleep(interval)
+                now = time.monotonic()
+                lag_ms = max(0.0, (now - expected) * 1000)
+
+                cls._last_beat = now
+                cls._beat_seq += 1
+                cls._last_lag_ms = lag_ms
+                cls._max_lag_ms = max(cls._max_lag_ms, lag_ms)
+                cls._lag_samples.append(lag_ms)
+        finally:
+            cls._stop_event.set()
+
+    @classmethod
+    def _start_watchdog(cls):
+        if cls._watchdog and cls._watchdog.is_alive():
+            return
+        cls._stop_event.clear()
+        cls._watchdog = threading.Thread(target=cls._watch, name="loop-lag-watchdog", daemon=True)
+        cls._watchdog.start()
+
+    @classmethod
+    def _watch(cls):
+        interval = LOOP_LAG_INTERVAL_MS / 1000
+        threshold = LOOP_BLOCK_THRESHOLD_MS / 1000
+        sampled_seq = -1
+
+        while not cls._stop_event.wait(threshold / 2):
+            seq = cls._beat_seq
+            blocked_for = time.monotonic() - cls._last_beat - interval
+            # One stack sample per blocking episode (the heartbeat has not moved since)
+            if blocked_for > threshold and seq != sampled_seq:
+                sampled_seq = seq
+                cls._record_block(blocked_for * 1000)
+
+    @classmethod
+    def _record_block(cls, blocked_ms: float):
+        frame = sys._current_frames().get(cls._loop_thread_id)
+        stack = traceback.format_stack(frame) if frame else []
+
+        cls._blocked_count += 1
+        cls._block_samples.append({
+            "detected_at": time.time(),
+            "blocked_ms": round(blocked_ms, 3),
+            "stack": [line.rstrip() for line in stack]
+        })
+        location = stack[-1].strip() if stack else "unknown"
+        logger.warning(f"Event loop blocked for {blocked_ms:.0f} ms at: {location}")
+
+    @classmethod
+    def _percentile(cls, samples: List[float], percentile: float) -> float:
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        samples = sorted(cls._lag_samples)
+        return {
+            "interval_ms": LOOP_LAG_INTERVAL_MS,
+            "block_threshold_ms": LOOP_BLOCK_THRESHOLD_MS,
+            "lag_ms": round(cls._last_lag_ms, 3),
+            "max_lag_ms": round(cls._max_lag_ms, 3),
+            "p50_lag_ms": round(cls._percentile(samples, 50), 3),
+            "p99_lag_ms": round(cls._percentile(samples, 99), 3),
+            "window_samples": len(samples),
+            "blocked_count": cls._blocked_count
+        }
+
+    @classmethod
+    def get_block_samples(cls, limit: int = 20) -> List[dict]:
+        """Return the most recent blocking stack samples, newest first"""
+        samples = list(cls._block_samples)
+        samples.reverse()
+        return samples[:limit]
@@ -0,0 +1,51 @@
+"""
+Include / exclude rules for database and table names.
+
+A rule is a shell-style glob matched against the whole name (`log_*`, `*_bak`), or a
+regular expression when prefixed with `re:` (`re:^tmp_\\d+$`, searched, so anchor it
+when needed). Matching is case-insensitive.
+"""
+
+import fnmatch
+import re
+from typing import Iterable, List, Optional, Pattern
+
+REGEX_PREFIX = "re:"
+
+
+def compile_rule(rule: str) -> Pattern:
+    """Compile one rule; raises re.error for an invalid `re:` expression"""
+    if rule.startswith(REGEX_PREFIX):
+        return re.compile(rule[len(REGEX_PREFIX):], re.IGNORECASE)
+    return re.compile("^" + fnmatch.translate(rule), re.IGNORECASE)
+
+
+def invalid_rules(rules: Iterable[str]) -> List[str]:
+    """Return the rules that cannot be compiled, each with the reason"""
+    errors = []
+    for rule in rules:
+        try:
+            compile_rule(rule)
+        except re.error as e:
+            errors.append(f"{rule}: {e}")
+    return errors
+
+
+class NameFilter:
+    """A name passes when it matches at least one include rule (or there are none) and no exclude rule"""
+
+    def __init__(self, include: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None):
+        self.include = [compile_rule(rule) for rule in include or () if rule]
+        self.exclude = [compile_rule(rule) for rule in exclude or () if rule]
+
+    def __bool__(self) -> bool:
+        """False when the filter has no rules and lets everything through"""
+        return bool(self.include or self.exclude)
+
+    def matches(self, name: str) -> bool:
+        if self.include and not any(pattern.search(name) for pattern in self.include):
+            return False
+        return not any(pattern.search(name) for pattern in self.exclude)
+
+    def filter(self, names: Iterable[str]) -> List[str]:
+        return [name for name in names if self.matches(name)]
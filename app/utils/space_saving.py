@@ -0,0 +1,66 @@
+"""
+Space-Saving top-K sketch (Metwally et al.).
+
+Keeps at most `capacity` counters. When a new key arrives and the sketch is full,
+the key with the smallest count is evicted and the newcomer inherits its count as
+an error bound, so heavy hitters are never under-counted.
+"""
+
+import heapq
+from typing import Dict, List, Tuple
+
+
+class SpaceSaving:
+    """Weighted Space-Saving sketch with a lazily maintained min-heap"""
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, key: str, weight: int = 1):
+        """Add `weight` occurrences of `key`"""
+        if key in self.counts:
+            self.counts[key] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = weight
+            self.errors[key] = 0
+        else:
+            min_key, min_count = self._pop_min()
+            del self.counts[min_key]
+            del self.errors[min_key]
+            self.counts[key] = min_count + weight
+            self.errors[key] = min_count
+
+        heapq.heappush(self._heap, (self.counts[key], key))
+        if len(self._heap) > self.capacity * 4:
+            self._compact()
+
+    def _pop_min(self) -> Tuple[str, int]:
+        # Heap entries go stale when a count is incremented; skip until one matches
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return key, count
+
+    def _compact(self):
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def top(self, k: int = None) -> List[Tuple[str, int, int]]:
+        """Return (key, count, error) sorted by count descending"""
+        items = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        if k is not None:
+            items = items[:k]
+        return [(key, count, self.errors[key]) for key, count in items]
+
+    def clear(self):
+        self.counts.clear()
+        self.errors.clear()
+        self._heap.clear()
@@ -0,0 +1,105 @@
+"""
+Lightweight per-request stage tracing.
+
+A RequestTrace records timed spans for the stages of a request. When the request
+finishes, traces slower than TRACE_SLOW_THRESHOLD_MS are written as a structured
+log line and kept in an in-memory ring buffer that the admin API exposes.
+"""
+
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Optional, Tuple
+from app.config import TRACE_SLOW_THRESHOLD_MS, TRACE_BUFFER_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTrace:
+    """Collects timed spans for a single request"""
+
+    def __init__(self, name: str, trace_id: Optional[str] = None):
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.started_at = time.time()
+        self.attributes: Dict[str, str] = {}
+        self.spans: List[Tuple[str, float]] = []
+        self.duration_ms: Optional[float] = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time the enclosed block and record it under the given stage name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((stage, (time.perf_counter() - start) * 1000))
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Sum span durations per stage (a stage may run several times, e.g. lock retries)"""
+        totals: Dict[str, float] = {}
+        for stage, duration in self.spans:
+            totals[stage] = totals.get(stage, 0.0) + duration
+        return totals
+
+    def finish(self, status: str = "ok") -> float:
+        """Close the trace and hand it to the recorder. Returns total duration in ms"""
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        self.attributes["status"] = status
+        TraceRecorder.record(self)
+        return self.duration_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            "attributes": self.attributes,
+            "stages": {stage: round(total, 3) for stage, total in self.stage_totals().items()},
+            "spans": [{"stage": stage, "duration_ms": round(duration, 3)} for stage, duration in self.spans]
+        }
+
+
+class TraceRecorder:
+    """In-process sink for slow traces (structured log + bounded ring buffer)"""
+
+    _buffer: Deque[dict] = deque(maxlen=TRACE_BUFFER_SIZE)
+    _total = 0
+    _slow = 0
+
+    @classmethod
+    def record(cls, trace: RequestTrace):
+        cls._total += 1
+        if trace.duration_ms is None or trace.duration_ms < TRACE_SLOW_THRESHOLD_MS:
+            return
+
+        cls._slow += 1
+        entry = trace.to_dict()
+        cls._buffer.append(entry)
+        logger.warning(f"Slow request trace: {json.dumps(entry, ensure_ascii=False, separators=(',', ':'))}")
+
+    @classmethod
+    def get_slow_traces(cls, limit: int = 100) -> List[dict]:
+        """Return the most recent slow traces, newest first"""
+        traces = list(cls._buffer)
+        traces.reverse()
+        return traces[:limit]
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        return {
+            "threshold_ms": TRACE_SLOW_THRESHOLD_MS,
+            "buffer_size": cls._buffer.maxlen,
+            "buffered": len(cls._buffer),
+            "total_requests": cls._total,
+            "slow_requests": cls._slow
+        }
+
+    @classmethod
+    def clear(cls):
+        cls._buffer.clear()
@@ -0,0 +1,76 @@
+"""
+Bounded LRU cache with per-entry time-to-live.
+
+Keys are tuples; `invalidate(prefix)` drops every entry whose key starts with the
+given tuple, so related entries (e.g. everything of one database) go together.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+
+
+class TTLCache:
+    """LRU cache whose entries also expire `ttl` seconds after they were stored"""
+
+    _MISSING = object()
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple[Hashable, ...], default: Any = None) -> Any:
+        """Return the cached value, or `default` when absent or expired"""
+        entry = self._entries.get(key, self._MISSING)
+        if entry is self._MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Tuple[Hashable, ...], value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, prefix: Tuple[Hashable, ...]) -> int:
+        """Drop every entry whose key starts with `prefix`; returns the number dropped"""
+        size = len(prefix)
+        stale = [key for key in self._entries if key[:size] == prefix]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None
+        }
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+对比两种段计数器存储布局的 Redis 内存占用
+
+在独立的键前缀 (kxy:id:bench:) 下分别按 string 布局 (每个计数器一个键) 和 hash 布局
+(按系统分桶的哈希) 写入相同数量的计数器,用 INFO memory 的 used_memory 差值计算内存占用,
+结束后删除测试数据。请在测试用的 Redis 实例或空闲时段执行。
+
+示例: python benchmark_segment_layout.py --keys 1000000 --systems 10 --buckets 1024
+"""
+import argparse
+import asyncio
+import time
+import zlib
+from app.redis_client import RedisClient
+
+BENCH_PREFIX = "kxy:id:bench:"
+
+
+def segment_keys(count: int, systems: int):
+    """生成形如真实段键的测试键: system:db:table:field"""
+    for i in range(count):
+        yield f"sys{i % systems}:db{(i // systems) % 50}:table_{i}:id", i * 1000
+
+
+async def used_memory(redis_client) -> int:
+    info = await redis_client.info("memory")
+    return int(info["used_memory"])
+
+
+async def delete_prefix(redis_client, prefix: str):
+    batch = []
+    async for key in redis_client.scan_iter(match=f"{prefix}*", count=1000):
+        batch.append(key)
+        if len(batch) >= 1000:
+            await redis_client.unlink(*batch)
+            batch = []
+    if batch:
+        await redis_client.unlink(*batch)
+
+
+async def write_string_layout(redis_client, count: int, systems: int, batch_size: int):
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for n, (segment_key, value) in enumerate(segment_keys(count, systems), 1):
+            pipe.set(f"{BENCH_PREFIX}segment:{segment_key}", value)
+            if n % batch_size == 0:
+                await pipe.execute()
+        await pipe.execute()
+
+
+async def write_hash_layout(redis_client, count: int, systems: int, buckets: int, batch_size: int):
+    # 与 SegmentStore.hash_location 相同的分桶方式
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for n, (segment_key, value) in enumerate(segment_keys(count, systems), 1):
+            system_code, _, rest = segment_key.partition(":")
+            bucket = zlib.crc32(rest.encode("utf-8")) % buckets
+            pipe.hset(f"{BENCH_PREFIX}segment_hash:{system_code}:{bucket}", rest, value)
+            if n % batch_size == 0:
+                await pipe.execute()
+        await pipe.execute()
+
+
+async def measure(redis_client, name: str, prefix: str, write) -> int:
+    await delete_prefix(redis_client, prefix)
+    before = await used_memory(redis_client)
+    start = time.perf_counter()
+    await write()
+    elapsed = time.perf_counter() - start
+    used = await used_memory(redis_client) - before
+    print(f"  {name:<8} 内存 {used / 1024 / 1024:10.1f} MB   写入耗时 {elapsed:6.1f} s")
+    await delete_prefix(redis_client, prefix)
+    return used
+
+
+async def benchmark(count: int, systems: int, buckets: int, batch_size: int):
+    print("=" * 60)
+    print(f"段计数器内存对比: {count} 个计数器, {systems} 个系统, 每系统 {buckets} 个哈希桶")
+    print(f"平均每个哈希 {count / systems / buckets:.0f} 个字段")
+    print("=" * 60)
+
+    redis_client = await RedisClient.get_instance()
+    try:
+        try:
+            encoding = await redis_client.config_get("hash-max-listpack-*")
+            encoding = encoding or await redis_client.config_get("hash-max-ziplist-*")
+            print(f"Redis 紧凑编码阈值: {encoding}")
+        except Exception:
+            print("无法读取 CONFIG (可能被禁用),紧凑编码阈值未知")
+
+        string_bytes = await measure(
+            redis_client, "string", f"{BENCH_PREFIX}segment:",
+            lambda: write_string_layout(redis_client, count, systems, batch_size)
+        )
+        hash_bytes = await measure(
+            redis_client, "hash", f"{BENCH_PREFIX}segment_hash:",
+            lambda: write_hash_layout(redis_client, count, systems, buckets, batch_size)
+        )
+
+        print()
+        print(f"  string 每个计数器 {string_bytes / count:6.1f} 字节")
+        print(f"  hash   每个计数器 {hash_bytes / count:6.1f} 字节")
+        if hash_bytes > 0:
+            print(f"  hash 布局节省 {(1 - hash_bytes / string_bytes) * 100:.1f}% 内存")
+    finally:
+        await RedisClient.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="对比 string 和 hash 两种段计数器存储布局的内存占用")
+    parser.add_argument("--keys", type=int, default=1000000, help="计数器数量")
+    parser.add_argument("--systems", type=int, default=10, help="系统数量 (hash 布局按系统分桶)")
+    parser.add_argument("--buckets", type=int, default=1024, help="每个系统的哈希桶数量 (SEGMENT_HASH_BUCKETS)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="每次管道提交的命令数")
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.keys, args.systems, args.buckets, args.batch_size))
@@ -0,0 +1,109 @@
+"""
+In-memory stand-in for a database server, for tests of the scanner, init jobs and max ID lookups.
+
+FakeConnector holds tables as lists of row IDs and records every database listing,
+catalog page read and MAX() query in `calls`; serve_connector() makes the connector pools hand fakes out
+and DbConfigService see their configs instead of the stored ones.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.models.database import AutoProvisionPolicy, DatabaseConfig, DatabaseType
+from app.services.connector_pool import DbConnectorPool
+from app.services.db_config_service import DbConfigService
+from app.services.db_connector import DbConnector, DbConnectorFactory
+
+
+class FakeConnector(DbConnector):
+    """Database "db" with tables of IDs (primary key "id") and optional catalog max IDs that may lag behind them"""
+
+    def __init__(self, tables: Dict[str, List[int]], catalog: Optional[Dict[str, int]] = None,
+                 system_code: str = "sys", auto_provision: AutoProvisionPolicy = AutoProvisionPolicy.NONE):
+        super().__init__(DatabaseConfig(
+            guid=f"{system_code}-guid", system_code=system_code, db_type=DatabaseType.MYSQL,
+            db_address="localhost:3306", db_user="u", db_password="p", db_name="db",
+            auto_provision=auto_provision
+        ))
+        self.tables = tables
+        self.catalog = catalog or {}
+        self.failing_tables = set()
+        # Schema fingerprint of "db"; None makes every scan read the catalog
+        self.fingerprint: Optional[str] = None
+        # Awaited with the table name before every MAX() query, to hold a lookup open
+        self.before_max: Optional[Callable[[str], Awaitable]] = None
+        self.calls = []
+
+    async def get_databases(self):
+        self.calls.append(("databases", None))
+        return ["db"]
+
+    async def get_tables(self, database):
+        return list(self.tables)
+
+    async def get_primary_key(self, database, table):
+        return "id"
+
+    async def get_schema_fingerprint(self, database):
+        return self.fingerprint
+
+    async def get_numeric_primary_keys_page(self, database: str, after: Any = None, limit: int = 1000):
+        self.calls.append(("page", after))
+        return await super().get_numeric_primary_keys_page(database, after, limit)
+
+    async def get_max_id(self, database, table, pk_field):
+        self.calls.append(("max", table))
+        if self.before_max:
+            await self.before_max(table)
+        if table in self.failing_tables:
+            raise RuntimeError(f"{table} is not reachable")
+        return max(self.tables[table], default=0)
+
+    async def get_catalog_max_id(self, database, table, field):
+        return self.catalog.get(table)
+
+    async def has_ids_above(self, database, table, field, value):
+        return any(row_id > value for row_id in self.tables[table])
+
+    async def table_field_exists(self, database, table, field):
+        return table in self.tables and field == "id"
+
+    async def ping(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def max_queries(self) -> List[str]:
+        return [table for method, table in self.calls if method == "max"]
+
+
+@contextmanager
+def serve_connector(*connectors: DbConnector):
+    """
+    Inside the block, the configs of `connectors` are the only database configs DbConfigService
+    knows (nothing is stored), and connector pools hand out the connector of each config instead
+    of connecting to a server, so scans never reach the real configs in Redis
+    """
+    by_guid = {connector.config.guid: connector for connector in connectors}
+    create = DbConnectorFactory.create
+    get_database = DbConfigService.get_database
+    get_database_list = DbConfigService.get_database_list
+
+    async def get_fake_database(guid: str):
+        connector = by_guid.get(guid)
+        return connector.config if connector else None
+
+    async def get_fake_database_list():
+        return [connector.config for connector in connectors]
+
+    DbConnectorFactory.create = staticmethod(lambda config: by_guid[config.guid])
+    DbConfigService.get_database = staticmethod(get_fake_database)
+    DbConfigService.get_database_list = staticmethod(get_fake_database_list)
+    DbConnectorPool._pools.clear()
+    try:
+        yield
+    finally:
+        DbConnectorFactory.create = staticmethod(create)
+        DbConfigService.get_database = classmethod(get_database.__func__)
+        DbConfigService.get_database_list = classmethod(get_database_list.__func__)
+        DbConnectorPool._pools.clear()
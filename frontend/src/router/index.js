@@ -1,6 +1,7 @@
 import { createRouter, createWebHistory } from 'vue-router'
 import Login from '../views/Login.vue'
 import DatabaseList from '../views/DatabaseList.vue'
+import Monitor from '../views/Monitor.vue'
 
 const routes = [
   {
@@ -17,6 +18,12 @@ const routes = [
     name: 'DatabaseList',
     component: DatabaseList,
     meta: { requiresAuth: true }
+  },
+  {
+    path: '/monitor',
+    name: 'Monitor',
+    component: Monitor,
+    meta: { requiresAuth: true }
   }
 ]
 
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+把所有段计数器迁移到当前配置的存储布局 (SEGMENT_STORAGE_LAYOUT: string / hash)
+
+服务在运行中也会在首次访问时按需迁移计数器,本脚本用于一次性迁移全部计数器以立即释放内存。
+迁移通过 Lua 脚本逐批原子执行,可在服务运行时执行,也可中断后重复执行。
+
+修改 SEGMENT_HASH_BUCKETS 的步骤:
+  1. SEGMENT_STORAGE_LAYOUT=string,重启服务并执行本脚本 (迁移完成后会清除桶数量记录)
+  2. 修改 SEGMENT_HASH_BUCKETS,SEGMENT_STORAGE_LAYOUT=hash,重启服务并再次执行本脚本
+"""
+import argparse
+import asyncio
+from app.redis_client import RedisClient
+from app.services.segment_store import SegmentStore
+
+
+async def move_batch(redis_client, segment_keys: list) -> int:
+    """一次 Lua 调用把一批计数器移到当前布局,返回实际存在的计数器数量"""
+    if not segment_keys:
+        return 0
+    async with redis_client.pipeline(transaction=False) as pipe:
+        SegmentStore.queue_load(pipe, segment_keys)
+        found, = await pipe.execute()
+    return sum(found)
+
+
+async def migrate(batch_size: int):
+    print("=" * 60)
+    print(f"迁移段计数器到 {SegmentStore.layout} 布局 (桶数量: {SegmentStore.buckets})")
+    print("=" * 60)
+
+    try:
+        await SegmentStore.verify_layout()
+        redis_client = await RedisClient.get_instance()
+
+        # 只遍历需要迁出的布局;SCAN 在键被移走时仍能保证遍历到其余的键
+        source = SegmentStore.LAYOUT_HASH if SegmentStore.layout == SegmentStore.LAYOUT_STRING else SegmentStore.LAYOUT_STRING
+        print(f"\n从 {source} 布局迁出计数器...")
+
+        moved = 0
+        batch = []
+        async for segment_key in SegmentStore.scan_segment_keys(layout=source):
+            batch.append(segment_key)
+            if len(batch) >= batch_size:
+                moved += await move_batch(redis_client, batch)
+                batch = []
+                print(f"  ✓ 已迁移 {moved}")
+        moved += await move_batch(redis_client, batch)
+        print(f"  ✓ 共迁移 {moved} 个计数器")
+
+        if SegmentStore.layout == SegmentStore.LAYOUT_STRING:
+            remaining = [key async for key in redis_client.scan_iter(match=f"{SegmentStore.HASH_PREFIX}*", count=1000)]
+            if remaining:
+                print(f"\n仍有 {len(remaining)} 个哈希桶未清空,请再次执行本脚本")
+            else:
+                await redis_client.delete(SegmentStore.LAYOUT_KEY)
+                print("\n哈希布局已清空,已清除桶数量记录")
+
+        print("\n" + "=" * 60)
+        print("迁移完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 错误: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        await RedisClient.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="把所有段计数器迁移到当前配置的存储布局")
+    parser.add_argument("--batch-size", type=int, default=500, help="每次 Lua 调用迁移的计数器数量")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size))
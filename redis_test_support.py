@@ -0,0 +1,46 @@
+"""
+Shared setup for the test scripts that need Redis (the one configured in .env).
+
+run_redis_test() runs an async test against a fresh system code and deletes that
+system's counters afterwards, so tests never touch real data; tests are skipped
+when Redis is not reachable.
+"""
+
+import asyncio
+import uuid
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional
+import pytest
+from app.redis_client import RedisClient
+from app.services.segment_registry import SegmentRegistry
+from app.services.segment_store import SegmentStore
+
+
+@contextmanager
+def segment_layout(name: str):
+    """Use another SegmentStore layout inside the block"""
+    previous = SegmentStore.layout
+    SegmentStore.layout = name
+    try:
+        yield
+    finally:
+        SegmentStore.layout = previous
+
+
+def run_redis_test(test: Callable[[str], Awaitable], layout: Optional[str] = None):
+    """Run `test(system_code)` against a fresh system code (and `layout`, if given), then remove its counters"""
+    async def wrapper():
+        redis_client = await RedisClient.get_instance()
+        try:
+            await redis_client.ping()
+        except Exception as e:
+            pytest.skip(f"Redis is not reachable: {e}")
+        system_code = f"test_{uuid.uuid4().hex[:8]}"
+        try:
+            await test(system_code)
+        finally:
+            await SegmentRegistry.delete_system(system_code)
+            await RedisClient.close()
+
+    with segment_layout(layout or SegmentStore.layout):
+        asyncio.run(wrapper())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+停止维护旧版的数据库配置键 (kxy:id:db_config:{guid})
+
+滚动升级期间新版服务会同时写入配置哈希和旧版的配置键,并定期把旧版服务写入的改动同步到哈希中。
+所有实例都升级到新版后执行本脚本: 最后同步一次,记录旧版键已停用,然后删除旧版键和删除标记。
+执行后新版服务不再写入旧版键;可重复执行。
+"""
+import argparse
+import asyncio
+from app.redis_client import RedisClient
+from app.services.db_config_service import DbConfigService
+
+
+async def retire(batch_size: int):
+    print("=" * 60)
+    print("停用旧版数据库配置键")
+    print("=" * 60)
+
+    try:
+        redis_client = await RedisClient.get_instance()
+
+        print("\n同步旧版配置...")
+        changed = await DbConfigService.sync_legacy_configs()
+        print(f"  ✓ 同步了 {len(changed)} 个配置")
+
+        # 先记录停用,之后的写入不再产生旧版键,再删除已有的旧版键
+        await redis_client.set(DbConfigService.LEGACY_RETIRED_KEY, 1)
+        print("  ✓ 已记录停用")
+
+        deleted = 0
+        batch = []
+        async for key in redis_client.scan_iter(match=f"{DbConfigService.LEGACY_CONFIG_PREFIX}*", count=1000):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += await redis_client.delete(*batch)
+                batch = []
+        if batch:
+            deleted += await redis_client.delete(*batch)
+        print(f"  ✓ 删除了 {deleted} 个旧版配置键")
+
+        # 删除标记只用于阻止旧版实例写回已删除的配置,停用后不再需要
+        await redis_client.delete(DbConfigService.LEGACY_TOMBSTONES_KEY, DbConfigService.LEGACY_SYNC_KEY)
+        print("  ✓ 已删除旧版配置的删除标记")
+
+        print("\n" + "=" * 60)
+        print("停用完成！")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ 错误: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        await RedisClient.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="停用旧版数据库配置键")
+    parser.add_argument("--batch-size", type=int, default=500, help="每次删除的键数量")
+    args = parser.parse_args()
+    asyncio.run(retire(args.batch_size))
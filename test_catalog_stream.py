@@ -0,0 +1,120 @@
+"""
+Test script for streaming primary key catalogs (DbConnector.iter_numeric_primary_keys)
+and the scanner consuming them batch by batch.
+
+The scanner tests need Redis (see redis_test_support); the paging tests do not.
+"""
+
+import asyncio
+import app.services.scanner_service as scanner_service
+from app.models.database import AutoProvisionPolicy
+from app.redis_client import RedisClient
+from app.services.scanner_service import ScannerService
+from app.services.segment_store import SegmentStore
+from connector_test_support import FakeConnector, serve_connector
+from redis_test_support import run_redis_test
+
+TABLES = [f"t{i:02d}" for i in range(25)]
+
+
+async def read_all(connector, batch_size):
+    batches = []
+    async for batch in connector.iter_numeric_primary_keys("db", batch_size):
+        batches.append([primary_key.table for primary_key in batch])
+    return batches
+
+
+def test_pages_cover_every_table_once():
+    """Keyset pages return every table exactly once, including when the last page is full"""
+    print("Testing catalog paging...")
+    connector = FakeConnector({table: [1] for table in reversed(TABLES)})
+    batches = asyncio.run(read_all(connector, 10))
+    assert batches == [TABLES[0:10], TABLES[10:20], TABLES[20:25]]
+    assert connector.calls == [("page", None), ("page", "t09"), ("page", "t19")]
+    print("   ✓ 25 tables in pages of 10")
+
+    connector = FakeConnector({table: [1] for table in TABLES[:20]})
+    assert asyncio.run(read_all(connector, 10)) == [TABLES[0:10], TABLES[10:20]]
+    assert connector.calls[-1] == ("page", "t19")
+    print("   ✓ Stops after an empty page when the last page is full")
+
+
+async def scan(connector, batch_size=10):
+    """Scan the fake database with a small catalog batch size"""
+    previous = scanner_service.SCANNER_REDIS_BATCH_SIZE
+    scanner_service.SCANNER_REDIS_BATCH_SIZE = batch_size
+    try:
+        with serve_connector(connector):
+            return await ScannerService.scan_database(connector.config, "db", force=True)
+    finally:
+        scanner_service.SCANNER_REDIS_BATCH_SIZE = previous
+
+
+async def discovered(connector) -> dict:
+    redis_client = await RedisClient.get_instance()
+    return await redis_client.hgetall(f"{ScannerService.DISCOVERED_PREFIX}{connector.config.guid}")
+
+
+async def forget(connector):
+    redis_client = await RedisClient.get_instance()
+    await redis_client.delete(f"{ScannerService.DISCOVERED_PREFIX}{connector.config.guid}")
+
+
+def test_scan_records_each_batch_before_reading_the_next():
+    """Max IDs of a batch are looked up and recorded before the next catalog page is read"""
+    print("Testing batch-by-batch scanning...")
+
+    async def check(system_code):
+        connector = FakeConnector({table: [i * 10] for i, table in enumerate(TABLES)}, system_code=system_code)
+        try:
+            assert await scan(connector) == (25, 0)
+            expected = []
+            for page, after in enumerate((None, "t09", "t19")):
+                expected.append(("page", after))
+                expected.extend(("max", table) for table in TABLES[page * 10:page * 10 + 10])
+            assert connector.calls == expected
+
+            entries = await discovered(connector)
+            assert len(entries) == 25
+            assert '"max_id":240' in entries[f"{system_code}:db:t24:id"]
+            print("   ✓ Page, lookups, page, lookups, ...")
+
+            # Pending tables are not looked up again
+            connector.calls.clear()
+            assert await scan(connector) == (0, 0)
+            assert connector.max_queries() == []
+            print("   ✓ Rescan skips pending tables")
+        finally:
+            await forget(connector)
+    run_redis_test(check)
+
+
+def test_scan_provisions_each_batch():
+    """Under the 'all' auto-provision policy every batch is seeded as it is scanned"""
+    print("Testing auto-provisioning while streaming...")
+
+    async def check(system_code):
+        connector = FakeConnector(
+            {table: [i * 10] for i, table in enumerate(TABLES)}, system_code=system_code,
+            auto_provision=AutoProvisionPolicy.ALL
+        )
+        try:
+            assert await scan(connector) == (0, 25)
+            assert await discovered(connector) == {}
+            values = await SegmentStore.get_many([f"{system_code}:db:{table}:id" for table in TABLES])
+            assert values == [i * 10 for i in range(25)]
+
+            connector.calls.clear()
+            assert await scan(connector) == (0, 0)
+            assert connector.max_queries() == []
+            print("   ✓ Counters seeded, nothing looked up again")
+        finally:
+            await forget(connector)
+    run_redis_test(check)
+
+
+if __name__ == "__main__":
+    test_pages_cover_every_table_once()
+    test_scan_records_each_batch_before_reading_the_next()
+    test_scan_provisions_each_batch()
+    print("\n✅ All catalog streaming tests passed!")
@@ -0,0 +1,51 @@
+"""
+Test script for connector pool capacity reserved for allocation.
+
+Background work (scanner, initialization jobs) borrows with background=True and can
+hold at most DB_POOL_BACKGROUND_SIZE connectors, so a cold-path allocation always
+finds a free one however busy the background work is.
+"""
+
+import asyncio
+from contextlib import AsyncExitStack
+from app.config import DB_POOL_MAX_SIZE
+from app.services.connector_pool import DB_POOL_BACKGROUND_SIZE, DbConnectorPool
+from connector_test_support import FakeConnector, serve_connector
+
+
+def test_background_work_leaves_reserved_connections():
+    """Background borrowers queue up once they hold their share, foreground ones still get a connection"""
+    print("Testing reserved pool capacity...")
+
+    async def check():
+        connector = FakeConnector({})
+        config = connector.config
+        with serve_connector(connector):
+            async with AsyncExitStack() as background:
+                for _ in range(DB_POOL_BACKGROUND_SIZE):
+                    await background.enter_async_context(DbConnectorPool.acquire(config, background=True))
+
+                async def borrow_in_background():
+                    async with DbConnectorPool.acquire(config, background=True):
+                        pass
+
+                waiting = asyncio.create_task(borrow_in_background())
+                await asyncio.sleep(0.05)
+                assert not waiting.done(), "background work went past its share of the pool"
+                print(f"   ✓ Background work capped at {DB_POOL_BACKGROUND_SIZE} of {DB_POOL_MAX_SIZE} connections")
+
+                async with AsyncExitStack() as foreground:
+                    for _ in range(DB_POOL_MAX_SIZE - DB_POOL_BACKGROUND_SIZE):
+                        await asyncio.wait_for(
+                            foreground.enter_async_context(DbConnectorPool.acquire(config)), timeout=1
+                        )
+                print("   ✓ Allocation gets a reserved connection")
+
+            await asyncio.wait_for(waiting, timeout=1)
+            print("   ✓ Waiting background work proceeds once a connection is returned")
+    asyncio.run(check())
+
+
+if __name__ == "__main__":
+    test_background_work_leaves_reserved_connections()
+    print("\n✅ All connector pool tests passed!")
@@ -0,0 +1,135 @@
+"""
+Test script for driver calls run on the driver executor (DbConnector._run_blocking).
+
+A call that times out or is cancelled leaves its connection to the worker thread:
+the connector opens a new one for the next call, and the abandoned connection is
+closed as soon as the thread returns.
+"""
+
+import asyncio
+import threading
+import app.services.db_connector as db_connector
+from app.models.database import DatabaseConfig, DatabaseType
+from app.services.db_connector import DbConnector
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+class BlockingConnector(DbConnector):
+    """Connector whose only driver call blocks until released"""
+
+    def __init__(self):
+        super().__init__(DatabaseConfig(
+            guid="g", system_code="sys", db_type=DatabaseType.SQLSERVER,
+            db_address="localhost:1433", db_user="u", db_password="p"
+        ))
+        self.conn = FakeConnection()
+        self.release = threading.Event()
+
+    def _slow_query_sync(self):
+        self.release.wait(5)
+        return 1
+
+    async def slow_query(self):
+        return await self._run_blocking(self._slow_query_sync, timeout=0.2)
+
+    async def get_databases(self):
+        return []
+
+    async def get_tables(self, database):
+        return []
+
+    async def get_primary_key(self, database, table):
+        return None
+
+    async def get_max_id(self, database, table, pk_field):
+        return 0
+
+    async def table_field_exists(self, database, table, field):
+        return False
+
+    async def ping(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+def run_with_short_connect_timeout(check):
+    previous = db_connector.DB_CONNECT_TIMEOUT
+    db_connector.DB_CONNECT_TIMEOUT = 0
+    try:
+        asyncio.run(check())
+    finally:
+        db_connector.DB_CONNECT_TIMEOUT = previous
+
+
+def test_timed_out_connection_closed_when_call_returns():
+    """The connection of a timed-out call is dropped at once and closed once the thread is done with it"""
+    print("Testing timed-out driver calls...")
+
+    async def check():
+        connector = BlockingConnector()
+        conn = connector.conn
+        try:
+            await connector.slow_query()
+            assert False, "the call should have timed out"
+        except TimeoutError:
+            pass
+        assert connector.conn is None
+        assert not conn.closed.is_set(), "closed while the worker thread was still using it"
+
+        connector.release.set()
+        assert await asyncio.get_running_loop().run_in_executor(None, conn.closed.wait, 5)
+    run_with_short_connect_timeout(check)
+    print("   ✓ Dropped on timeout, closed after the call returned")
+
+
+def test_cancelled_call_gives_up_connection():
+    """A cancelled call (e.g. a scan timeout) never leaves its busy connection to the next caller"""
+    print("Testing cancelled driver calls...")
+
+    async def check():
+        connector = BlockingConnector()
+        conn = connector.conn
+        task = asyncio.create_task(connector.slow_query())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+            assert False, "the call should have been cancelled"
+        except asyncio.CancelledError:
+            pass
+        assert connector.conn is None
+
+        connector.release.set()
+        assert await asyncio.get_running_loop().run_in_executor(None, conn.closed.wait, 5)
+    run_with_short_connect_timeout(check)
+    print("   ✓ Dropped on cancellation, closed after the call returned")
+
+
+def test_finished_call_keeps_connection():
+    """Calls that finish in time keep their connection"""
+    print("Testing driver calls within the timeout...")
+
+    async def check():
+        connector = BlockingConnector()
+        conn = connector.conn
+        connector.release.set()
+        assert await connector.slow_query() == 1
+        assert connector.conn is conn and not conn.closed.is_set()
+    run_with_short_connect_timeout(check)
+    print("   ✓ Connection kept")
+
+
+if __name__ == "__main__":
+    test_timed_out_connection_closed_when_call_returns()
+    test_cancelled_call_gives_up_connection()
+    test_finished_call_keeps_connection()
+    print("\n✅ All driver timeout tests passed!")
@@ -0,0 +1,138 @@
+"""
+Test script for database initialization jobs (InitJobService).
+
+A job interrupted by a restart is resumed from its last checkpoint: tables recorded
+as done are not looked up again, and the counters end up as after an uninterrupted run.
+
+Needs Redis (see redis_test_support).
+"""
+
+import asyncio
+from contextlib import contextmanager
+import app.services.init_job_service as init_job_service
+from app.redis_client import RedisClient
+from app.services.connector_pool import DB_POOL_BACKGROUND_SIZE
+from app.services.init_job_service import InitJobService
+from app.services.segment_store import SegmentStore
+from connector_test_support import FakeConnector, serve_connector
+from redis_test_support import run_redis_test
+
+TABLES = [f"t{i:02d}" for i in range(30)]
+
+
+@contextmanager
+def small_batches(concurrency: int):
+    """Checkpoint every 5 tables, list 10 tables per catalog page, run `concurrency` workers"""
+    previous = (InitJobService.SEED_BATCH_SIZE, InitJobService.CHECKPOINT_BATCH_SIZE, init_job_service.INIT_JOB_CONCURRENCY)
+    InitJobService.SEED_BATCH_SIZE = 5
+    InitJobService.CHECKPOINT_BATCH_SIZE = 10
+    init_job_service.INIT_JOB_CONCURRENCY = concurrency
+    try:
+        yield
+    finally:
+        InitJobService.SEED_BATCH_SIZE, InitJobService.CHECKPOINT_BATCH_SIZE, init_job_service.INIT_JOB_CONCURRENCY = previous
+
+
+async def forget(job_id: str, guid: str):
+    redis_client = await RedisClient.get_instance()
+    await redis_client.delete(
+        InitJobService._job_key(job_id), InitJobService._done_key(job_id), f"{InitJobService.ACTIVE_PREFIX}{guid}"
+    )
+    await redis_client.srem(InitJobService.PENDING_KEY, job_id)
+
+
+async def run_to_end(job_id: str):
+    InitJobService._spawn(job_id)
+    await asyncio.wait_for(InitJobService._running[job_id], timeout=10)
+    return await InitJobService.get_job(job_id)
+
+
+def test_interrupted_job_resumes_from_checkpoint():
+    """Checkpointed tables are skipped after a restart; the tables after the last checkpoint are redone"""
+    print("Testing job resume...")
+
+    async def check(system_code):
+        connector = FakeConnector({table: [i + 1] for i, table in enumerate(TABLES)}, system_code=system_code)
+        guid = connector.config.guid
+        paused = asyncio.Event()
+
+        async def hang_at_t12(table):
+            if table == "t12":
+                paused.set()
+                await asyncio.Event().wait()
+
+        job_id = None
+        try:
+            with small_batches(concurrency=1), serve_connector(connector):
+                connector.before_max = hang_at_t12
+                job_id = (await InitJobService.start_job(guid)).job_id
+                await asyncio.wait_for(paused.wait(), timeout=10)
+
+                # Stop the job the way a restart would, in the middle of a checkpoint batch
+                task = InitJobService._running[job_id]
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+                job = await InitJobService.get_job(job_id)
+                assert job.status == "running"
+                assert job.processed_tables == 10
+                redis_client = await RedisClient.get_instance()
+                assert job_id in await redis_client.smembers(InitJobService.PENDING_KEY)
+                print("   ✓ Interrupted after two checkpoints, still pending")
+
+                connector.before_max = None
+                connector.calls.clear()
+                job = await run_to_end(job_id)
+
+            assert job.status == "completed"
+            assert (job.processed_tables, job.total_tables) == (30, 30)
+            assert (job.initialized_count, job.created_count) == (30, 30)
+            assert connector.max_queries() == TABLES[10:]
+            print("   ✓ Resumed at the first table after the last checkpoint")
+
+            values = await SegmentStore.get_many([f"{system_code}:db:{table}:id" for table in TABLES])
+            assert values == [i + 1 for i in range(30)]
+            print("   ✓ Every counter seeded")
+        finally:
+            if job_id:
+                await forget(job_id, guid)
+    run_redis_test(check)
+
+
+def test_workers_capped_by_background_connections():
+    """A job never runs more lookups at once than the pool lends to background work"""
+    print("Testing job concurrency...")
+
+    async def check(system_code):
+        connector = FakeConnector({table: [i + 1] for i, table in enumerate(TABLES)}, system_code=system_code)
+        guid = connector.config.guid
+        in_flight = []
+        peak = 0
+
+        async def track(table):
+            nonlocal peak
+            in_flight.append(table)
+            peak = max(peak, len(in_flight))
+            await asyncio.sleep(0.02)
+            in_flight.remove(table)
+
+        job_id = None
+        try:
+            with small_batches(concurrency=DB_POOL_BACKGROUND_SIZE + 5), serve_connector(connector):
+                connector.before_max = track
+                job_id = (await InitJobService.start_job(guid)).job_id
+                job = await run_to_end(job_id)
+
+            assert job.status == "completed" and job.processed_tables == 30
+            assert peak == DB_POOL_BACKGROUND_SIZE
+            print(f"   ✓ At most {DB_POOL_BACKGROUND_SIZE} lookups at once")
+        finally:
+            if job_id:
+                await forget(job_id, guid)
+    run_redis_test(check)
+
+
+if __name__ == "__main__":
+    test_interrupted_job_resumes_from_checkpoint()
+    test_workers_capped_by_background_connections()
+    print("\n✅ All initialization job tests passed!")
@@ -0,0 +1,146 @@
+"""
+Test script for scanner leader election (LeaderElection).
+
+Each candidate is a subclass with its own instance ID, competing for a lease on a
+test key with a 1 second lease renewed every 0.1 seconds.
+
+Needs Redis (see redis_test_support).
+"""
+
+import asyncio
+from contextlib import contextmanager
+import app.services.leader_service as leader_service
+from app.redis_client import RedisClient
+from app.services.leader_service import LeaderElection
+from redis_test_support import run_redis_test
+
+RENEW_INTERVAL = 0.1
+
+
+@contextmanager
+def short_lease():
+    previous = (leader_service.LEADER_LEASE_SECONDS, leader_service.LEADER_RENEW_INTERVAL)
+    leader_service.LEADER_LEASE_SECONDS, leader_service.LEADER_RENEW_INTERVAL = 1, RENEW_INTERVAL
+    try:
+        yield
+    finally:
+        leader_service.LEADER_LEASE_SECONDS, leader_service.LEADER_RENEW_INTERVAL = previous
+
+
+class Candidate:
+    """One process taking part in the election, with a record of when its leader work runs"""
+
+    def __init__(self, name: str, leader_key: str):
+        self.election = type(name, (LeaderElection,), {
+            "LEADER_KEY": leader_key, "instance_id": name, "_is_leader": False
+        })
+        self.working = False
+        self.terms = 0
+        self.task = None
+
+    async def work(self):
+        self.working = True
+        self.terms += 1
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.working = False
+
+    def start(self):
+        self.task = asyncio.create_task(self.election.run(self.work))
+
+    async def stop(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+
+async def eventually(condition, timeout: float = 3):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached in time"
+        await asyncio.sleep(0.02)
+
+
+def run_election_test(check):
+    async def wrapper(system_code):
+        leader_key = f"{LeaderElection.LEADER_KEY}:{system_code}"
+        with short_lease():
+            try:
+                await check(leader_key)
+            finally:
+                redis_client = await RedisClient.get_instance()
+                await redis_client.delete(leader_key)
+    run_redis_test(wrapper)
+
+
+def test_single_leader_keeps_renewing():
+    """Exactly one candidate leads; its lease is renewed past its length and the standby never runs"""
+    print("Testing lease and renewal...")
+
+    async def check(leader_key):
+        first, second = Candidate("first", leader_key), Candidate("second", leader_key)
+        first.start()
+        await eventually(lambda: first.working)
+        second.start()
+        try:
+            await asyncio.sleep(2.5)
+            assert first.election.is_leader() and first.working and first.terms == 1
+            assert not second.election.is_leader() and second.terms == 0
+            status = await first.election.get_status()
+            assert status["leader"] == "first" and 0 < status["lease_expires_in_ms"] <= 1000
+            print("   ✓ Lease renewed for 2.5 times its length, standby idle")
+        finally:
+            await second.stop()
+            await first.stop()
+    run_election_test(check)
+
+
+def test_standby_takes_over_when_leader_stops():
+    """A stopping leader releases the lease, so the standby takes over on its next attempt"""
+    print("Testing takeover...")
+
+    async def check(leader_key):
+        first, second = Candidate("first", leader_key), Candidate("second", leader_key)
+        first.start()
+        await eventually(lambda: first.working)
+        second.start()
+        try:
+            await first.stop()
+            assert not first.working and not first.election.is_leader()
+            await eventually(lambda: second.working, timeout=RENEW_INTERVAL * 5)
+            redis_client = await RedisClient.get_instance()
+            assert await redis_client.get(leader_key) == "second"
+            print("   ✓ Standby elected right after the leader stopped")
+        finally:
+            await second.stop()
+            await first.stop()
+    run_election_test(check)
+
+
+def test_leader_steps_down_when_lease_lost():
+    """A leader whose lease was taken stops its work instead of running next to the new holder"""
+    print("Testing step-down...")
+
+    async def check(leader_key):
+        candidate = Candidate("first", leader_key)
+        candidate.start()
+        try:
+            await eventually(lambda: candidate.working)
+            redis_client = await RedisClient.get_instance()
+            await redis_client.set(leader_key, "other", ex=30)
+            await eventually(lambda: not candidate.working, timeout=RENEW_INTERVAL * 5)
+            assert not candidate.election.is_leader()
+
+            await asyncio.sleep(RENEW_INTERVAL * 3)
+            assert candidate.terms == 1 and await redis_client.get(leader_key) == "other"
+            print("   ✓ Work stopped, lease left to its holder")
+        finally:
+            await candidate.stop()
+    run_election_test(check)
+
+
+if __name__ == "__main__":
+    test_single_leader_keeps_renewing()
+    test_standby_takes_over_when_leader_stops()
+    test_leader_steps_down_when_lease_lost()
+    print("\n✅ All leader election tests passed!")
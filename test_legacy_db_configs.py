@@ -0,0 +1,203 @@
+"""
+Test script for the legacy database config layout kept during rolling upgrades
+(DbConfigService dual writes, legacy sync and retire_legacy_db_configs.py).
+
+Every test runs on its own copy of the config keys, so stored configs are never touched.
+
+Needs Redis (see redis_test_support).
+"""
+
+import json
+from contextlib import contextmanager
+from app.models.database import AddDatabaseRequest, DatabaseType
+from app.redis_client import RedisClient
+from app.services.db_config_service import DbConfigService
+from redis_test_support import run_redis_test
+from retire_legacy_db_configs import retire
+
+KEYS = {
+    "CONFIGS_KEY": "db_configs",
+    "CONFIG_VERSION_KEY": "db_configs:version",
+    "CONFIG_CHANNEL": "db_configs:changed",
+    "LEGACY_CONFIG_PREFIX": "db_config:",
+    "LEGACY_RETIRED_KEY": "db_configs:legacy_retired",
+    "LEGACY_TOMBSTONES_KEY": "db_configs:legacy_deleted",
+    "LEGACY_SYNC_KEY": "db_configs:legacy_sync"
+}
+STATE = {
+    "_configs": None, "_configs_version": None, "_configs_checked_at": 0.0,
+    "_listening": False, "_legacy_retired": False, "_legacy_synced_at": 0.0
+}
+
+
+@contextmanager
+def isolated_configs(system_code: str):
+    """Point DbConfigService at test keys and start from an empty cache"""
+    names = list(KEYS) + list(STATE)
+    previous = {name: getattr(DbConfigService, name) for name in names}
+    for name, suffix in KEYS.items():
+        setattr(DbConfigService, name, f"test:{system_code}:{suffix}")
+    for name, value in STATE.items():
+        setattr(DbConfigService, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(DbConfigService, name, value)
+
+
+async def forget(system_code: str):
+    redis_client = await RedisClient.get_instance()
+    keys = [key async for key in redis_client.scan_iter(match=f"test:{system_code}:*", count=1000)]
+    if keys:
+        await redis_client.delete(*keys)
+
+
+def run_config_test(check):
+    async def wrapper(system_code):
+        with isolated_configs(system_code):
+            try:
+                await check(system_code)
+            finally:
+                await forget(system_code)
+    run_redis_test(wrapper)
+
+
+async def add(system_code: str, address: str = "db1:3306"):
+    return await DbConfigService.add_database(AddDatabaseRequest(
+        system_code=system_code, db_type=DatabaseType.MYSQL, db_address=address, db_user="u", db_password="p"
+    ))
+
+
+async def write_legacy(config):
+    """Save a config the way an instance on the previous version does"""
+    redis_client = await RedisClient.get_instance()
+    await redis_client.set(f"{DbConfigService.LEGACY_CONFIG_PREFIX}{config.guid}", config.model_dump_json())
+
+
+async def legacy_keys() -> list:
+    redis_client = await RedisClient.get_instance()
+    return [key async for key in redis_client.scan_iter(match=f"{DbConfigService.LEGACY_CONFIG_PREFIX}*")]
+
+
+def test_legacy_changes_synced_and_cache_dropped():
+    """Configs added or changed by old instances reach the hash and the cache of subscribed workers"""
+    print("Testing legacy sync...")
+
+    async def check(system_code):
+        config = await add(system_code)
+        assert len(await legacy_keys()) == 1
+        print("   ✓ New configs written to both layouts")
+
+        # A subscribed worker serves reads from memory
+        DbConfigService._listening = True
+        assert (await DbConfigService.get_database(config.guid)).db_address == "db1:3306"
+        await write_legacy(config.model_copy(update={"db_address": "db2:3306"}))
+        added = config.model_copy(update={"guid": f"{system_code}-old", "db_address": "db3:3306"})
+        await write_legacy(added)
+        assert (await DbConfigService.get_database(config.guid)).db_address == "db1:3306"
+
+        assert sorted(await DbConfigService.sync_legacy_configs()) == sorted([config.guid, added.guid])
+        assert (await DbConfigService.get_database(config.guid)).db_address == "db2:3306"
+        assert (await DbConfigService.get_database(added.guid)).db_address == "db3:3306"
+        assert await DbConfigService.sync_legacy_configs() == []
+        print("   ✓ Changed and added configs synced, cache dropped")
+
+        redis_client = await RedisClient.get_instance()
+        await redis_client.delete(f"{DbConfigService.LEGACY_CONFIG_PREFIX}{added.guid}")
+        assert await DbConfigService.sync_legacy_configs() == []
+        assert await DbConfigService.get_database(added.guid) is not None
+        print("   ✓ A missing legacy key never deletes a config")
+    run_config_test(check)
+
+
+def test_deleted_config_not_brought_back():
+    """A legacy write for a config deleted by this version is dropped, not synced back"""
+    print("Testing delete tombstones...")
+
+    async def check(system_code):
+        config = await add(system_code)
+        await DbConfigService.delete_database(config.guid)
+        assert await legacy_keys() == []
+
+        # An old instance saves the config it still has in memory
+        await write_legacy(config)
+        assert await DbConfigService.sync_legacy_configs() == []
+        assert await DbConfigService.get_database(config.guid) is None
+        assert await legacy_keys() == []
+        print("   ✓ Late legacy write discarded")
+    run_config_test(check)
+
+
+def test_periodic_sync_rate_limited():
+    """One worker syncs per check interval, and change notifications do not start extra syncs"""
+    print("Testing periodic sync...")
+
+    async def check(system_code):
+        config = await add(system_code)
+        await write_legacy(config.model_copy(update={"db_address": "db2:3306"}))
+
+        redis_client = await RedisClient.get_instance()
+        await redis_client.set(DbConfigService.LEGACY_SYNC_KEY, "another worker", ex=30)
+        assert (await DbConfigService.get_database(config.guid)).db_address == "db1:3306"
+        print("   ✓ Skipped while another worker holds this interval")
+
+        await redis_client.delete(DbConfigService.LEGACY_SYNC_KEY)
+        synced_at = DbConfigService._legacy_synced_at
+        await DbConfigService._on_config_changed(json.dumps({"guid": config.guid, "source": "another worker"}))
+        assert DbConfigService._legacy_synced_at == synced_at
+        assert (await DbConfigService.get_database(config.guid)).db_address == "db1:3306"
+        print("   ✓ Notifications do not trigger a sync")
+
+        DbConfigService._legacy_synced_at = 0.0
+        assert (await DbConfigService.get_database(config.guid)).db_address == "db2:3306"
+        assert await redis_client.exists(DbConfigService.LEGACY_SYNC_KEY)
+        print("   ✓ Synced once the interval is due")
+    run_config_test(check)
+
+
+def test_retirement():
+    """After retirement nothing is written to or synced from the legacy layout, even by a sync already under way"""
+    print("Testing retirement...")
+
+    async def check(system_code):
+        config = await add(system_code)
+        await DbConfigService.delete_database((await add(system_code, "db9:3306")).guid)
+
+        # A sync that listed the legacy keys just before the retire script ran
+        listed = await legacy_keys()
+        redis_client = await RedisClient.get_instance()
+        await redis_client.set(DbConfigService.LEGACY_RETIRED_KEY, 1)
+        await redis_client.delete(*listed)
+        assert await DbConfigService._sync_legacy_keys(listed) == []
+        assert await DbConfigService.get_database(config.guid) is not None
+        print("   ✓ Sync racing with retirement changes nothing")
+
+        # Undo the retirement, including this worker's memory of it, to run the real script
+        await redis_client.delete(DbConfigService.LEGACY_RETIRED_KEY)
+        DbConfigService._legacy_retired = False
+        await write_legacy(config.model_copy(update={"db_address": "db2:3306"}))
+        await retire(batch_size=10)
+        redis_client = await RedisClient.get_instance()
+        assert await legacy_keys() == []
+        assert not await redis_client.exists(DbConfigService.LEGACY_TOMBSTONES_KEY)
+        assert await redis_client.exists(DbConfigService.LEGACY_RETIRED_KEY)
+        assert (await DbConfigService.get_database(config.guid)).db_address == "db2:3306"
+        print("   ✓ Retire script syncs once, then removes legacy keys and tombstones")
+
+        newer = await add(system_code, "db4:3306")
+        await DbConfigService.delete_database(config.guid)
+        assert await legacy_keys() == []
+        await write_legacy(newer.model_copy(update={"db_address": "db5:3306"}))
+        assert await DbConfigService.sync_legacy_configs() == []
+        assert (await DbConfigService.get_database(newer.guid)).db_address == "db4:3306"
+        print("   ✓ No more dual writes or syncs")
+    run_config_test(check)
+
+
+if __name__ == "__main__":
+    test_legacy_changes_synced_and_cache_dropped()
+    test_deleted_config_not_brought_back()
+    test_periodic_sync_rate_limited()
+    test_retirement()
+    print("\n✅ All legacy database config tests passed!")
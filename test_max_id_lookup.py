@@ -0,0 +1,37 @@
+"""
+Test script for max ID resolution.
+
+The catalog value (sequence / identity position) is only a hint: when rows with
+higher IDs exist (COPY, OVERRIDING SYSTEM VALUE, a reseed) MAX() must be used.
+"""
+
+import asyncio
+from app.services.db_connector import MAX_ID_METHOD_CATALOG, MAX_ID_METHOD_MAX
+from connector_test_support import FakeConnector
+
+
+def test_catalog_value_trusted_when_nothing_above():
+    """An up-to-date catalog value is used without a MAX() query"""
+    print("Testing up-to-date catalog value...")
+    connector = FakeConnector({"t": [1, 2, 3]}, catalog={"t": 5})
+    assert asyncio.run(connector.resolve_max_id("db", "t", "id")) == (5, MAX_ID_METHOD_CATALOG)
+    assert connector.max_queries() == []
+    print("   ✓ Catalog value used")
+
+
+def test_lagging_catalog_value_falls_back_to_max():
+    """Rows inserted past the sequence (e.g. COPY) make the lookup fall back to MAX()"""
+    print("Testing lagging catalog value...")
+    connector = FakeConnector({"t": [1, 2, 900]}, catalog={"t": 2})
+    assert asyncio.run(connector.resolve_max_id("db", "t", "id")) == (900, MAX_ID_METHOD_MAX)
+    print("   ✓ MAX() used when a row has a higher ID")
+
+    connector = FakeConnector({"t": [1, 2]})
+    assert asyncio.run(connector.resolve_max_id("db", "t", "id")) == (2, MAX_ID_METHOD_MAX)
+    print("   ✓ MAX() used without a catalog value")
+
+
+if __name__ == "__main__":
+    test_catalog_value_trusted_when_nothing_above()
+    test_lagging_catalog_value_falls_back_to_max()
+    print("\n✅ All max ID lookup tests passed!")
@@ -0,0 +1,48 @@
+"""
+Test script for the per-worker catalog metadata cache (database lists of each config).
+"""
+
+import asyncio
+from app.services.metadata_cache import MetadataCache
+from connector_test_support import FakeConnector, serve_connector
+
+
+def listings(connector) -> int:
+    return sum(1 for method, _arg in connector.calls if method == "databases")
+
+
+def test_database_list_served_from_cache():
+    """A config's databases are listed once until the entry is invalidated or the connection settings change"""
+    print("Testing cached database lists...")
+
+    async def check():
+        connector = FakeConnector({}, system_code="metadata_cache")
+        config = connector.config
+        MetadataCache.invalidate(config.guid)
+        with serve_connector(connector):
+            assert await MetadataCache.get_databases(config) == ["db"]
+            assert await MetadataCache.get_databases(config) == ["db"]
+            assert listings(connector) == 1
+            print("   ✓ Second lookup served from the cache")
+
+            MetadataCache.invalidate(config.guid)
+            await MetadataCache.get_databases(config)
+            assert listings(connector) == 2
+            print("   ✓ Invalidation lists the databases again")
+
+            moved = config.model_copy(update={"db_address": "otherhost:3306"})
+            await MetadataCache.get_databases(moved)
+            assert listings(connector) == 3
+            print("   ✓ New connection settings miss the old entry")
+        MetadataCache.invalidate(config.guid)
+
+    stats = MetadataCache.get_stats()
+    asyncio.run(check())
+    after = MetadataCache.get_stats()
+    assert (after["hits"] - stats["hits"], after["misses"] - stats["misses"]) == (1, 3)
+    print("   ✓ Hits and misses counted")
+
+
+if __name__ == "__main__":
+    test_database_list_served_from_cache()
+    print("\n✅ All metadata cache tests passed!")
@@ -0,0 +1,43 @@
+"""
+Test script for the include/exclude rules of database configs.
+"""
+
+from app.utils.name_filter import NameFilter, invalid_rules
+
+
+def test_glob_and_regex_rules():
+    """Globs match the whole name, `re:` rules are searched, both case-insensitively"""
+    print("Testing glob and regex rules...")
+    name_filter = NameFilter(exclude=["log_*", "*_bak", r"re:^tmp_\d+$"])
+    assert not name_filter.matches("log_2024")
+    assert not name_filter.matches("LOG_2024")
+    assert not name_filter.matches("orders_bak")
+    assert not name_filter.matches("tmp_42")
+    assert name_filter.matches("tmp_x")
+    assert name_filter.matches("catalog_items")
+    print("   ✓ Exclude rules")
+
+    name_filter = NameFilter(include=["order*", "sales.*"], exclude=["*_archive"])
+    assert name_filter.filter(["orders", "order_items", "users", "sales.invoices", "orders_archive"]) == [
+        "orders", "order_items", "sales.invoices"
+    ]
+    print("   ✓ Include rules combined with exclude rules")
+
+    assert not NameFilter()
+    assert NameFilter().matches("anything")
+    print("   ✓ Empty filter lets everything through")
+
+
+def test_invalid_rules():
+    """Broken regular expressions are reported instead of failing at scan time"""
+    print("Testing rule validation...")
+    assert invalid_rules(["log_*", "re:^ok$"]) == []
+    errors = invalid_rules(["re:(unclosed", "fine"])
+    assert len(errors) == 1 and errors[0].startswith("re:(unclosed")
+    print("   ✓ Invalid regex reported")
+
+
+if __name__ == "__main__":
+    test_glob_and_regex_rules()
+    test_invalid_rules()
+    print("\n✅ All name filter tests passed!")
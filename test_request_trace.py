@@ -0,0 +1,56 @@
+"""
+Test script for per-request stage tracing.
+
+Verifies that spans are aggregated per stage and that only traces slower than
+the configured threshold are kept in the ring buffer.
+"""
+
+import time
+from app.utils.trace import RequestTrace, TraceRecorder
+from app.config import TRACE_SLOW_THRESHOLD_MS
+
+
+def test_stage_totals():
+    """Spans with the same stage name are summed"""
+    print("Testing stage totals...")
+    trace = RequestTrace("allocate", trace_id="abc")
+    with trace.span("lock_acquire"):
+        pass
+    with trace.span("lock_acquire"):
+        pass
+    with trace.span("increment"):
+        pass
+
+    totals = trace.stage_totals()
+    assert set(totals.keys()) == {"lock_acquire", "increment"}
+    assert len(trace.spans) == 3
+    assert trace.trace_id == "abc"
+    print("   ✓ spans aggregated per stage")
+
+
+def test_slow_trace_sampling():
+    """Fast traces are dropped, slow traces are buffered"""
+    print("Testing slow trace sampling...")
+    TraceRecorder.clear()
+
+    fast = RequestTrace("allocate")
+    fast.finish()
+    assert TraceRecorder.get_slow_traces() == []
+
+    slow = RequestTrace("allocate")
+    with slow.span("initialize_single_field"):
+        time.sleep(TRACE_SLOW_THRESHOLD_MS / 1000 + 0.01)
+    slow.finish(status="404")
+
+    traces = TraceRecorder.get_slow_traces()
+    assert len(traces) == 1
+    assert traces[0]["trace_id"] == slow.trace_id
+    assert traces[0]["attributes"]["status"] == "404"
+    assert "initialize_single_field" in traces[0]["stages"]
+    print("   ✓ only slow traces are buffered")
+
+
+if __name__ == "__main__":
+    test_stage_totals()
+    test_slow_trace_sampling()
+    print("\n✅ All trace tests passed!")
@@ -0,0 +1,115 @@
+"""
+Test script for the per-config scan scheduler (ScannerService).
+
+Triggers only mark configs as due in the persisted schedule; scans run when the
+scheduler (on the leader) ticks. The fake configs are the only configs the
+scheduler sees, so real databases are never scanned.
+
+Needs Redis (see redis_test_support).
+"""
+
+import asyncio
+import time
+from app.redis_client import RedisClient
+from app.services.scanner_service import ScannerService
+from connector_test_support import FakeConnector, serve_connector
+from redis_test_support import run_redis_test
+
+
+async def tick() -> int:
+    """Run one scheduler tick and wait for the scans it started; returns how many were started"""
+    await ScannerService._run_due_scans()
+    tasks = list(ScannerService._scheduled_tasks.values())
+    await asyncio.gather(*tasks)
+    return len(tasks)
+
+
+async def schedules() -> dict:
+    return {schedule.guid: schedule for schedule in await ScannerService.get_schedules()}
+
+
+async def forget(connectors):
+    guids = [connector.config.guid for connector in connectors]
+    redis_client = await RedisClient.get_instance()
+    await redis_client.hdel(ScannerService.SCHEDULE_KEY, *guids)
+    await redis_client.delete(
+        *(f"{ScannerService.FINGERPRINT_PREFIX}{guid}" for guid in guids),
+        *(f"{ScannerService.DISCOVERED_PREFIX}{guid}" for guid in guids)
+    )
+    ScannerService._scheduled_tasks.clear()
+
+
+def test_only_due_configs_are_scanned():
+    """New configs are scanned at once, then not again until their interval has passed or they are triggered"""
+    print("Testing due scans...")
+
+    async def check(system_code):
+        # auto_provision stays "none", so no counters are created under the second system code
+        connectors = [FakeConnector({"t": [1]}, system_code=code) for code in (system_code, f"{system_code}_b")]
+        first, second = connectors
+        try:
+            with serve_connector(*connectors):
+                assert await tick() == 2
+                state = await schedules()
+                assert all(state[c.config.guid].next_run_at > time.time() + 30 for c in connectors)
+                assert all(state[c.config.guid].last_result.discovered == 1 for c in connectors)
+                print("   ✓ First tick scans every config and schedules the next run")
+
+                assert await tick() == 0
+                print("   ✓ Nothing scanned before the interval has passed")
+
+                await ScannerService.trigger_config_scan(second.config.guid)
+                first.calls.clear()
+                second.calls.clear()
+                assert await tick() == 1
+                assert first.calls == [] and second.calls != []
+                print("   ✓ A trigger scans that config only")
+        finally:
+            await forget(connectors)
+    run_redis_test(check)
+
+
+def test_trigger_all_marks_every_config_due():
+    """/scanner/run only updates the schedule; the next tick scans every config, forced ones in full"""
+    print("Testing scan triggers...")
+
+    async def check(system_code):
+        connectors = [FakeConnector({"t": [1]}, system_code=code) for code in (system_code, f"{system_code}_b")]
+        for connector in connectors:
+            connector.fingerprint = "v1"
+        try:
+            with serve_connector(*connectors):
+                assert await tick() == 2
+
+                calls = [list(connector.calls) for connector in connectors]
+                triggered = await ScannerService.trigger_all_scans()
+                assert len(triggered) == 2 and all(schedule.next_run_at <= time.time() for schedule in triggered)
+                await asyncio.sleep(0.05)
+                assert [connector.calls for connector in connectors] == calls
+                print("   ✓ Trigger marks both configs due without scanning")
+
+                assert await tick() == 2
+                state = await schedules()
+                assert all(state[c.config.guid].last_result.skipped_databases == 1 for c in connectors)
+                print("   ✓ Unforced scans skip databases with an unchanged fingerprint")
+
+                await ScannerService.trigger_all_scans(force=True)
+                assert all(schedule.force_next for schedule in (await schedules()).values())
+                assert await tick() == 2
+                state = await schedules()
+                assert all(state[c.config.guid].last_result.skipped_databases == 0 for c in connectors)
+                assert not any(schedule.force_next for schedule in state.values())
+                print("   ✓ Forced scans read every database, then the flag is cleared")
+
+                report = await ScannerService.get_last_report()
+                assert sorted(result.guid for result in report.configs) == sorted(c.config.guid for c in connectors)
+                print("   ✓ Report built from the latest result of each config")
+        finally:
+            await forget(connectors)
+    run_redis_test(check)
+
+
+if __name__ == "__main__":
+    test_only_due_configs_are_scanned()
+    test_trigger_all_marks_every_config_due()
+    print("\n✅ All scanner schedule tests passed!")
@@ -0,0 +1,100 @@
+"""
+Test script for idle segment archival (SegmentArchiveService).
+
+Test counters are marked idle by moving their activity time back to ANCIENT, and
+archival runs with a cutoff at that time, so counters of a shared Redis are never
+touched. Needs the Redis configured in .env; skipped when Redis is not reachable.
+"""
+
+import asyncio
+import time
+from app.redis_client import RedisClient
+from app.services.db_config_service import DbConfigService
+from app.services.segment_archive_service import SegmentArchiveService
+from app.services.segment_service import SegmentService
+from app.services.segment_store import SegmentStore
+from redis_test_support import run_redis_test
+
+ANCIENT = 100
+SEED = 2 ** 60
+
+
+async def make_idle(segment_key: str):
+    SegmentArchiveService._last_used.pop(segment_key, None)
+    redis_client = await RedisClient.get_instance()
+    await redis_client.zadd(SegmentStore.ACTIVITY_KEY, {segment_key: ANCIENT})
+
+
+async def archive_ancient() -> int:
+    """Archive counters idle since ANCIENT only; returns the number archived"""
+    summary = await SegmentArchiveService.archive_idle(int(time.time()) - ANCIENT)
+    return summary["last_archived"]
+
+
+async def allocate(system_code: str, table: str, count: int):
+    return await SegmentService.allocate_segment(system_code, "db", table, "id", count)
+
+
+def test_idle_counter_archived_and_restored():
+    """An idle counter leaves the live layout and is restored by the next allocation"""
+    print("Testing archive and restore on allocation...")
+
+    async def check(system_code):
+        key = f"{system_code}:db:orders:id"
+        active = f"{system_code}:db:active:id"
+        await DbConfigService.seed_segments([(key, SEED), (active, 1)])
+        first = await allocate(system_code, "orders", 10)
+        assert (first.start, first.end) == (SEED + 1, SEED + 10)
+
+        await make_idle(key)
+        assert await archive_ancient() == 1
+        assert await SegmentStore.incrby_existing(key, 1) is None
+        assert await SegmentStore.incrby_existing(active, 1) == 2
+        print("   ✓ Only the idle counter archived")
+
+        second = await allocate(system_code, "orders", 10)
+        assert (second.start, second.end) == (SEED + 11, SEED + 20)
+        assert await SegmentStore.incrby_existing(key, 1) == SEED + 21
+        print("   ✓ Restored by the next allocation without losing IDs")
+
+        await SegmentArchiveService.flush()
+        redis_client = await RedisClient.get_instance()
+        assert await redis_client.zscore(SegmentStore.ACTIVITY_KEY, key) > ANCIENT
+        assert await archive_ancient() == 0
+        print("   ✓ Allocation marks the counter active again")
+    run_redis_test(check)
+
+
+def test_allocation_racing_archive_never_goes_back():
+    """Allocations interleaved with archive passes hand out disjoint, never lower ranges"""
+    print("Testing allocations racing the archiver...")
+
+    async def check(system_code):
+        key = f"{system_code}:db:busy:id"
+        await DbConfigService.seed_segments([(key, SEED)])
+
+        ranges = []
+        archived = 0
+        for _round in range(20):
+            await make_idle(key)
+            outcomes = await asyncio.gather(
+                archive_ancient(),
+                *(allocate(system_code, "busy", 5) for _ in range(10))
+            )
+            archived += outcomes[0]
+            ranges.extend((segment.start, segment.end) for segment in outcomes[1:])
+
+        assert archived > 0, "the archiver never won the race; nothing was tested"
+        ranges.sort()
+        assert ranges[0][0] == SEED + 1
+        for (_start, end), (next_start, _end) in zip(ranges, ranges[1:]):
+            assert next_start == end + 1
+        assert ranges[-1][1] == SEED + 20 * 10 * 5
+        print(f"   ✓ 200 disjoint ranges with {archived} archive passes in between")
+    run_redis_test(check)
+
+
+if __name__ == "__main__":
+    test_idle_counter_archived_and_restored()
+    test_allocation_racing_archive_never_goes_back()
+    print("\n✅ All segment archive tests passed!")
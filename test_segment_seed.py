@@ -0,0 +1,85 @@
+"""
+Test script for raise-only seeding of segment counters (SegmentStore.SEED_SCRIPT).
+
+Needs the Redis configured in .env; every test works on its own system code and
+deletes its counters afterwards. Skipped when Redis is not reachable.
+"""
+
+from app.services.db_config_service import DbConfigService
+from app.services.segment_store import SegmentStore
+from redis_test_support import run_redis_test
+
+
+async def seed(segment_key: str, value: int) -> str:
+    """Seed one counter and return which of created / raised / unchanged happened"""
+    summary = await DbConfigService.seed_segments([(segment_key, value)])
+    return next(outcome for outcome, count in summary.items() if count)
+
+
+async def value_of(segment_key: str) -> int:
+    return (await SegmentStore.get_many([segment_key]))[0]
+
+
+def test_seed_never_lowers():
+    """A seed creates a missing counter, raises a lower one and leaves a higher one alone"""
+    print("Testing raise-only seeding...")
+
+    async def check(system_code):
+        key = f"{system_code}:db:orders:id"
+        assert await seed(key, 100) == "created"
+        assert await seed(key, 50) == "unchanged"
+        assert await seed(key, 100) == "unchanged"
+        assert await seed(key, 101) == "raised"
+        assert await value_of(key) == 101
+
+        summary = await DbConfigService.seed_segments([(f"{system_code}:db:t{i}:id", i) for i in range(3)] + [(key, 5)])
+        assert summary == {"created": 3, "raised": 0, "unchanged": 1}
+    run_redis_test(check)
+    print("   ✓ Created, raised and unchanged counters")
+
+
+def test_seed_negative_values():
+    """Negative values compare by magnitude the other way round"""
+    print("Testing negative seeds...")
+
+    async def check(system_code):
+        key = f"{system_code}:db:signed:id"
+        assert await seed(key, -100) == "created"
+        assert await seed(key, -1000) == "unchanged"
+        assert await seed(key, -99) == "raised"
+        assert await seed(key, -100) == "unchanged"
+        assert await seed(key, 0) == "raised"
+        assert await seed(key, -1) == "unchanged"
+        assert await seed(key, 7) == "raised"
+        assert await value_of(key) == 7
+    run_redis_test(check)
+    print("   ✓ Negative and mixed-sign comparisons")
+
+
+def test_seed_above_double_precision():
+    """Values above 2^53 that are equal as doubles still compare exactly"""
+    print("Testing seeds above 2^53...")
+
+    async def check(system_code):
+        key = f"{system_code}:db:big:id"
+        base = 2 ** 53
+        assert float(base) == float(base + 1)
+        assert await seed(key, base) == "created"
+        assert await seed(key, base + 1) == "raised"
+        assert await seed(key, base) == "unchanged"
+        assert await value_of(key) == base + 1
+
+        # Same length, differing only in the last digit; and a shorter number
+        assert await seed(key, 9223372036854775806) == "raised"
+        assert await seed(key, 9223372036854775807) == "raised"
+        assert await seed(key, 999999999999999999) == "unchanged"
+        assert await value_of(key) == 9223372036854775807
+    run_redis_test(check)
+    print("   ✓ Exact comparison up to the BIGINT maximum")
+
+
+if __name__ == "__main__":
+    test_seed_never_lowers()
+    test_seed_negative_values()
+    test_seed_above_double_precision()
+    print("\n✅ All segment seed tests passed!")
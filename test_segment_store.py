@@ -0,0 +1,137 @@
+"""
+Test script for the segment counter layouts (SegmentStore string / hash layouts).
+
+Covers the increment-if-exists script, raise-only seeding in the hash layout, moving
+counters between layouts and restoring archived counters. Needs the Redis configured
+in .env; every test works on its own system code and deletes its counters afterwards.
+Skipped when Redis is not reachable.
+"""
+
+import time
+from app.redis_client import RedisClient
+from app.services.db_config_service import DbConfigService
+from app.services.segment_store import SegmentStore
+from redis_test_support import run_redis_test, segment_layout as layout
+
+LAYOUTS = (SegmentStore.LAYOUT_STRING, SegmentStore.LAYOUT_HASH)
+
+
+async def stored_in(segment_key: str) -> dict:
+    """Raw value of a counter in each location"""
+    redis_client = await RedisClient.get_instance()
+    string_key, hash_key, archive_key, field = SegmentStore._keys(segment_key)
+    return {
+        SegmentStore.LAYOUT_STRING: await redis_client.get(string_key),
+        SegmentStore.LAYOUT_HASH: await redis_client.hget(hash_key, field),
+        "archive": await redis_client.hget(archive_key, field)
+    }
+
+
+def test_incr_in_both_layouts():
+    """Increments apply only to existing counters and stay exact above 2^53"""
+    print("Testing increment-if-exists...")
+
+    async def check(system_code):
+        for name in LAYOUTS:
+            key = f"{system_code}:db:{name}:id"
+            with layout(name):
+                assert await SegmentStore.incrby_existing(key, 10) is None
+                assert await stored_in(key) == {SegmentStore.LAYOUT_STRING: None, SegmentStore.LAYOUT_HASH: None, "archive": None}
+
+                await DbConfigService.seed_segments([(key, 2 ** 60)])
+                assert await SegmentStore.incrby_existing(key, 1) == 2 ** 60 + 1
+                assert await SegmentStore.incrby_existing(key, 1000) == 2 ** 60 + 1001
+                assert (await stored_in(key))[name] == str(2 ** 60 + 1001)
+            print(f"   ✓ {name} layout")
+    run_redis_test(check, layout=SegmentStore.LAYOUT_STRING)
+
+
+def test_seed_in_hash_layout():
+    """Raise-only seeding compares exactly in the hash layout too"""
+    print("Testing seeding in the hash layout...")
+
+    async def check(system_code):
+        key = f"{system_code}:db:seeded:id"
+        with layout(SegmentStore.LAYOUT_HASH):
+            await DbConfigService.seed_segments([(key, 2 ** 53 + 1)])
+            assert await DbConfigService.seed_segments([(key, 2 ** 53)]) == {"created": 0, "raised": 0, "unchanged": 1}
+            assert await DbConfigService.seed_segments([(key, -5)]) == {"created": 0, "raised": 0, "unchanged": 1}
+            assert await DbConfigService.seed_segments([(key, 2 ** 53 + 2)]) == {"created": 0, "raised": 1, "unchanged": 0}
+            assert (await stored_in(key))[SegmentStore.LAYOUT_HASH] == str(2 ** 53 + 2)
+    run_redis_test(check, layout=SegmentStore.LAYOUT_STRING)
+    print("   ✓ Raise-only in the hash layout")
+
+
+def test_switch_layout_keeps_counter():
+    """A counter written in one layout is moved to the other on first use, value intact"""
+    print("Testing layout switches...")
+
+    async def check(system_code):
+        key = f"{system_code}:db:moved:id"
+        value = 2 ** 60 + 7
+        with layout(SegmentStore.LAYOUT_STRING):
+            await DbConfigService.seed_segments([(key, value)])
+
+        with layout(SegmentStore.LAYOUT_HASH):
+            # Not in the hash layout yet: no increment, and nothing recreated from zero
+            assert await SegmentStore.incrby_existing(key, 1) is None
+            assert await SegmentStore.get_many([key]) == [value]
+            assert await SegmentStore.exists(key)
+            assert await stored_in(key) == {SegmentStore.LAYOUT_STRING: None, SegmentStore.LAYOUT_HASH: str(value), "archive": None}
+            assert await SegmentStore.incrby_existing(key, 1) == value + 1
+        print("   ✓ string -> hash")
+
+        with layout(SegmentStore.LAYOUT_STRING):
+            # The migration tool's batch load moves it back
+            redis_client = await RedisClient.get_instance()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                SegmentStore.queue_load(pipe, [key, f"{system_code}:db:missing:id"])
+                found, = await pipe.execute()
+            assert found == [1, 0]
+            assert await stored_in(key) == {SegmentStore.LAYOUT_STRING: str(value + 1), SegmentStore.LAYOUT_HASH: None, "archive": None}
+            assert await SegmentStore.incrby_existing(key, 1) == value + 2
+        print("   ✓ hash -> string")
+    run_redis_test(check, layout=SegmentStore.LAYOUT_STRING)
+
+
+def test_archive_then_restore():
+    """An archived counter is restored with the same value, in either layout"""
+    print("Testing archive and restore...")
+
+    async def check(system_code):
+        redis_client = await RedisClient.get_instance()
+        for name in LAYOUTS:
+            key = f"{system_code}:db:archived_{name}:id"
+            with layout(name):
+                await DbConfigService.seed_segments([(key, 2 ** 60)])
+                assert await SegmentStore.incrby_existing(key, 5) == 2 ** 60 + 5
+
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    SegmentStore.queue_archive(pipe, [key], int(time.time()) + 1)
+                    archived, = await pipe.execute()
+                assert archived == 1
+                assert await stored_in(key) == {SegmentStore.LAYOUT_STRING: None, SegmentStore.LAYOUT_HASH: None, "archive": str(2 ** 60 + 5)}
+                assert await redis_client.zscore(SegmentStore.ACTIVITY_KEY, key) is None
+                assert await SegmentStore.get_many([key]) == [2 ** 60 + 5]
+
+                # Scanner-style loads see it without restoring it
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    SegmentStore.queue_load(pipe, [key])
+                    found, = await pipe.execute()
+                assert found == [1] and (await stored_in(key))["archive"] is not None
+
+                assert await SegmentStore.incrby_existing(key, 1) is None
+                assert await SegmentStore.exists(key)
+                assert (await stored_in(key))["archive"] is None
+                assert await redis_client.zscore(SegmentStore.ACTIVITY_KEY, key) is not None
+                assert await SegmentStore.incrby_existing(key, 1) == 2 ** 60 + 6
+            print(f"   ✓ {name} layout")
+    run_redis_test(check, layout=SegmentStore.LAYOUT_STRING)
+
+
+if __name__ == "__main__":
+    test_incr_in_both_layouts()
+    test_seed_in_hash_layout()
+    test_switch_layout_keeps_counter()
+    test_archive_then_restore()
+    print("\n✅ All segment store tests passed!")
@@ -0,0 +1,48 @@
+"""
+Test script for the Space-Saving top-K sketch used by hot key tracking.
+"""
+
+import random
+from app.utils.space_saving import SpaceSaving
+
+
+def test_exact_when_under_capacity():
+    """Counts are exact while the number of keys fits in the sketch"""
+    print("Testing exact counts under capacity...")
+    sketch = SpaceSaving(capacity=10)
+    for key, weight in [("a", 1), ("b", 5), ("a", 2), ("c", 1)]:
+        sketch.add(key, weight)
+
+    assert sketch.top() == [("b", 5, 0), ("a", 3, 0), ("c", 1, 0)]
+    print("   ✓ exact counts")
+
+
+def test_heavy_hitters_survive_eviction():
+    """Heavy hitters stay in the sketch and are never under-counted"""
+    print("Testing heavy hitters under eviction...")
+    random.seed(42)
+    sketch = SpaceSaving(capacity=20)
+    true_counts = {}
+
+    for _ in range(20000):
+        if random.random() < 0.5:
+            key = f"hot:{random.randint(0, 4)}"
+        else:
+            key = f"cold:{random.randint(0, 5000)}"
+        true_counts[key] = true_counts.get(key, 0) + 1
+        sketch.add(key)
+
+    assert len(sketch) == 20
+    top_keys = [key for key, _count, _error in sketch.top(5)]
+    assert sorted(top_keys) == [f"hot:{i}" for i in range(5)]
+
+    for key, count, error in sketch.top():
+        assert count >= true_counts[key]
+        assert count - error <= true_counts[key]
+    print("   ✓ hot keys retained with valid error bounds")
+
+
+if __name__ == "__main__":
+    test_exact_when_under_capacity()
+    test_heavy_hitters_survive_eviction()
+    print("\n✅ All space-saving tests passed!")
@@ -0,0 +1,48 @@
+"""
+Test script for the TTL + LRU cache used for catalog metadata.
+"""
+
+import time
+from app.utils.ttl_cache import TTLCache
+
+
+def test_lru_eviction_and_stats():
+    """The least recently used entry is evicted once the cache is full"""
+    print("Testing LRU eviction...")
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set(("g", "a"), 1)
+    cache.set(("g", "b"), 2)
+    assert cache.get(("g", "a")) == 1  # "a" is now the most recently used
+    cache.set(("g", "c"), 3)
+
+    assert cache.get(("g", "b")) is None
+    assert cache.get(("g", "a")) == 1
+    assert cache.get(("g", "c")) == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+    print("   ✓ LRU eviction and hit/miss counters")
+
+
+def test_ttl_expiry_and_prefix_invalidation():
+    """Entries expire after the TTL and can be dropped by key prefix"""
+    print("Testing TTL expiry and invalidation...")
+    cache = TTLCache(max_size=10, ttl=0.05)
+    cache.set(("g1", "db1", "t1"), True)
+    time.sleep(0.06)
+    assert cache.get(("g1", "db1", "t1")) is None
+    assert len(cache) == 0
+
+    cache.ttl = 60
+    cache.set(("g1", "db1", "t1"), True)
+    cache.set(("g1", "db2", "t1"), True)
+    cache.set(("g2", "db1", "t1"), True)
+    assert cache.invalidate(("g1", "db1")) == 1
+    assert cache.invalidate(("g1",)) == 1
+    assert cache.get(("g2", "db1", "t1")) is True
+    print("   ✓ expired and invalidated entries are gone")
+
+
+if __name__ == "__main__":
+    test_lru_eviction_and_stats()
+    test_ttl_expiry_and_prefix_invalidation()
+    print("\n✅ All TTL cache tests passed!")